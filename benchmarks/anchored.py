@@ -0,0 +1,67 @@
+"""
+A/B benchmark of anchored matching against the full search.
+
+For every code file and pattern, Matcher.match is run with anchored=False (every configuration is explored, as before
+anchors) and with anchored=True (configurations that cannot reach a node labelled by an anchor of the pattern are
+dropped). Both runs must find the same number of matches; the number of steps and the time are compared.
+
+Usage (from the repository root): python benchmarks/anchored.py [--files GLOB] [--no-dedup]
+Without deduplication, the biggest files of the default corpus (base_events.py, selector_events.py) take many minutes.
+"""
+import argparse
+import glob
+import time
+
+from loguru import logger
+
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+
+PATTERNS = {
+    "assign": "?:*\n    ? = ?\n",
+    "for": "?:*\n    for ?i in ?:\n        ?*\n",
+    "ifret": "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "while": "?:*\n    while ?:\n        ?*\n",
+    "funcdef": "?:*\n    def ?(?*):\n        ?*\n",
+}
+
+
+def measure(pda, code_tree, deduplicate, anchored):
+    matcher = Matcher(pda, code_tree, deduplicate, anchored=anchored)
+    start = time.perf_counter()
+    match_set = matcher.start().run()
+    return match_set.count(), matcher.n_step, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", default="tests/tests_files/large/*.py", help="Glob of the code files.")
+    parser.add_argument("--no-dedup", action="store_true", help="Run the matcher without deduplication.")
+    args = parser.parse_args()
+    logger.remove()
+
+    processor = get_processor("python")
+    pdas = {name: processor.create_pda(processor.generate_tree_from_code(code)) for name, code in PATTERNS.items()}
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+
+    print(f"{'file':28s} {'pattern':8s} {'matches':>8s} {'full steps':>11s} {'anchored':>10s} "
+          f"{'full s':>8s} {'anchored s':>10s}")
+    for code_path in sorted(glob.glob(args.files)):
+        code_tree = processor.generate_tree_from_file(code_path)
+        for name, pda in pdas.items():
+            results = {anchored: measure(pda, code_tree, not args.no_dedup, anchored) for anchored in (False, True)}
+            if results[False][0] != results[True][0]:
+                raise AssertionError(f"{code_path} {name}: {results[False][0]} != {results[True][0]} matches")
+            for anchored, (_, n_step, duration) in results.items():
+                totals[anchored][0] += n_step
+                totals[anchored][1] += duration
+            print(f"{code_path.split('/')[-1]:28s} {name:8s} {results[False][0]:8d} {results[False][1]:11d} "
+                  f"{results[True][1]:10d} {results[False][2]:8.3f} {results[True][2]:10.3f}", flush=True)
+
+    print()
+    for anchored, (n_step, duration) in totals.items():
+        print(f"{'anchored' if anchored else 'full':8s} total {n_step:10d} steps, {duration:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
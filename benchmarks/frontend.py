@@ -0,0 +1,58 @@
+"""
+Benchmark of the two front ends of PythonProcessor on code files: the generated ANTLR lexer and parser, and the
+stdlib-based front end of `pyttern.language_processors.python_frontend`, which builds the same pruned trees.
+
+Each file is parsed --runs times by the fast front end and --antlr-runs times (once by default) by ANTLR, and the
+minimum times are printed with the speedup. Files the fast front end does not support are reported and skipped.
+
+Usage (from the repository root): python benchmarks/frontend.py [FILE ...] [--runs N] [--antlr-runs N]
+    Defaults to the three largest files of tests/tests_files/large.
+"""
+import argparse
+import os
+import time
+
+from loguru import logger
+
+from pyttern.language_processors import python_frontend
+from pyttern.language_processors.python_processor import PythonProcessor
+
+LARGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "tests_files", "large")
+
+
+def best_time(function, code, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(code)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--antlr-runs", type=int, default=1)
+    args = parser.parse_args()
+    logger.remove()
+
+    files = args.files or sorted((os.path.join(LARGE, name) for name in os.listdir(LARGE) if name.endswith(".py")),
+                                 key=os.path.getsize, reverse=True)[:3]
+    processor = PythonProcessor()
+    print(f"{'file':<24}{'size':>8}{'ANTLR':>10}{'fast':>10}{'speedup':>9}")
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            code = f.read().strip() + "\n"
+        name = os.path.basename(path)
+        try:
+            fast = best_time(python_frontend.parse, code, args.runs)
+        except python_frontend.UnsupportedCode as e:
+            print(f"{name:<24}not supported: {e}")
+            continue
+        antlr = best_time(processor.parse_code, code, args.antlr_runs)
+        print(f"{name:<24}{len(code):>8}{antlr:>9.2f}s{fast:>9.3f}s{antlr / fast:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
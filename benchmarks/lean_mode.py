@@ -0,0 +1,83 @@
+"""
+A/B benchmark of the lean (count only) match mode against the detailed mode.
+
+For every code file and pattern, three runs are compared:
+    - details: Matcher.match as used for detailed results, every match records its bindings and transition path
+    - lean: the same complete search with lean=True, matches are only counted and no path is built
+    - bool: lean=True with stop_at_first=True, as used by PytternMatcher when match_details is False
+Time is measured without tracing, then peak memory is measured with tracemalloc in a second run.
+
+Usage (from the repository root): python benchmarks/lean_mode.py [--files GLOB] [--dedup] [--no-memory]
+Without --dedup, the biggest files of the default corpus (base_events.py, selector_events.py) take many minutes.
+"""
+import argparse
+import glob
+import time
+import tracemalloc
+
+from loguru import logger
+
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+
+PATTERNS = {
+    "assign": "?:*\n    ? = ?\n",
+    "ifret": "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "raise": "?:*\n    raise ?\n",
+    "call": "?:*\n    ?.append(?)\n",
+}
+
+MODES = {
+    "details": {},
+    "lean": {"lean": True},
+    "bool": {"lean": True, "stop_at_first": True},
+}
+
+
+def measure(pda, code_tree, deduplicate, memory, **kwargs):
+    start = time.perf_counter()
+    count = Matcher.match(pda, code_tree, deduplicate=deduplicate, **kwargs).count()
+    duration = time.perf_counter() - start
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        Matcher.match(pda, code_tree, deduplicate=deduplicate, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return count, duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", default="tests/tests_files/large/*.py", help="Glob of the code files.")
+    parser.add_argument("--dedup", action="store_true", help="Run the matcher in deduplicate mode.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs.")
+    args = parser.parse_args()
+    logger.remove()
+
+    processor = get_processor("python")
+    pdas = {name: processor.create_pda(processor.generate_tree_from_code(code)) for name, code in PATTERNS.items()}
+    totals = {mode: [0.0, 0] for mode in MODES}
+
+    print(f"{'file':28s} {'pattern':8s} {'matches':>8s} " + " ".join(f"{mode + ' s':>10s} {mode + ' KiB':>12s}"
+                                                                      for mode in MODES))
+    for code_path in sorted(glob.glob(args.files)):
+        code_tree = processor.generate_tree_from_file(code_path)
+        for name, pda in pdas.items():
+            row = []
+            count = None
+            for mode, kwargs in MODES.items():
+                n, duration, peak = measure(pda, code_tree, args.dedup, not args.no_memory, **kwargs)
+                count = n if count is None else count
+                totals[mode][0] += duration
+                totals[mode][1] = max(totals[mode][1], peak)
+                row.append(f"{duration:10.3f} {peak / 1024:12.1f}")
+            print(f"{code_path.split('/')[-1]:28s} {name:8s} {count:8d} " + " ".join(row), flush=True)
+
+    print()
+    for mode, (duration, peak) in totals.items():
+        print(f"{mode:8s} total {duration:8.2f} s, max peak {peak / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
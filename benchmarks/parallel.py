@@ -0,0 +1,110 @@
+"""
+Scaling benchmark of PytternMatcher.match_wildcards with a pool of processes.
+
+A corpus of code files is generated in a temporary directory, every file with the same number of functions made of
+assignments, loops and conditions, so that the work is evenly spread. The patterns of the corpus are matched with
+1, 2, 4, ... jobs, up to --max-jobs, and every run is checked against the single job run. Each run is made in a new
+interpreter, so that none of them benefits from the trees and PDAs cached by the previous ones (the workers of a pool
+are forked from the process running it).
+
+Usage (from the repository root): python benchmarks/parallel.py [--files N] [--functions N] [--max-jobs N] [--count]
+"""
+import argparse
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from pyttern import PytternMatcher
+
+PATTERNS = {
+    "assign.pyt": "?:*\n    ?x = ?\n",
+    "ifret.pyt": "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "for.pyt": "?:*\n    for ? in ?:\n        ?*\n",
+    "accumulate.pyt": "?:*\n    ?x = ?\n    ?*\n    for ? in ?:\n        ?x += ?\n",
+}
+
+
+def generate_function(rng, name):
+    lines = [f"def {name}(items, limit):", "    total = 0"]
+    for i in range(rng.randint(2, 6)):
+        lines += [f"    for item_{i} in items:",
+                  f"        if item_{i} > limit:",
+                  f"            total += item_{i} * {rng.randint(1, 9)}",
+                  f"    value_{i} = total - {rng.randint(1, 99)}"]
+    lines += ["    if total > limit:", "        return value_0", "    return total", ""]
+    return "\n".join(lines)
+
+
+def generate_corpus(directory, n_files, n_functions):
+    rng = random.Random(0)
+    for i in range(n_files):
+        with open(os.path.join(directory, f"module_{i:04d}.py"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(generate_function(rng, f"function_{j}") for j in range(n_functions)))
+    for name, code in PATTERNS.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(code)
+
+
+def run(directory, jobs, count, output):
+    """Match the corpus of directory once with a number of jobs, keeping the time and results in an output file."""
+    logger.remove()
+    patterns, code = os.path.join(directory, "*.pyt"), os.path.join(directory, "*.py")
+    start = time.perf_counter()
+    results = PytternMatcher(count_only=count).match_wildcards(patterns, code, jobs=jobs)
+    duration = time.perf_counter() - start
+    if count:
+        results = _counts(results)
+    with open(output, "wb") as f:
+        pickle.dump((duration, results), f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=64, help="Number of generated code files.")
+    parser.add_argument("--functions", type=int, default=10, help="Number of functions per code file.")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count(), help="Maximum number of jobs.")
+    parser.add_argument("--count", action="store_true", help="Count every match instead of checking existence.")
+    parser.add_argument("--run", nargs=3, metavar=("DIRECTORY", "JOBS", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        directory, jobs, output = args.run
+        run(directory, int(jobs), args.count, output)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate_corpus(directory, args.files, args.functions)
+        output = os.path.join(directory, "results.pickle")
+
+        jobs = 1
+        reference = None
+        reference_time = None
+        print(f"{args.files} files, {len(PATTERNS)} patterns, {os.cpu_count()} cpus")
+        print(f"{'jobs':>4s} {'time s':>8s} {'speedup':>8s} {'efficiency':>10s}")
+        while jobs <= args.max_jobs:
+            command = [sys.executable, __file__, "--run", directory, str(jobs), output]
+            subprocess.run(command + (["--count"] if args.count else []), check=True)
+            with open(output, "rb") as f:
+                duration, results = pickle.load(f)
+            if reference is None:
+                reference, reference_time = results, duration
+            elif results != reference:
+                raise AssertionError(f"Results with {jobs} jobs differ from the ones with a single job")
+            speedup = reference_time / duration
+            print(f"{jobs:4d} {duration:8.2f} {speedup:8.2f} {speedup / jobs:10.2f}", flush=True)
+            jobs *= 2
+
+
+def _counts(results):
+    return {code: {pattern: {name: match_set.count() for name, match_set in leaves.items()}
+                   for pattern, leaves in patterns.items()}
+            for code, patterns in results.items()}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold start benchmark of the command line, for a one-file check: `pyttern PATTERN CODE --lang LANG`.
+
+A pattern and a code file of the language are written in a temporary directory, and the command is run --runs times,
+each time in a new interpreter. The minimum and median wall-clock times are printed, with the generated parsers that
+the command imported (read from the output of `python -X importtime`).
+
+Usage (from the repository root): python benchmarks/startup.py [--lang python|java] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+FILES = {
+    "python": ("pattern.pyt", "?:*\n    ?x = ?\n", "code.py", "def f(items):\n    total = 0\n    return total\n"),
+    "java": ("Pattern.jat", "class # {\n    # #(#*) {\n        return #;\n    }\n}\n", "Code.java",
+             "class Code {\n    int f(int x) {\n        return x;\n    }\n}\n"),
+}
+
+
+def command(directory, lang):
+    pattern, _, code, _ = FILES[lang]
+    return [sys.executable, "-m", "pyttern.main", os.path.join(directory, pattern), os.path.join(directory, code),
+            "--lang", lang]
+
+
+def imported_parsers(directory, lang, env):
+    """Names of the modules of the generated parsers and lexers imported by the command."""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command(directory, lang)[1:], env=env,
+                            capture_output=True, text=True, check=True)
+    modules = [line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+               if line.startswith("import time:")]
+    return sorted(module for module in modules if module.startswith("pyttern.antlr.")
+                  and module.rsplit(".", 1)[-1].endswith(("Parser", "Lexer")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lang", choices=sorted(FILES), default="python")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory() as directory:
+        pattern, pattern_code, code, code_code = FILES[args.lang]
+        for name, content in ((pattern, pattern_code), (code, code_code)):
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+        durations = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(command(directory, args.lang), env=env, capture_output=True, check=True)
+            durations.append(time.perf_counter() - start)
+        parsers = imported_parsers(directory, args.lang, env)
+
+    print(f"pyttern {pattern} {code} --lang {args.lang}, {args.runs} runs")
+    print(f"min {min(durations) * 1000:8.1f} ms")
+    print(f"median {statistics.median(durations) * 1000:5.1f} ms")
+    print("imported parsers: " + ", ".join(parsers))
+
+
+if __name__ == "__main__":
+    main()
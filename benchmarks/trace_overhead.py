@@ -0,0 +1,59 @@
+"""
+Cost of the trace points when TRACE logging is disabled, on pattern compilation and matching.
+
+Logging is configured with an ERROR handler, as without -vv, then patterns are compiled
+repeatedly (bypassing the create_pda cache) and matched against a code file.
+
+Usage (from the repository root): python benchmarks/trace_overhead.py [--code FILE] [--repeat N]
+"""
+import argparse
+import sys
+import time
+
+from loguru import logger
+
+from pyttern.language_processors import get_processor
+from pyttern.pytternfsm.python.python_to_pda import Python_to_PDA
+from pyttern.simulator.Matcher import Matcher
+
+PATTERNS = {
+    "assign": "?:*\n    ? = ?\n",
+    "repeat": "?:*\n    ?x = ?x + 1\n",
+    "ifret": "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "function": "def ?(?*):\n    ?:*\n        for ?i in range(?*):\n            ?x = ?x + ?i\n    return ?x\n",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--code", default="tests/tests_files/small/base_futures.py", help="Code file to match.")
+    parser.add_argument("--repeat", type=int, default=200, help="Number of compilations of each pattern.")
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    processor = get_processor("python")
+    trees = {name: processor.generate_tree_from_code(code) for name, code in PATTERNS.items()}
+    code_tree = processor.generate_tree_from_file(args.code)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for tree in trees.values():
+            Python_to_PDA().visit(tree)
+    compile_time = time.perf_counter() - start
+    print(f"compile {args.repeat} x {len(trees)} patterns: {compile_time:.3f} s")
+
+    total = 0.0
+    for name, tree in trees.items():
+        pda = processor.create_pda(tree)
+        matcher = Matcher(pda, code_tree)
+        start = time.perf_counter()
+        matcher.start().run()
+        duration = time.perf_counter() - start
+        total += duration
+        print(f"match {name:9s} {matcher.n_step:7d} steps: {duration:.3f} s ({1e6 * duration / max(matcher.n_step, 1):.1f} us/step)")
+    print(f"match total: {total:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
-from .main import PytternMatcher, match_files
\ No newline at end of file
+from .main import PytternMatcher, match_files
+from .pattern_set import PatternSet
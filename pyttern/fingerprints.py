@@ -0,0 +1,75 @@
+"""
+Fingerprints of the code the persistent caches depend on (see `PDACache` and `TreeCache`).
+
+The version of the installed package does not change between the commits of a source checkout, where it is "unknown",
+so a cache entry is also keyed by the version of its binary format, a version constant of the code that builds it and
+a hash of the source of this code. A change of the compiler or of the tree pruners then invalidates the entries they
+built, even without a new release.
+"""
+import hashlib
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+from .language_processors import tree_serialize
+from .simulator.pda import serialize
+
+PACKAGE = Path(__file__).parent
+
+# Source files of the package building the PDAs and the trees. They are read, not imported, so that a program
+# matching only one language does not load the modules of the other one.
+COMPILER_SOURCES = ("pytternfsm/generic_to_pda.py", "pytternfsm/python/python_to_pda.py",
+                    "pytternfsm/java/java_to_pda.py", "subpattern/SubPattern.py", "simulator/pda/optimize.py",
+                    "simulator/pda/PDA.py", "simulator/pda/transition.py", "simulator/pda/serialize.py")
+TREE_SOURCES = ("pytternfsm/generic_tree_pruner.py", "pytternfsm/python/tree_pruner.py",
+                "pytternfsm/java/tree_pruner.py", "language_processors/python_frontend.py",
+                "language_processors/tree_serialize.py")
+
+# Version of the translation of patterns into PDAs and of their optimization. Bump it with any change of the PDAs built
+# by `pytternfsm` or `simulator.pda.optimize`.
+COMPILER_VERSION = 1
+# Version of the pruned trees of the code. Bump it with any change of the trees built by the tree pruners or by
+# `python_frontend`.
+TREE_VERSION = 1
+
+
+def pyttern_version() -> str:
+    """
+    Version of the installed Pyttern package, "unknown" when it is not installed.
+    """
+    try:
+        return metadata.version("pyttern")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def source_fingerprint(*paths) -> str:
+    """
+    Hash of source files, given by their paths in the package. Files that cannot be read are hashed by path only.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode("utf-8") + b"\0")
+        try:
+            digest.update((PACKAGE / path).read_bytes())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def compiler_fingerprint() -> str:
+    """
+    Fingerprint of the code compiling patterns into PDAs and of the binary format of the PDAs.
+    """
+    source = source_fingerprint(*COMPILER_SOURCES)
+    return f"{pyttern_version()}:pda-v{serialize.FORMAT_VERSION}:compiler-v{COMPILER_VERSION}:{source}"
+
+
+@lru_cache(maxsize=1)
+def tree_fingerprint() -> str:
+    """
+    Fingerprint of the code building the pruned trees of the code and of their binary format.
+    """
+    source = source_fingerprint(*TREE_SOURCES)
+    return f"{pyttern_version()}:trees-v{tree_serialize.FORMAT_VERSION}:pruner-v{TREE_VERSION}:{source}"
@@ -1,27 +1,130 @@
-from .python_processor import PythonProcessor
-from .java_processor import JavaProcessor
+"""
+Registry of the language processors. A processor is imported the first time its language is used, so that a run on
+files of one language does not import (and deserialize the ATNs of) the generated parsers of the others.
+
+The built-in languages are registered below with their file extensions. Other packages add languages with an entry
+point of the group "pyttern.languages", named after the language and referring to its processor class, e.g. in a
+pyproject.toml:
+
+    [project.entry-points."pyttern.languages"]
+    kotlin = "pyttern_kotlin.processor:KotlinProcessor"
+
+Their entry points are only read when a language or an extension is not one of the built-in ones, and their
+processors imported when their language is asked for, or to find the language of an unknown extension.
+"""
+from importlib import import_module, metadata
+
 from .languages import Languages
 
+ENTRY_POINT_GROUP = "pyttern.languages"
+
+# "module:class" of the processor and file extensions of the languages, by name. The extensions of a language are
+# None until its processor is imported when they are not given at registration.
+_registry = {}
+_processors = {}
+_entry_points_loaded = False
+_BUILTIN_PROCESSORS = {"PythonProcessor": "python_processor", "JavaProcessor": "java_processor"}
+
+
+def register_language(name, processor, extensions=None):
+    """
+    Register the processor of a language. It replaces any processor already registered for the language.
+    :param name: name of the language, as given to `get_processor`
+    :param processor: the processor class, or its "module:class" reference to import it when it is first used
+    :param extensions: file extensions of the language, without the dot. Defaults to the ones returned by the
+    `get_language_extensions` of the processor, which is then imported to find the language of a file.
+    """
+    if not isinstance(processor, str):
+        _processors[name] = processor
+        processor = f"{processor.__module__}:{processor.__qualname__}"
+    else:
+        _processors.pop(name, None)
+    _registry[name] = (processor, None if extensions is None else tuple(extensions))
+
+
+def unregister_language(name):
+    """
+    Remove a language from the registry, e.g. one registered for a test.
+    """
+    _registry.pop(name, None)
+    _processors.pop(name, None)
+
+
+register_language(Languages.PYTHON.value, "pyttern.language_processors.python_processor:PythonProcessor",
+                  ("py", "pyt", "pyh"))
+register_language(Languages.JAVA.value, "pyttern.language_processors.java_processor:JavaProcessor",
+                  ("java", "jav", "jat"))
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name not in _registry:
+            register_language(entry_point.name, entry_point.value)
+
+
+def registered_languages():
+    """
+    Names of the built-in languages and of the ones registered by other packages.
+    """
+    _load_entry_points()
+    return list(_registry)
+
+
+def _processor_class(name):
+    cls = _processors.get(name)
+    if cls is None:
+        module, _, qualname = _registry[name][0].partition(":")
+        cls = import_module(module)
+        for attribute in qualname.split("."):
+            cls = getattr(cls, attribute)
+        _processors[name] = cls
+    return cls
+
+
 def get_processor(lang):
-    if lang in ('python', Languages.PYTHON):
-        return PythonProcessor()
-    if lang in ('java', Languages.JAVA):
-        return JavaProcessor()
-    raise ValueError(f"Unsupported language: {lang}")
+    """
+    Processor of a language, imported if it is the first time the language is used.
+    :param lang: name of the language, or a member of Languages
+    :raises ValueError: if no processor is registered for the language
+    """
+    name = lang.value if isinstance(lang, Languages) else lang
+    if name not in _registry:
+        _load_entry_points()
+        if name not in _registry:
+            raise ValueError(f"Unsupported language: {lang}")
+    return _processor_class(name)()
+
+
+def _extensions(name):
+    processor, extensions = _registry[name]
+    if extensions is None:
+        extensions = tuple(get_processor(name).get_language_extensions())
+        _registry[name] = (processor, extensions)
+    return extensions
+
 
 def determine_language(filename):
     """
     Determines the language based on the file extension.
-    Returns 'python' or 'java' atm or None for unsupported file types.
+    Returns the name of the language, e.g. 'python' or 'java', or None for unsupported file types.
     """
     extension = str(filename).split('.')[-1]
 
-    if extension in PythonProcessor().get_language_extensions():
-        return "python"
-    elif extension in JavaProcessor().get_language_extensions():
-        return "java"
+    for name, (_, extensions) in _registry.items():
+        if extensions is not None and extension in extensions:
+            return name
+    # Languages whose extensions are only known by their processor
+    _load_entry_points()
+    for name in list(_registry):
+        if _registry[name][1] is None and extension in _extensions(name):
+            return name
     return None
 
+
 def determine_language_from_code(code):
     """
     Determines the language based on the code content.+
@@ -35,3 +138,10 @@ def determine_language_from_code(code):
         except Exception:
             continue
     return None
+
+
+def __getattr__(name):
+    # The processors of the built-in languages, imported by the package before they were imported lazily
+    if name in _BUILTIN_PROCESSORS:
+        return getattr(import_module(f"{__name__}.{_BUILTIN_PROCESSORS[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
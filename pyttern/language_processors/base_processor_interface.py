@@ -1,6 +1,13 @@
-from functools import lru_cache
-from antlr4 import FileStream, InputStream
+import copy
+import hashlib
+import inspect
+import weakref
+from antlr4 import FileStream, InputStream, ParserRuleContext
 from ..Pyttern_listener import ConsolePytternListener
+from ..simulator.pda.optimize import optimize_all
+
+# PDAs of each pattern tree still alive: {"plain": PDAs} and {"optimized": PDAs} once they are asked for
+_tree_pdas = weakref.WeakKeyDictionary()
 
 class BaseProcessor:
     def __new__(cls):
@@ -21,7 +28,28 @@ class BaseProcessor:
         file_input = FileStream(file, encoding="utf-8")
         return self.generate_tree_from_stream(file_input)
 
-    def create_pda(self, pattern_tree):
+    def create_pda(self, pattern_tree, optimize=True):
+        """
+        Compile a pattern tree into its PDAs. With optimize, they go through the optimization pass of
+        `simulator.pda.optimize`, which keeps the same matches. A tree is compiled once, and optimized the first time
+        its optimized PDAs are asked for.
+        """
+        pdas = _tree_pdas.get(pattern_tree)
+        if pdas is None:
+            # Compiling changes the pattern tree (double wildcards are removed), so a tree must only be compiled once:
+            # its PDAs are kept as long as the tree
+            pdas = _tree_pdas[pattern_tree] = {"plain": self.compile_pda(pattern_tree)}
+        if not optimize:
+            return pdas["plain"]
+        if "optimized" not in pdas:
+            # The optimization pass works in place, on a copy so that the plain PDAs stay unchanged
+            pdas["optimized"] = optimize_all(copy.deepcopy(pdas["plain"]))
+        return pdas["optimized"]
+
+    def compile_pda(self, pattern_tree):
+        """
+        Translate a pattern tree into its PDAs, without optimizing them.
+        """
         raise NotImplementedError
 
     def create_matcher(self, fsm, code_tree):
@@ -32,3 +60,35 @@ class BaseProcessor:
 
     def get_language_extensions(self):
         raise NotImplementedError
+
+    def grammar_version(self):
+        """
+        Fingerprint of the grammar of the trees generated by the processor, which changes with its generated lexer and
+        parser (see `grammar_fingerprint`).
+        """
+        raise NotImplementedError
+
+    def tree_node_classes(self):
+        """
+        Classes of the rule nodes of the trees generated by the processor, the only ones that
+        `tree_serialize.loads` creates when it loads them.
+        """
+        raise NotImplementedError
+
+
+def context_classes(parser) -> tuple:
+    """
+    Rule context classes of a generated ANTLR parser class.
+    """
+    return tuple(value for value in vars(parser).values()
+                 if isinstance(value, type) and issubclass(value, ParserRuleContext))
+
+
+def grammar_fingerprint(*recognizers) -> str:
+    """
+    Hash of the serialized ATNs of generated ANTLR lexers and parsers, given as their classes or modules.
+    """
+    digest = hashlib.sha256()
+    for recognizer in recognizers:
+        digest.update(repr(inspect.getmodule(recognizer).serializedATN()).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,185 @@
+"""
+Incremental parsing of a Python file edited over time (editor integration, pre-commit hook).
+
+The tree of a file is a File_inputContext whose children are its top-level statements followed by EOF. Once the
+file is parsed, each top-level statement owns the lines from its first line to the first line of the next one (the
+lines before the first statement form a header). After an edit, only the statements whose lines overlap the changed
+lines, widened by one line on each side, are parsed again, as a standalone module. The other statements are reused
+as they are, with the positions of the tokens after the edit shifted, and the new tree gets a new root.
+
+A top-level statement at the beginning of a line starts with the lexer and the parser in their initial state, so a
+part made of whole statements parses the same alone or in the whole file, as long as it parses alone: otherwise
+(a bracket opened in the edited lines and closed after them, for instance), the whole file is parsed again.
+
+The positions of the reused tokens are shifted in place: a tree returned by `IncrementalTree` must not be used once
+the file is updated again, and the trees of an incremental file are never the ones of the caches of
+`generate_tree_from_code`.
+"""
+import copy
+
+from antlr4.ParserRuleContext import ParserRuleContext
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.tree.Tree import TerminalNode
+from loguru import logger
+
+
+def normalize(code: str) -> str:
+    """
+    The text actually parsed for some code, as in `generate_tree_from_code`.
+    """
+    return code.strip() + "\n"
+
+
+def apply_changes(code: str, changes: list[dict]) -> str:
+    """
+    Apply text changes to some code, one after the other, as the content changes of an LSP didChange notification:
+    a change is either {"text": new code} or {"range": {"start": position, "end": position}, "text": replacement},
+    where a position is {"line": 0-indexed line, "character": 0-indexed character in the line}.
+    """
+    for change in changes:
+        if "range" not in change:
+            code = change["text"]
+            continue
+        start = _offset(code, change["range"]["start"])
+        end = _offset(code, change["range"]["end"])
+        code = code[:start] + change["text"] + code[end:]
+    return code
+
+
+def _offset(code: str, position: dict) -> int:
+    lines = code.splitlines(keepends=True)
+    line = position["line"]
+    if line >= len(lines):
+        return len(code)
+    return sum(len(text) for text in lines[:line]) + min(position["character"], len(lines[line]))
+
+
+_SENTINEL = "pass\n"
+
+
+class _ChunkError(Exception):
+    pass
+
+
+class _ChunkErrorListener(ErrorListener):
+    """
+    Error listener of the lexer and parser of a part of a file: any error makes the whole file be parsed again,
+    which reports the actual syntax errors.
+    """
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        raise _ChunkError(msg)
+
+
+class IncrementalTree:
+    """
+    Pruned tree of a file, kept up to date with the edits of the file.
+
+    `n_reparsed` and `n_reused` are the numbers of top-level statements parsed again and reused by the last update,
+    and `full_parse` tells if the last update parsed the whole file.
+    """
+
+    def __init__(self, processor, code: str):
+        self.processor = processor
+        self.code = code
+        self.tree = processor.parse_code(normalize(code))
+        self.n_reparsed = len(self.tree.children) - 1
+        self.n_reused = 0
+        self.full_parse = True
+
+    def update(self, code: str = None, changes: list[dict] = None):
+        """
+        Update the tree to a new version of the file.
+        :param code: the new code of the file
+        :param changes: instead of code, the changes to apply to the previous code (see `apply_changes`)
+        :return: the tree of the new code
+        """
+        if changes is not None:
+            code = apply_changes(self.code, changes)
+        old_text, new_text = normalize(self.code), normalize(code)
+        self.code = code
+        if new_text == old_text:
+            self.n_reparsed, self.n_reused, self.full_parse = 0, len(self.tree.children) - 1, False
+            return self.tree
+
+        try:
+            self.tree = self._splice(old_text, new_text)
+            self.full_parse = False
+        except _ChunkError as e:
+            logger.debug(f"Edited statements do not parse alone ({e}), parsing the whole file")
+            self.tree = self.processor.parse_code(new_text)
+            self.n_reparsed, self.n_reused, self.full_parse = len(self.tree.children) - 1, 0, True
+        return self.tree
+
+    def _splice(self, old_text: str, new_text: str):
+        old_lines = old_text.splitlines(keepends=True)
+        new_lines = new_text.splitlines(keepends=True)
+        n_old, n_new = len(old_lines), len(new_lines)
+        prefix = 0
+        while prefix < min(n_old, n_new) and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < min(n_old, n_new) - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+
+        root = self.tree
+        statements, eof = root.children[:-1], root.children[-1]
+        # The lexer accepts inconsistent dedents, after which a top-level statement may not start at column 0 nor in
+        # the initial state of the lexer: such a statement stays with the previous one
+        boundaries = sorted({0} | {statement.start.line - 1 for statement in statements if statement.start.column == 0})
+        low = max(prefix - 1, 0)
+        high = min(n_old - suffix + 1, n_old)
+        start = max(boundary for boundary in boundaries if boundary <= low)
+        end = min((boundary for boundary in boundaries if boundary >= high), default=n_old)
+        line_delta = n_new - n_old
+
+        before = [statement for statement in statements if statement.start.line - 1 < start]
+        after = [statement for statement in statements if statement.start.line - 1 >= end]
+        chunk = "".join(new_lines[start:end + line_delta])
+        # The last tokens of a statement (NEWLINE, DEDENT) depend on what follows it: when a statement follows the
+        # edited lines, a statement is added to the chunk so that they are the same as in the whole file
+        sentinel = end < n_old
+        chunk_root = self.processor.parse_code(chunk + _SENTINEL if sentinel else chunk, _ChunkErrorListener())
+        edited = chunk_root.children[:-2 if sentinel else -1]
+        _shift_tokens(edited + [chunk_root], start, len("".join(new_lines[:start])))
+        # The last token of the root is after the last statement, in the unchanged lines when there is a sentinel
+        _shift_tokens(after + [eof], line_delta, len(new_text) - len(old_text), [root.stop] if sentinel else [])
+
+        new_root = copy.copy(root)
+        new_root.children = before + edited + after + [eof]
+        for child in new_root.children:
+            child.parentCtx = new_root
+        if start == 0:
+            new_root.start = chunk_root.start
+        if not sentinel:
+            new_root.stop = chunk_root.stop
+
+        self.n_reparsed, self.n_reused = len(edited), len(before) + len(after)
+        logger.debug(f"Parsed lines {start + 1} to {end + line_delta} again: {self.n_reparsed} statements parsed, "
+                     f"{self.n_reused} reused")
+        return new_root
+
+
+def _shift_tokens(trees: list, lines: int, characters: int, extra_tokens=()):
+    """
+    Shift the positions of the tokens of trees, and of extra tokens, by a number of lines and characters. Their text
+    is read from their input stream with these positions, so it is kept in the tokens first.
+    """
+    tokens = {id(token): token for token in extra_tokens if token is not None}
+    to_visit = list(trees)
+    while to_visit:
+        node = to_visit.pop()
+        if isinstance(node, TerminalNode):
+            tokens[id(node.symbol)] = node.symbol
+            continue
+        if isinstance(node, ParserRuleContext):
+            for token in (node.start, node.stop):
+                if token is not None:
+                    tokens[id(token)] = token
+        to_visit.extend(node.children or ())
+    for token in tokens.values():
+        token.text = token.text
+        token.line += lines
+        token.start += characters
+        token.stop += characters
+
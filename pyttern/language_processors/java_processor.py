@@ -1,9 +1,10 @@
 import io
+from functools import lru_cache
 
 from antlr4 import CommonTokenStream
 from loguru import logger
 
-from .base_processor_interface import BaseProcessor
+from .base_processor_interface import BaseProcessor, context_classes, grammar_fingerprint
 from ..antlr.java.JavaLexer import JavaLexer
 from ..antlr.java.JavaParser import JavaParser
 from ..pyttern_error_listener import Python3ErrorListener
@@ -30,8 +31,16 @@ class JavaProcessor(BaseProcessor):
 
         return pruned_tree
 
-    def create_pda(self, pattern_tree):
+    def compile_pda(self, pattern_tree):
         return Java_to_PDA().visit(pattern_tree)
 
     def get_language_extensions(self):
         return ["java", "jav", "jat"]
+
+    @lru_cache(maxsize=1)
+    def grammar_version(self):
+        return grammar_fingerprint(JavaLexer, JavaParser)
+
+    @lru_cache(maxsize=1)
+    def tree_node_classes(self):
+        return context_classes(JavaParser)
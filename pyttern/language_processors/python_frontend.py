@@ -0,0 +1,979 @@
+"""
+Fast front end for plain Python code: the pruned tree of `PythonProcessor` built from the tokens of the standard
+`tokenize` module instead of the generated ANTLR lexer and parser, which are orders of magnitude slower on large files.
+
+The code is first checked with `ast.parse`, then tokenized, and the tokens of the ANTLR lexer are rebuilt from the
+ones of tokenize: same types, texts, positions and indices, including the NEWLINE, INDENT and DEDENT tokens emitted
+by `Python3LexerBase`. A recursive descent parser following the rules of `Python3Parser.g4` then builds the same
+contexts as the generated parser, and the tree goes through the same `TreePruner`. The only difference with the
+trees of ANTLR is the invokingState of the contexts (ATN states of the generated parser), which are -1.
+
+From Python 3.12, tokenize splits f-strings into several tokens, which are joined back into the single STRING token
+of ANTLR.
+
+Whatever the grammar does not support the same way as Python, or this module does not reproduce, raises
+UnsupportedCode, for the caller to parse the code with ANTLR: Pyttern wildcards, invalid code, walrus operators,
+positional-only parameters, match statements, numbers with underscores, non-ASCII names, carriage returns...
+"""
+import ast
+import io
+import tokenize
+
+from antlr4.Token import CommonToken
+from antlr4.tree.Tree import TerminalNodeImpl
+
+from ..antlr.python.Python3Parser import Python3Parser as P
+from ..pytternfsm.python.tree_pruner import TreePruner
+
+
+class UnsupportedCode(ValueError):
+    """
+    Code whose tree the fast front end cannot build as ANTLR does.
+    """
+
+
+# Token types of the keywords and operators, by text
+_LITERALS = {name[1:-1]: token_type for token_type, name in enumerate(P.literalNames) if name.startswith("'")}
+
+_NAMES = frozenset((P.NAME, P.UNDERSCORE, P.MATCH))
+_ATOM_START = _NAMES | {P.OPEN_PAREN, P.OPEN_BRACK, P.OPEN_BRACE, P.NUMBER, P.STRING, P.ELLIPSIS, P.NONE, P.TRUE,
+                        P.FALSE}
+_UNARY = frozenset((P.ADD, P.MINUS, P.NOT_OP))
+_EXPR_START = _ATOM_START | _UNARY | {P.AWAIT}
+_TEST_START = _EXPR_START | {P.NOT, P.LAMBDA}
+_COMPARISONS = frozenset((P.LESS_THAN, P.GREATER_THAN, P.EQUALS, P.GT_EQ, P.LT_EQ, P.NOT_EQ_1, P.NOT_EQ_2, P.IN,
+                          P.IS))
+_AUGMENTED = frozenset((P.ADD_ASSIGN, P.SUB_ASSIGN, P.MULT_ASSIGN, P.AT_ASSIGN, P.DIV_ASSIGN, P.MOD_ASSIGN,
+                        P.AND_ASSIGN, P.OR_ASSIGN, P.XOR_ASSIGN, P.LEFT_SHIFT_ASSIGN, P.RIGHT_SHIFT_ASSIGN,
+                        P.POWER_ASSIGN, P.IDIV_ASSIGN))
+# Precedence of the binary operators of the left-recursive rule expr, as in the generated parser
+_BINARY = {P.POWER: 8, P.STAR: 6, P.AT: 6, P.DIV: 6, P.MOD: 6, P.IDIV: 6, P.ADD: 5, P.MINUS: 5, P.LEFT_SHIFT: 4,
+           P.RIGHT_SHIFT: 4, P.AND_OP: 3, P.XOR: 2, P.OR_OP: 1}
+_OPENING = frozenset("([{")
+_CLOSING = frozenset(")]}")
+# From Python 3.12, tokenize splits f-strings into several tokens, between these two (None before)
+_FSTRING_START = getattr(tokenize, "FSTRING_START", None)
+_FSTRING_END = getattr(tokenize, "FSTRING_END", None)
+
+
+def parse(code: str):
+    """
+    Pruned tree of code, as the one of `PythonProcessor.generate_tree_from_code`.
+    :param code: the code, stripped and ending with a newline
+    :raises UnsupportedCode: if the tree has to be built by ANTLR
+    """
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        raise UnsupportedCode(f"Not parsed by ast: {e}") from e
+    try:
+        tree = _Parser(tokens(code)).file_input()
+    except RecursionError as e:
+        raise UnsupportedCode("Code nested too deeply") from e
+    return TreePruner().visit(tree)
+
+
+def tokens(code: str) -> list:
+    """
+    Tokens of the ANTLR lexer for code, rebuilt from the ones of tokenize.
+    :raises UnsupportedCode: if the code is not tokenized as the ANTLR lexer does
+    """
+    if not code.endswith("\n") or code[0] in " \t":
+        raise UnsupportedCode("Code not stripped")
+    if "\r" in code or "\f" in code:
+        raise UnsupportedCode("Carriage return or form feed")
+    line_starts = [0]
+    position = code.find("\n")
+    while position >= 0:
+        line_starts.append(position + 1)
+        position = code.find("\n", position + 1)
+    size = len(code)
+
+    result = []
+    indents = []
+    depth = 0
+    # Start (position, line and column) and nesting of the f-string being read, for Python 3.12 and later
+    fstring_start = None
+    fstring_depth = 0
+
+    def add(token_type, start, stop, line, column, text):
+        token = CommonToken(type=token_type, start=start, stop=stop)
+        token.line, token.column, token.text, token.tokenIndex = line, column, text, len(result)
+        result.append(token)
+
+    try:
+        for kind, text, (row, column), (end_row, end_column), _ in tokenize.generate_tokens(
+                io.StringIO(code).readline):
+            if fstring_depth:
+                # The ANTLR lexer reads an f-string as one STRING token, replacement fields included
+                if kind == _FSTRING_START:
+                    fstring_depth += 1
+                elif kind == _FSTRING_END:
+                    fstring_depth -= 1
+                    if not fstring_depth:
+                        start, row, column = fstring_start
+                        stop = line_starts[end_row - 1] + end_column - 1
+                        text = code[start:stop + 1]
+                        if not _single_string(text):
+                            raise UnsupportedCode(f"F-string not read as one string by ANTLR {text}")
+                        add(P.STRING, start, stop, row, column, text)
+                continue
+            if kind == tokenize.NEWLINE or kind == tokenize.NL:
+                if depth > 0 or not text:
+                    continue
+                # Python3LexerBase.onNewLine: the newline and the indentation of the next line make a NEWLINE token,
+                # unless the next line is blank or a comment, ending where the indentation ends
+                newline = line_starts[row - 1] + column
+                end = newline + 1
+                while end < size and code[end] in " \t":
+                    end += 1
+                if end + 1 < size and code[end] in "\n#":
+                    continue
+                add(P.NEWLINE, end - 1, end - 1, row + 1, end - newline - 1, code[end - 1])
+                indent = 0
+                for character in code[newline + 1:end]:
+                    indent = indent + 8 - indent % 8 if character == "\t" else indent + 1
+                if indent > (indents[-1] if indents else 0):
+                    indents.append(indent)
+                    add(P.INDENT, newline + 1, end - 1, row + 1, end - newline - 1, code[newline + 1:end])
+                while indents and indents[-1] > indent:
+                    indents.pop()
+                    add(P.DEDENT, end - 1, end - 1, row + 1, end - newline - 1, code[end - 1])
+                continue
+            if kind == tokenize.NAME:
+                if not text.isascii():
+                    raise UnsupportedCode(f"Non-ASCII name {text}")
+                token_type = _LITERALS.get(text, P.NAME)
+            elif kind == tokenize.NUMBER:
+                if "_" in text:
+                    raise UnsupportedCode(f"Number with underscores {text}")
+                token_type = P.NUMBER
+            elif kind == tokenize.STRING:
+                # A backslash followed by a newline in a short string goes through the NEWLINE rule of the lexer
+                if "\n" in text and not text.lstrip("rRbBuUfF").startswith(('"""', "'''")):
+                    raise UnsupportedCode("Short string on several lines")
+                token_type = P.STRING
+            elif kind == tokenize.OP:
+                token_type = _LITERALS.get(text)
+                if token_type is None:
+                    raise UnsupportedCode(f"Operator {text}")
+                if text in _OPENING:
+                    depth += 1
+                elif text in _CLOSING:
+                    depth -= 1
+            elif kind == _FSTRING_START:
+                fstring_start = (line_starts[row - 1] + column, row, column)
+                fstring_depth = 1
+                continue
+            elif kind == tokenize.ENDMARKER:
+                if indents:
+                    raise UnsupportedCode("Indented block at the end of the code")
+                add(P.EOF, size, size - 1, row, column, "<EOF>")
+                continue
+            elif kind in (tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT):
+                continue
+            else:
+                raise UnsupportedCode(f"Token {tokenize.tok_name[kind]} {text!r}")
+            start = line_starts[row - 1] + column
+            add(token_type, start, start + len(text) - 1, row, column, text)
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise UnsupportedCode(f"Not tokenized: {e}") from e
+    return result
+
+
+def _single_string(text):
+    """
+    Whether the ANTLR lexer reads text, a string with its prefix and quotes, as one STRING token: its quotes must not
+    appear unescaped inside it, as in the nested f-strings of Python 3.12, and a short string cannot span lines.
+    """
+    body = text.lstrip("rRbBuUfF")
+    quote = body[:3] if body[:3] in ('"""', "'''") else body[0]
+    if len(quote) == 1 and "\n" in body:
+        return False
+    end = len(body) - len(quote)
+    position = len(quote)
+    while position < end:
+        if body[position] == "\\":
+            position += 2
+        elif body.startswith(quote, position):
+            return False
+        else:
+            position += 1
+    return position == end
+
+
+class _Parser:
+    """
+    Recursive descent parser of the tokens of `tokens`, building the contexts of the rules of Python3Parser.g4 that
+    plain code goes through. Each rule method takes the parent context, adds the context of the rule to it and
+    returns it.
+    """
+
+    def __init__(self, token_list):
+        self.tokens = token_list
+        self.types = [token.type for token in token_list]
+        self.pos = 0
+
+    # Building the tree
+
+    def _rule(self, cls, parent):
+        ctx = cls(None, parent, -1)
+        ctx.start = self.tokens[self.pos]
+        if parent is not None:
+            if parent.children is None:
+                parent.children = []
+            parent.children.append(ctx)
+        return ctx
+
+    def _end(self, ctx):
+        ctx.stop = self.tokens[self.pos - 1]
+        return ctx
+
+    def _consume(self, ctx):
+        node = TerminalNodeImpl(self.tokens[self.pos])
+        node.parentCtx = ctx
+        if ctx.children is None:
+            ctx.children = []
+        ctx.children.append(node)
+        self.pos += 1
+
+    def _match(self, ctx, token_type):
+        if self.types[self.pos] != token_type:
+            self._unsupported()
+        self._consume(ctx)
+
+    def _unsupported(self):
+        token = self.tokens[self.pos]
+        raise UnsupportedCode(f"Unexpected {token.text!r} at {token.line}:{token.column}")
+
+    @property
+    def _next(self):
+        return self.types[self.pos]
+
+    # Statements
+
+    def file_input(self):
+        ctx = self._rule(P.File_inputContext, None)
+        while self._next != P.EOF:
+            if self._next == P.NEWLINE:
+                self._consume(ctx)
+            else:
+                self.stmt(ctx)
+        self._consume(ctx)
+        # Consuming EOF does not move the token stream of ANTLR, whose previous token is the one before EOF
+        ctx.stop = self.tokens[self.pos - 2] if self.pos > 1 else self.tokens[0]
+        return ctx
+
+    def stmt(self, parent):
+        ctx = self._rule(P.StmtContext, parent)
+        if self._next in _COMPOUND_STARTS:
+            self.compound_stmt(ctx)
+        else:
+            self.simple_stmts(ctx)
+        return self._end(ctx)
+
+    def simple_stmts(self, parent):
+        ctx = self._rule(P.Simple_stmtsContext, parent)
+        self.simple_stmt(ctx)
+        while self._next == P.SEMI_COLON:
+            self._consume(ctx)
+            if self._next == P.NEWLINE:
+                break
+            self.simple_stmt(ctx)
+        self._match(ctx, P.NEWLINE)
+        return self._end(ctx)
+
+    def simple_stmt(self, parent):
+        ctx = self._rule(P.Simple_stmtContext, parent)
+        token_type = self._next
+        if token_type == P.DEL:
+            self._keyword_stmt(P.Del_stmtContext, ctx, self.exprlist)
+        elif token_type == P.PASS:
+            self._keyword_stmt(P.Pass_stmtContext, ctx)
+        elif token_type in _FLOW_STARTS:
+            self.flow_stmt(ctx)
+        elif token_type == P.IMPORT or token_type == P.FROM:
+            self.import_stmt(ctx)
+        elif token_type == P.GLOBAL:
+            self._names_stmt(P.Global_stmtContext, ctx)
+        elif token_type == P.NONLOCAL:
+            self._names_stmt(P.Nonlocal_stmtContext, ctx)
+        elif token_type == P.ASSERT:
+            self.assert_stmt(ctx)
+        else:
+            self.expr_stmt(ctx)
+        return self._end(ctx)
+
+    def _keyword_stmt(self, cls, parent, rule=None):
+        ctx = self._rule(cls, parent)
+        self._consume(ctx)
+        if rule is not None:
+            rule(ctx)
+        return self._end(ctx)
+
+    def expr_stmt(self, parent):
+        ctx = self._rule(P.Expr_stmtContext, parent)
+        self.testlist_star_expr(ctx)
+        if self._next == P.COLON:
+            annassign = self._rule(P.AnnassignContext, ctx)
+            self._consume(annassign)
+            self.test(annassign)
+            if self._next == P.ASSIGN:
+                self._consume(annassign)
+                self.test(annassign)
+            self._end(annassign)
+        elif self._next in _AUGMENTED:
+            self._keyword_stmt(P.AugassignContext, ctx)
+            if self._next == P.YIELD:
+                self.yield_expr(ctx)
+            else:
+                self.testlist(ctx)
+        else:
+            while self._next == P.ASSIGN:
+                self._consume(ctx)
+                if self._next == P.YIELD:
+                    self.yield_expr(ctx)
+                else:
+                    self.testlist_star_expr(ctx)
+        return self._end(ctx)
+
+    def testlist_star_expr(self, parent):
+        return self._list(P.Testlist_star_exprContext, parent, self._test_or_star, _TEST_START | {P.STAR})
+
+    def flow_stmt(self, parent):
+        ctx = self._rule(P.Flow_stmtContext, parent)
+        token_type = self._next
+        if token_type == P.BREAK:
+            self._keyword_stmt(P.Break_stmtContext, ctx)
+        elif token_type == P.CONTINUE:
+            self._keyword_stmt(P.Continue_stmtContext, ctx)
+        elif token_type == P.RETURN:
+            self._keyword_stmt(P.Return_stmtContext, ctx,
+                               self.testlist if self.types[self.pos + 1] in _TEST_START else None)
+        elif token_type == P.RAISE:
+            raise_stmt = self._rule(P.Raise_stmtContext, ctx)
+            self._consume(raise_stmt)
+            if self._next in _TEST_START:
+                self.test(raise_stmt)
+                if self._next == P.FROM:
+                    self._consume(raise_stmt)
+                    self.test(raise_stmt)
+            self._end(raise_stmt)
+        else:
+            yield_stmt = self._rule(P.Yield_stmtContext, ctx)
+            self.yield_expr(yield_stmt)
+            self._end(yield_stmt)
+        return self._end(ctx)
+
+    def import_stmt(self, parent):
+        ctx = self._rule(P.Import_stmtContext, parent)
+        if self._next == P.IMPORT:
+            import_name = self._rule(P.Import_nameContext, ctx)
+            self._consume(import_name)
+            self._list(P.Dotted_as_namesContext, import_name, self.dotted_as_name, None)
+            self._end(import_name)
+        else:
+            import_from = self._rule(P.Import_fromContext, ctx)
+            self._consume(import_from)
+            while self._next == P.DOT or self._next == P.ELLIPSIS:
+                self._consume(import_from)
+            if self._next != P.IMPORT:
+                self.dotted_name(import_from)
+            self._match(import_from, P.IMPORT)
+            if self._next == P.STAR:
+                self._consume(import_from)
+            elif self._next == P.OPEN_PAREN:
+                self._consume(import_from)
+                self._list(P.Import_as_namesContext, import_from, self.import_as_name, _NAMES)
+                self._match(import_from, P.CLOSE_PAREN)
+            else:
+                self._list(P.Import_as_namesContext, import_from, self.import_as_name, _NAMES)
+            self._end(import_from)
+        return self._end(ctx)
+
+    def import_as_name(self, parent):
+        return self._aliased(P.Import_as_nameContext, parent, self.name)
+
+    def dotted_as_name(self, parent):
+        return self._aliased(P.Dotted_as_nameContext, parent, self.dotted_name)
+
+    def _aliased(self, cls, parent, rule):
+        ctx = self._rule(cls, parent)
+        rule(ctx)
+        if self._next == P.AS:
+            self._consume(ctx)
+            self.name(ctx)
+        return self._end(ctx)
+
+    def dotted_name(self, parent):
+        ctx = self._rule(P.Dotted_nameContext, parent)
+        self.name(ctx)
+        while self._next == P.DOT:
+            self._consume(ctx)
+            self.name(ctx)
+        return self._end(ctx)
+
+    def _names_stmt(self, cls, parent):
+        ctx = self._rule(cls, parent)
+        self._consume(ctx)
+        self.name(ctx)
+        while self._next == P.COMMA:
+            self._consume(ctx)
+            self.name(ctx)
+        return self._end(ctx)
+
+    def assert_stmt(self, parent):
+        ctx = self._rule(P.Assert_stmtContext, parent)
+        self._consume(ctx)
+        self.test(ctx)
+        if self._next == P.COMMA:
+            self._consume(ctx)
+            self.test(ctx)
+        return self._end(ctx)
+
+    def compound_stmt(self, parent):
+        ctx = self._rule(P.Compound_stmtContext, parent)
+        token_type = self._next
+        if token_type == P.IF:
+            self.if_stmt(ctx)
+        elif token_type == P.WHILE:
+            self.while_stmt(ctx)
+        elif token_type == P.FOR:
+            self.for_stmt(ctx)
+        elif token_type == P.TRY:
+            self.try_stmt(ctx)
+        elif token_type == P.WITH:
+            self.with_stmt(ctx)
+        elif token_type == P.DEF:
+            self.funcdef(ctx)
+        elif token_type == P.CLASS:
+            self.classdef(ctx)
+        elif token_type == P.AT:
+            self.decorated(ctx)
+        else:
+            async_stmt = self._rule(P.Async_stmtContext, ctx)
+            self._consume(async_stmt)
+            if self._next == P.DEF:
+                self.funcdef(async_stmt)
+            elif self._next == P.WITH:
+                self.with_stmt(async_stmt)
+            elif self._next == P.FOR:
+                self.for_stmt(async_stmt)
+            else:
+                self._unsupported()
+            self._end(async_stmt)
+        return self._end(ctx)
+
+    def _clause(self, ctx):
+        """':' block, after the keyword and condition of a clause."""
+        self._match(ctx, P.COLON)
+        self.block(ctx)
+
+    def _else(self, ctx):
+        if self._next == P.ELSE:
+            self._consume(ctx)
+            self._clause(ctx)
+
+    def if_stmt(self, parent):
+        ctx = self._rule(P.If_stmtContext, parent)
+        self._consume(ctx)
+        self.test(ctx)
+        self._clause(ctx)
+        while self._next == P.ELIF:
+            self._consume(ctx)
+            self.test(ctx)
+            self._clause(ctx)
+        self._else(ctx)
+        return self._end(ctx)
+
+    def while_stmt(self, parent):
+        ctx = self._rule(P.While_stmtContext, parent)
+        self._consume(ctx)
+        self.test(ctx)
+        self._clause(ctx)
+        self._else(ctx)
+        return self._end(ctx)
+
+    def for_stmt(self, parent):
+        ctx = self._rule(P.For_stmtContext, parent)
+        self._consume(ctx)
+        self.exprlist(ctx)
+        self._match(ctx, P.IN)
+        self.testlist(ctx)
+        self._clause(ctx)
+        self._else(ctx)
+        return self._end(ctx)
+
+    def try_stmt(self, parent):
+        ctx = self._rule(P.Try_stmtContext, parent)
+        self._consume(ctx)
+        self._clause(ctx)
+        if self._next != P.FINALLY:
+            if self._next != P.EXCEPT:
+                self._unsupported()
+            while self._next == P.EXCEPT:
+                except_clause = self._rule(P.Except_clauseContext, ctx)
+                self._consume(except_clause)
+                if self._next in _TEST_START:
+                    self.test(except_clause)
+                    if self._next == P.AS:
+                        self._consume(except_clause)
+                        self.name(except_clause)
+                self._end(except_clause)
+                self._clause(ctx)
+            self._else(ctx)
+        if self._next == P.FINALLY:
+            self._consume(ctx)
+            self._clause(ctx)
+        return self._end(ctx)
+
+    def with_stmt(self, parent):
+        ctx = self._rule(P.With_stmtContext, parent)
+        self._consume(ctx)
+        self.with_item(ctx)
+        while self._next == P.COMMA:
+            self._consume(ctx)
+            self.with_item(ctx)
+        self._clause(ctx)
+        return self._end(ctx)
+
+    def with_item(self, parent):
+        ctx = self._rule(P.With_itemContext, parent)
+        self.test(ctx)
+        if self._next == P.AS:
+            self._consume(ctx)
+            self.expr(ctx)
+        return self._end(ctx)
+
+    def block(self, parent):
+        ctx = self._rule(P.BlockContext, parent)
+        if self._next != P.NEWLINE:
+            self.simple_stmts(ctx)
+            return self._end(ctx)
+        self._consume(ctx)
+        self._match(ctx, P.INDENT)
+        self.stmt(ctx)
+        while self._next != P.DEDENT:
+            self.stmt(ctx)
+        self._consume(ctx)
+        return self._end(ctx)
+
+    def decorated(self, parent):
+        ctx = self._rule(P.DecoratedContext, parent)
+        decorators = self._rule(P.DecoratorsContext, ctx)
+        while self._next == P.AT:
+            decorator = self._rule(P.DecoratorContext, decorators)
+            self._consume(decorator)
+            self.dotted_name(decorator)
+            if self._next == P.OPEN_PAREN:
+                self._call_arguments(decorator)
+            self._match(decorator, P.NEWLINE)
+            self._end(decorator)
+        self._end(decorators)
+        if self._next == P.CLASS:
+            self.classdef(ctx)
+        elif self._next == P.DEF:
+            self.funcdef(ctx)
+        elif self._next == P.ASYNC:
+            async_funcdef = self._rule(P.Async_funcdefContext, ctx)
+            self._consume(async_funcdef)
+            if self._next != P.DEF:
+                self._unsupported()
+            self.funcdef(async_funcdef)
+            self._end(async_funcdef)
+        else:
+            self._unsupported()
+        return self._end(ctx)
+
+    def funcdef(self, parent):
+        ctx = self._rule(P.FuncdefContext, parent)
+        self._consume(ctx)
+        self.name(ctx)
+        parameters = self._rule(P.ParametersContext, ctx)
+        self._match(parameters, P.OPEN_PAREN)
+        self._arguments(parameters, self.tfpdef, P.CLOSE_PAREN)
+        self._match(parameters, P.CLOSE_PAREN)
+        self._end(parameters)
+        if self._next == P.ARROW:
+            self._consume(ctx)
+            self.test(ctx)
+        self._clause(ctx)
+        return self._end(ctx)
+
+    def _arguments(self, ctx, parameter, closing):
+        """
+        Parameters of parameters or varargslist, all children of ctx. They are parsed more loosely than in the
+        grammar, which accepts all the parameter lists valid in Python but positional-only ones.
+        """
+        while self._next != closing:
+            token_type = self._next
+            if token_type == P.STAR:
+                self._consume(ctx)
+                if self._next in _NAMES:
+                    parameter(ctx)
+            elif token_type == P.POWER:
+                self._consume(ctx)
+                parameter(ctx)
+            elif token_type in _NAMES:
+                parameter(ctx)
+                if self._next == P.ASSIGN:
+                    self._consume(ctx)
+                    self.test(ctx)
+            else:
+                self._unsupported()
+            if self._next != P.COMMA:
+                break
+            self._consume(ctx)
+
+    def tfpdef(self, parent):
+        ctx = self._rule(P.TfpdefContext, parent)
+        self.name(ctx)
+        if self._next == P.COLON:
+            self._consume(ctx)
+            self.test(ctx)
+        return self._end(ctx)
+
+    def vfpdef(self, parent):
+        ctx = self._rule(P.VfpdefContext, parent)
+        self.name(ctx)
+        return self._end(ctx)
+
+    def classdef(self, parent):
+        ctx = self._rule(P.ClassdefContext, parent)
+        self._consume(ctx)
+        self.name(ctx)
+        if self._next == P.OPEN_PAREN:
+            self._call_arguments(ctx)
+        self._clause(ctx)
+        return self._end(ctx)
+
+    def _call_arguments(self, ctx):
+        """'(' arglist? ')', children of ctx."""
+        self._consume(ctx)
+        if self._next != P.CLOSE_PAREN:
+            self._list(P.ArglistContext, ctx, self.argument, _TEST_START | {P.STAR, P.POWER})
+        self._match(ctx, P.CLOSE_PAREN)
+
+    # Expressions
+
+    def _list(self, cls, parent, item, trailing):
+        """
+        Context of a rule made of items separated by commas. trailing are the types of the tokens that can start an
+        item: after a comma, any other token ends the list (with a trailing comma), or None if the list cannot end
+        with a comma.
+        """
+        ctx = self._rule(cls, parent)
+        item(ctx)
+        while self._next == P.COMMA:
+            if trailing is not None and self.types[self.pos + 1] not in trailing:
+                self._consume(ctx)
+                break
+            self._consume(ctx)
+            item(ctx)
+        return self._end(ctx)
+
+    def _test_or_star(self, parent):
+        return self.star_expr(parent) if self._next == P.STAR else self.test(parent)
+
+    def _expr_or_star(self, parent):
+        return self.star_expr(parent) if self._next == P.STAR else self.expr(parent)
+
+    def testlist(self, parent):
+        return self._list(P.TestlistContext, parent, self.test, _TEST_START)
+
+    def exprlist(self, parent):
+        return self._list(P.ExprlistContext, parent, self._expr_or_star, _EXPR_START | {P.STAR})
+
+    def test(self, parent):
+        ctx = self._rule(P.TestContext, parent)
+        if self._next == P.LAMBDA:
+            self._lambdef(P.LambdefContext, ctx, self.test)
+        else:
+            self.or_test(ctx)
+            if self._next == P.IF:
+                self._consume(ctx)
+                self.or_test(ctx)
+                self._match(ctx, P.ELSE)
+                self.test(ctx)
+        return self._end(ctx)
+
+    def test_nocond(self, parent):
+        ctx = self._rule(P.Test_nocondContext, parent)
+        if self._next == P.LAMBDA:
+            self._lambdef(P.Lambdef_nocondContext, ctx, self.test_nocond)
+        else:
+            self.or_test(ctx)
+        return self._end(ctx)
+
+    def _lambdef(self, cls, parent, body):
+        ctx = self._rule(cls, parent)
+        self._consume(ctx)
+        if self._next != P.COLON:
+            varargslist = self._rule(P.VarargslistContext, ctx)
+            self._arguments(varargslist, self.vfpdef, P.COLON)
+            self._end(varargslist)
+        self._match(ctx, P.COLON)
+        body(ctx)
+        return self._end(ctx)
+
+    def or_test(self, parent):
+        ctx = self._rule(P.Or_testContext, parent)
+        self.and_test(ctx)
+        while self._next == P.OR:
+            self._consume(ctx)
+            self.and_test(ctx)
+        return self._end(ctx)
+
+    def and_test(self, parent):
+        ctx = self._rule(P.And_testContext, parent)
+        self.not_test(ctx)
+        while self._next == P.AND:
+            self._consume(ctx)
+            self.not_test(ctx)
+        return self._end(ctx)
+
+    def not_test(self, parent):
+        ctx = self._rule(P.Not_testContext, parent)
+        if self._next == P.NOT:
+            self._consume(ctx)
+            self.not_test(ctx)
+        else:
+            self.comparison(ctx)
+        return self._end(ctx)
+
+    def comparison(self, parent):
+        ctx = self._rule(P.ComparisonContext, parent)
+        self.expr(ctx)
+        while True:
+            token_type = self._next
+            if token_type == P.NOT:
+                if self.types[self.pos + 1] != P.IN:
+                    break
+            elif token_type not in _COMPARISONS:
+                break
+            comp_op = self._rule(P.Comp_opContext, ctx)
+            self._consume(comp_op)
+            if token_type == P.NOT or token_type == P.IS and self._next == P.NOT:
+                self._consume(comp_op)
+            self._end(comp_op)
+            self.expr(ctx)
+        return self._end(ctx)
+
+    def star_expr(self, parent):
+        ctx = self._rule(P.Star_exprContext, parent)
+        self._consume(ctx)
+        self.expr(ctx)
+        return self._end(ctx)
+
+    def expr(self, parent, precedence=0):
+        # The left-recursive rule as rewritten by ANTLR: a context for the operand, then a new context for each
+        # operator of at least the given precedence, with the previous context as first child
+        ctx = P.ExprContext(None, None, -1)
+        ctx.start = self.tokens[self.pos]
+        token_type = self._next
+        if token_type in _UNARY:
+            while self._next in _UNARY:
+                self._consume(ctx)
+            self.expr(ctx, 7)
+        elif token_type in _ATOM_START or token_type == P.AWAIT:
+            self.atom_expr(ctx)
+        else:
+            self._unsupported()
+        while True:
+            operator = _BINARY.get(self._next)
+            if operator is None or operator < precedence:
+                break
+            ctx.stop = self.tokens[self.pos - 1]
+            operand, ctx = ctx, P.ExprContext(None, None, -1)
+            ctx.start = operand.start
+            ctx.children = [operand]
+            operand.parentCtx = ctx
+            self._consume(ctx)
+            self.expr(ctx, operator + 1)
+        ctx.stop = self.tokens[self.pos - 1]
+        ctx.parentCtx = parent
+        if parent.children is None:
+            parent.children = []
+        parent.children.append(ctx)
+        return ctx
+
+    def atom_expr(self, parent):
+        ctx = self._rule(P.Atom_exprContext, parent)
+        if self._next == P.AWAIT:
+            self._consume(ctx)
+        self.atom(ctx)
+        while self._next in _TRAILER_STARTS:
+            self.trailer(ctx)
+        return self._end(ctx)
+
+    def atom(self, parent):
+        ctx = self._rule(P.AtomContext, parent)
+        token_type = self._next
+        if token_type == P.OPEN_PAREN:
+            self._consume(ctx)
+            if self._next == P.YIELD:
+                self.yield_expr(ctx)
+            elif self._next != P.CLOSE_PAREN:
+                self.testlist_comp(ctx)
+            self._match(ctx, P.CLOSE_PAREN)
+        elif token_type == P.OPEN_BRACK:
+            self._consume(ctx)
+            if self._next != P.CLOSE_BRACK:
+                self.testlist_comp(ctx)
+            self._match(ctx, P.CLOSE_BRACK)
+        elif token_type == P.OPEN_BRACE:
+            self._consume(ctx)
+            if self._next != P.CLOSE_BRACE:
+                self.dictorsetmaker(ctx)
+            self._match(ctx, P.CLOSE_BRACE)
+        elif token_type in _NAMES:
+            self.name(ctx)
+        elif token_type == P.STRING:
+            while self._next == P.STRING:
+                self._consume(ctx)
+        elif token_type in _ATOM_START:
+            self._consume(ctx)
+        else:
+            self._unsupported()
+        return self._end(ctx)
+
+    def name(self, parent):
+        ctx = self._rule(P.NameContext, parent)
+        if self._next not in _NAMES:
+            self._unsupported()
+        self._consume(ctx)
+        return self._end(ctx)
+
+    def testlist_comp(self, parent):
+        ctx = self._rule(P.Testlist_compContext, parent)
+        self._test_or_star(ctx)
+        if self._next == P.FOR or self._next == P.ASYNC:
+            self.comp_for(ctx)
+        else:
+            while self._next == P.COMMA:
+                self._consume(ctx)
+                if self._next not in _TEST_START and self._next != P.STAR:
+                    break
+                self._test_or_star(ctx)
+        return self._end(ctx)
+
+    def trailer(self, parent):
+        ctx = self._rule(P.TrailerContext, parent)
+        token_type = self._next
+        if token_type == P.OPEN_PAREN:
+            self._call_arguments(ctx)
+        elif token_type == P.OPEN_BRACK:
+            self._consume(ctx)
+            self._list(P.SubscriptlistContext, ctx, self.subscript_, _TEST_START | {P.COLON})
+            self._match(ctx, P.CLOSE_BRACK)
+        else:
+            self._consume(ctx)
+            self.name(ctx)
+        return self._end(ctx)
+
+    def subscript_(self, parent):
+        ctx = self._rule(P.Subscript_Context, parent)
+        if self._next != P.COLON:
+            self.test(ctx)
+        if self._next == P.COLON:
+            self._consume(ctx)
+            if self._next in _TEST_START:
+                self.test(ctx)
+            if self._next == P.COLON:
+                sliceop = self._rule(P.SliceopContext, ctx)
+                self._consume(sliceop)
+                if self._next in _TEST_START:
+                    self.test(sliceop)
+                self._end(sliceop)
+        return self._end(ctx)
+
+    def dictorsetmaker(self, parent):
+        ctx = self._rule(P.DictorsetmakerContext, parent)
+        is_dict = self._next == P.POWER
+        if is_dict:
+            self._consume(ctx)
+            self.expr(ctx)
+        elif self._next == P.STAR:
+            self.star_expr(ctx)
+        else:
+            self.test(ctx)
+            if self._next == P.COLON:
+                is_dict = True
+                self._consume(ctx)
+                self.test(ctx)
+        if self._next == P.FOR or self._next == P.ASYNC:
+            self.comp_for(ctx)
+            return self._end(ctx)
+        while self._next == P.COMMA:
+            self._consume(ctx)
+            if self._next not in _TEST_START and self._next != P.STAR and self._next != P.POWER:
+                break
+            if not is_dict:
+                self._test_or_star(ctx)
+            elif self._next == P.POWER:
+                self._consume(ctx)
+                self.expr(ctx)
+            else:
+                self.test(ctx)
+                self._match(ctx, P.COLON)
+                self.test(ctx)
+        return self._end(ctx)
+
+    def argument(self, parent):
+        ctx = self._rule(P.ArgumentContext, parent)
+        if self._next == P.STAR or self._next == P.POWER:
+            self._consume(ctx)
+            self.test(ctx)
+        else:
+            self.test(ctx)
+            if self._next == P.ASSIGN:
+                self._consume(ctx)
+                self.test(ctx)
+            elif self._next == P.FOR or self._next == P.ASYNC:
+                self.comp_for(ctx)
+        return self._end(ctx)
+
+    def comp_iter(self, parent):
+        ctx = self._rule(P.Comp_iterContext, parent)
+        if self._next == P.IF:
+            comp_if = self._rule(P.Comp_ifContext, ctx)
+            self._consume(comp_if)
+            self.test_nocond(comp_if)
+            if self._next in _COMP_ITER_STARTS:
+                self.comp_iter(comp_if)
+            self._end(comp_if)
+        else:
+            self.comp_for(ctx)
+        return self._end(ctx)
+
+    def comp_for(self, parent):
+        ctx = self._rule(P.Comp_forContext, parent)
+        if self._next == P.ASYNC:
+            self._consume(ctx)
+        self._match(ctx, P.FOR)
+        self.exprlist(ctx)
+        self._match(ctx, P.IN)
+        self.or_test(ctx)
+        if self._next in _COMP_ITER_STARTS:
+            self.comp_iter(ctx)
+        return self._end(ctx)
+
+    def yield_expr(self, parent):
+        ctx = self._rule(P.Yield_exprContext, parent)
+        self._consume(ctx)
+        if self._next == P.FROM:
+            yield_arg = self._rule(P.Yield_argContext, ctx)
+            self._consume(yield_arg)
+            self.test(yield_arg)
+            self._end(yield_arg)
+        elif self._next in _TEST_START:
+            yield_arg = self._rule(P.Yield_argContext, ctx)
+            self.testlist(yield_arg)
+            self._end(yield_arg)
+        return self._end(ctx)
+
+
+_COMPOUND_STARTS = frozenset((P.IF, P.WHILE, P.FOR, P.TRY, P.WITH, P.DEF, P.CLASS, P.AT, P.ASYNC))
+_FLOW_STARTS = frozenset((P.BREAK, P.CONTINUE, P.RETURN, P.RAISE, P.YIELD))
+_TRAILER_STARTS = frozenset((P.OPEN_PAREN, P.OPEN_BRACK, P.DOT))
+_COMP_ITER_STARTS = frozenset((P.FOR, P.ASYNC, P.IF))
@@ -4,35 +4,64 @@ from functools import lru_cache
 from antlr4 import CommonTokenStream, InputStream
 from loguru import logger
 
-from .base_processor_interface import BaseProcessor
+from . import python_frontend
+from .base_processor_interface import BaseProcessor, context_classes, grammar_fingerprint
+from .incremental import IncrementalTree
 from ..Pyttern_listener import ConsolePytternListener
 from ..antlr.python import Python3Parser
 from ..antlr.python.Python3Lexer import Python3Lexer
 from ..pyttern_error_listener import Python3ErrorListener, PytternErrorListener
 from ..pytternfsm.python.python_to_pda import Python_to_PDA
-from ..pytternfsm.python.tree_pruner import TreePruner
+from ..pytternfsm.python.tree_pruner import BlockEndContext, TreePruner
+from ..simulator.incremental import IncrementalMatches
 
 
 class PythonProcessor(BaseProcessor):
+    # Whether code is first parsed by the stdlib-based front end of `python_frontend`, which builds the same trees
+    # much faster than ANTLR. This applies to pattern text too: patterns without wildcards get the same tree either
+    # way, while the ones with wildcards and the code the front end does not support are parsed by ANTLR.
+    fast_frontend = True
 
     @lru_cache(maxsize=128)
     def generate_tree_from_code(self, code):
         code = code.strip()
         code += "\n"
+        if self.fast_frontend:
+            try:
+                return python_frontend.parse(code)
+            except python_frontend.UnsupportedCode as e:
+                logger.debug(f"Parsing with ANTLR: {e}")
         stream = InputStream(code)
         return self.generate_tree_from_stream(stream)
 
     @lru_cache(maxsize=128)
     def generate_tree_from_stream(self, stream):
+        return self._parse(stream)
+
+    def parse_code(self, code, error_listener=None):
+        """
+        Uncached version of `generate_tree_from_code`, for code already normalized: each call returns a new tree.
+        :param code: the code to parse
+        :param error_listener: an error listener for both the lexer and the parser, instead of the default
+            Python3ErrorListener of the parser
+        """
+        return self._parse(InputStream(code), error_listener)
+
+    @staticmethod
+    def _parse(stream, error_listener=None):
         logger.debug("Generating tree")
         lexer = Python3Lexer(stream)
+        if error_listener is not None:
+            lexer.removeErrorListeners()
+            lexer.addErrorListener(error_listener)
         stream = CommonTokenStream(lexer)
         py_parser = Python3Parser(stream)
 
         input = io.StringIO()
 
         py_parser.removeErrorListeners()
-        error_listener = Python3ErrorListener(input)
+        if error_listener is None:
+            error_listener = Python3ErrorListener(input)
         py_parser.addErrorListener(error_listener)
 
         tree = py_parser.file_input()
@@ -46,8 +75,50 @@ class PythonProcessor(BaseProcessor):
         with open(file, 'r', encoding="utf-8") as f:
             return self.generate_tree_from_code(f.read())
 
-    @lru_cache(maxsize=128)
-    def create_pda(self, pattern_tree):
+    def update_file(self, file, code=None, changes=None):
+        """
+        Incremental version of `generate_tree_from_file`, for a file edited over time: the first call parses the file,
+        the next ones only parse again the top-level statements touched by the edit (see `incremental`). The tree
+        returned by a call must not be used after the next call for the same file.
+        :param file: path of the file, the key of its incremental state
+        :param code: the new code of the file. Defaults to the content of the file, unless changes are given
+        :param changes: LSP-like changes to apply to the code of the previous call (see `incremental.apply_changes`)
+        :return: the pruned tree of the new code
+        """
+        files = self._incremental_files()
+        if code is None and changes is None:
+            with open(file, 'r', encoding="utf-8") as f:
+                code = f.read()
+        if file not in files:
+            if changes is not None:
+                raise ValueError(f"No previous version of {file} to apply changes to")
+            files[file] = IncrementalTree(self, code), IncrementalMatches()
+            return files[file][0].tree
+        return files[file][0].update(code, changes)
+
+    def match_file(self, file, pdas, deduplicate=False):
+        """
+        Match the current tree of a file given to `update_file` with PDAs. What the previous matches with the same
+        PDAs found inside the top-level statements that were not parsed again is reused (see
+        `simulator.incremental`): the matches are the ones of `Matcher.match` on the tree, possibly in another order.
+        :return: the MatchSet of the tree
+        """
+        incremental_tree, matches = self._incremental_files()[file]
+        return matches.match(pdas, incremental_tree.tree, deduplicate)
+
+    def forget_file(self, file):
+        """
+        Drop the incremental state of a file given to `update_file`.
+        """
+        self._incremental_files().pop(file, None)
+
+    def _incremental_files(self) -> dict:
+        # The processor is a singleton, its incremental files are created with the first one
+        if "incremental_files" not in self.__dict__:
+            self.incremental_files = {}
+        return self.incremental_files
+
+    def compile_pda(self, pattern_tree):
         return Python_to_PDA().visit(pattern_tree)
 
     def create_listener(self):
@@ -56,6 +127,14 @@ class PythonProcessor(BaseProcessor):
     def get_language_extensions(self):
         return ["py", "pyt", "pyh"]
 
+    @lru_cache(maxsize=1)
+    def grammar_version(self):
+        return grammar_fingerprint(Python3Lexer, Python3Parser)
+
+    @lru_cache(maxsize=1)
+    def tree_node_classes(self):
+        return context_classes(Python3Parser) + (BlockEndContext,)
+
     @staticmethod
     def parse_diagnostics(code: str) -> list[dict]:
         """
@@ -0,0 +1,148 @@
+"""
+Compact binary form of the pruned parse trees of code, to load them again without lexing nor parsing.
+
+A tree is written as the marshal of three tables, after a header with the version of the format: the classes of its
+rule nodes, its tokens (the symbols of its terminal nodes and the start and stop tokens of its rule nodes, shared as
+in the tree) and its nodes in pre-order. The text of the tokens is kept in the tokens themselves, so the loaded tree
+does not need the code, and its rule nodes have no parser. Labels of the grammar (`JavaParser` has a few) are kept
+when they refer to a token or to a node of the tree.
+
+Classes are written as their module and qualified name, but only resolved against the node classes of the trees of a
+processor (see `BaseProcessor.tree_node_classes`), so that a foreign file cannot make `loads` import or create
+anything else.
+"""
+import marshal
+
+from antlr4 import ParserRuleContext
+from antlr4.Token import CommonToken, Token
+from antlr4.tree.Tree import ErrorNodeImpl, TerminalNode, TerminalNodeImpl
+
+# Version of the binary format, in its header
+FORMAT_VERSION = 1
+_HEADER = b"PYTTREE" + bytes([FORMAT_VERSION])
+
+# Kinds of the references of the labels
+_NODE, _TOKEN = 0, 1
+
+
+def dumps(tree) -> bytes:
+    """
+    Binary form of a pruned parse tree.
+    """
+    nodes = []
+    to_visit = [tree]
+    while to_visit:
+        node = to_visit.pop()
+        nodes.append(node)
+        if not isinstance(node, TerminalNode) and node.children:
+            to_visit.extend(reversed(node.children))
+    node_ids = {id(node): index for index, node in enumerate(nodes)}
+
+    classes, class_ids = [], {}
+    tokens, token_ids = [], {}
+
+    def token_id(token):
+        if token is None:
+            return -1
+        index = token_ids.get(id(token))
+        if index is None:
+            index = token_ids[id(token)] = len(tokens)
+            tokens.append((token.type, token.channel, token.start, token.stop, token.tokenIndex, token.line,
+                           token.column, token.text))
+        return index
+
+    for node in nodes:
+        if isinstance(node, TerminalNode):
+            token_id(node.symbol)
+        else:
+            token_id(getattr(node, "start", None))
+            token_id(getattr(node, "stop", None))
+            for value in getattr(node, "__dict__", {}).values():
+                if isinstance(value, Token):
+                    token_id(value)
+
+    encoded = []
+    for node in nodes:
+        if isinstance(node, TerminalNode):
+            index = token_id(node.symbol)
+            encoded.append(-1 - index if isinstance(node, ErrorNodeImpl) else index)
+            continue
+        cls = type(node)
+        class_id = class_ids.get(cls)
+        if class_id is None:
+            class_id = class_ids[cls] = len(classes)
+            classes.append((cls.__module__, cls.__qualname__))
+        labels = []
+        for name, value in getattr(node, "__dict__", {}).items():
+            if isinstance(value, Token):
+                labels.append((name, _TOKEN, token_ids[id(value)]))
+            elif value is not None and id(value) in node_ids:
+                labels.append((name, _NODE, node_ids[id(value)]))
+        n_children = -1 if node.children is None else len(node.children)
+        start = token_id(getattr(node, "start", None))
+        stop = token_id(getattr(node, "stop", None))
+        encoded.append((class_id, n_children, start, stop, node.invokingState, tuple(labels)))
+    return _HEADER + marshal.dumps((tuple(classes), tuple(tokens), tuple(encoded)))
+
+
+def loads(data: bytes, node_classes):
+    """
+    Pruned parse tree of a binary form written by `dumps`.
+    :param data: the binary form
+    :param node_classes: the classes the rule nodes of the tree can be instances of, e.g. the ones of
+        `BaseProcessor.tree_node_classes`
+    :raises ValueError: if the data is not in the current binary format, or refers to other classes
+    """
+    if data[:len(_HEADER)] != _HEADER:
+        raise ValueError("Not a parse tree of the current binary format")
+    allowed = {(cls.__module__, cls.__qualname__): cls for cls in node_classes}
+    try:
+        classes, tokens, encoded = marshal.loads(data[len(_HEADER):])
+        classes = [allowed[module, qualname] for module, qualname in classes]
+    except KeyError as e:
+        raise ValueError(f"Parse tree with a node class that is not allowed: {e}") from e
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"Corrupted parse tree: {e}") from e
+
+    token_objects = []
+    for token_type, channel, start, stop, token_index, line, column, text in tokens:
+        token = CommonToken(type=token_type, channel=channel, start=start, stop=stop)
+        token.tokenIndex, token.line, token.column, token.text = token_index, line, column, text
+        token_objects.append(token)
+
+    nodes = []
+    labels = []
+    # Rule nodes whose children are being read, with their number of children still to read
+    parents = []
+    for entry in encoded:
+        parent = parents[-1][0] if parents else None
+        if isinstance(entry, int):
+            node = TerminalNodeImpl(token_objects[entry]) if entry >= 0 else ErrorNodeImpl(token_objects[-1 - entry])
+            node.parentCtx = parent
+            n_children = -1
+        else:
+            class_id, n_children, start, stop, invoking_state, node_labels = entry
+            cls = classes[class_id]
+            # The contexts of the generated parsers take the parser first, the ones of the pruners do not
+            node = cls(None, parent, invoking_state) if hasattr(cls, "parser") else cls(parent, invoking_state)
+            node.children = None if n_children < 0 else []
+            if isinstance(node, ParserRuleContext):
+                node.start = token_objects[start] if start >= 0 else None
+                node.stop = token_objects[stop] if stop >= 0 else None
+            if node_labels:
+                labels.append((node, node_labels))
+        nodes.append(node)
+        if parent is not None:
+            parent.children.append(node)
+            parents[-1][1] -= 1
+        if n_children > 0:
+            parents.append([node, n_children])
+        while parents and parents[-1][1] == 0:
+            parents.pop()
+
+    for node, node_labels in labels:
+        for name, kind, index in node_labels:
+            setattr(node, name, token_objects[index] if kind == _TOKEN else nodes[index])
+    if not nodes:
+        raise ValueError("Corrupted parse tree: no node")
+    return nodes[0]
@@ -2,13 +2,22 @@ import argparse
 import glob
 import os
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 from loguru import logger
 
 from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
 
-from .language_processors import determine_language, get_processor, Languages
-from .simulator.Matcher import Matcher
+from . import tracing
+from .language_processors import determine_language, get_processor, registered_languages, Languages
+from .pattern_set import PatternSet, compile_pattern
+from .pda_cache import PDACache
+from .tree_cache import TreeCache, DEFAULT_MAX_SIZE
+from .pytternfsm.python.match_set import MatchSet, BUDGET_EXCEEDED
+from .simulator.Matcher import Matcher, HISTOGRAM_KEYS
+from .simulator.MultiMatcher import MultiMatcher
+from .simulator.frontier import STRATEGIES
 
 
 class PytternMatcher:
@@ -18,20 +27,35 @@ class PytternMatcher:
     and running the matching process against code files.
     """
 
-    def __init__(self, match_details=False, stop_at_first=False):
+    def __init__(self, match_details=False, stop_at_first=False, deduplicate=False, prefilter=True, strategy="dfs",
+                 max_steps=None, max_configurations=None, max_seconds=None, count_only=False, histogram=(),
+                 histogram_key="text", cache_dir=None, tree_cache_size=DEFAULT_MAX_SIZE, single_pass=False):
+        # Arguments of the constructor, to create the same matcher in the worker processes of match_wildcards
+        self._options = dict(match_details=match_details, stop_at_first=stop_at_first, deduplicate=deduplicate,
+                             prefilter=prefilter, strategy=strategy, max_steps=max_steps,
+                             max_configurations=max_configurations, max_seconds=max_seconds, count_only=count_only,
+                             histogram=tuple(histogram), histogram_key=histogram_key, cache_dir=cache_dir,
+                             tree_cache_size=tree_cache_size, single_pass=single_pass)
         self.match_details = match_details
+        self.count_only = count_only
+        self.histogram = tuple(histogram)
+        self.histogram_key = histogram_key
         self.stop_at_first = stop_at_first
-        self._language_processors = {lang: get_processor(lang) for lang in Languages}
-        self._extension_to_processor = {
-            ext: processor
-            for processor in self._language_processors.values()
-            for ext in processor.get_language_extensions()
-        }
-
-    def _get_processor_for_file(self, file_name):
-        """Get the language processor for a given file name based on its extension."""
-        file_ext = os.path.splitext(file_name)[1]
-        return self._extension_to_processor.get(file_ext)
+        self.deduplicate = deduplicate
+        self.prefilter = prefilter
+        self.strategy = strategy
+        self.max_steps = max_steps
+        self.max_configurations = max_configurations
+        self.max_seconds = max_seconds
+        # In single pass mode, all the leaf patterns matched against a code tree are matched in one traversal of the
+        # tree (see `match_trees`), and their results are looked up in _leaf_results
+        self.single_pass = single_pass
+        self._leaf_results = None
+        self.n_pruned = 0
+        self.n_budget_exceeded = 0
+        # Persistent caches of the compiled patterns and of the parse trees of the code, see `PDACache` and `TreeCache`
+        self.pda_cache = PDACache(cache_dir) if cache_dir is not None else None
+        self.tree_cache = TreeCache(cache_dir, tree_cache_size) if cache_dir is not None else None
 
     def parse_json_pattern(self, pattern_json, lang=None, _processor=None):
         """
@@ -45,9 +69,7 @@ class PytternMatcher:
         if processor is None:
             if lang is None:
                 raise ValueError("Either lang or _processor must be provided")
-            processor = self._language_processors.get(Languages[lang.upper()])
-            if not processor:
-                raise ValueError(f"Unsupported language: {lang}")
+            processor = get_processor(lang.lower())
 
         logger.debug(f"Parsing json pattern: {pattern_json}")
         if "children" in pattern_json:
@@ -65,21 +87,98 @@ class PytternMatcher:
         """
         Match a compiled pattern tree against a compiled code tree.
         This is the dispatcher for pattern matching, calling the appropriate
-        method based on `match_details`.
+        method based on `count_only` and `match_details`.
         """
+        return self.match_trees([pattern_tree], code_tree)[0]
+
+    def match_trees(self, pattern_trees, code_tree) -> list:
+        """
+        Match compiled pattern trees against a compiled code tree, see `match_tree`. In single pass mode, the leaf
+        patterns of all the trees are matched at once by a MultiMatcher, in one traversal of the code tree, and the
+        logical operators are then evaluated on their results.
+        :return: the result of `match_tree` for each pattern tree, in order
+        """
+        if not self.single_pass:
+            return [self._match_tree(pattern_tree, code_tree) for pattern_tree in pattern_trees]
+        self._leaf_results = self._match_leaves(pattern_trees, code_tree)
+        try:
+            return [self._match_tree(pattern_tree, code_tree) for pattern_tree in pattern_trees]
+        finally:
+            self._leaf_results = None
+
+    def _match_tree(self, pattern_tree, code_tree):
         logger.debug(f"Matching pattern '{pattern_tree.get('name', 'root')}' with code tree.")
+        if self.count_only:
+            return self._match_pyttern_count(pattern_tree, code_tree)
         if self.match_details:
             return self._match_pyttern_details(pattern_tree, code_tree)
         return self._match_pyttern_bool(pattern_tree, code_tree)
 
+    def _match_leaf(self, pattern_fsm, code_tree, lean=False):
+        """
+        Match a single compiled pattern against a code tree. When the pre-filter is enabled, patterns that require
+        a node class or token absent from the code are skipped without running the matcher, and counted in n_pruned.
+        Matches interrupted by a budget keep the matches found so far and are counted in n_budget_exceeded.
+        In lean mode, no path is built and no Match is recorded: in count mode every match is counted, otherwise only
+        the existence of a match is checked and the search stops at the first one. The values bound to the histogram
+        wildcards are counted in the histograms of the result (see `Matcher.match`).
+        In single pass mode, the result was already computed by `_match_leaves`.
+        """
+        if self._leaf_results is not None:
+            return self._leaf_results[id(pattern_fsm)]
+        if self.prefilter and not Matcher.can_match(pattern_fsm, code_tree):
+            logger.debug("Pattern pruned by the pre-filter")
+            self.n_pruned += 1
+            return MatchSet()
+        res = Matcher.match(pattern_fsm, code_tree, stop_at_first=self.stop_at_first or (lean and not self.count_only),
+                            deduplicate=self.deduplicate, strategy=self.strategy, max_steps=self.max_steps,
+                            max_configurations=self.max_configurations, max_seconds=self.max_seconds, lean=lean,
+                            histogram=self.histogram, histogram_key=self.histogram_key)
+        if res.status == BUDGET_EXCEEDED:
+            self.n_budget_exceeded += 1
+        return res
+
+    def _match_leaves(self, pattern_trees, code_tree) -> dict:
+        """
+        Match all the leaf patterns of pattern trees against a code tree in a single traversal (see `MultiMatcher`),
+        with the pre-filter and options of `_match_leaf`. Leaves are matched in lean mode unless the details are
+        requested, and the budgets apply to the whole traversal.
+        :return: the MatchSet of each leaf, by id of its PDAs
+        """
+        lean = self.count_only or not self.match_details
+        pdas = {}
+        for pattern_tree in pattern_trees:
+            for leaf in self._leaves(pattern_tree):
+                pdas.setdefault(id(leaf['result']), leaf['result'])
+        results = {}
+        kept = []
+        for key, pattern_fsm in pdas.items():
+            if self.prefilter and not Matcher.can_match(pattern_fsm, code_tree):
+                logger.debug("Pattern pruned by the pre-filter")
+                self.n_pruned += 1
+                results[key] = MatchSet()
+            else:
+                kept.append(key)
+        logger.debug(f"Matching {len(kept)} leaf pattern(s) in a single pass")
+        match_sets = MultiMatcher.match([pdas[key] for key in kept], code_tree,
+                                        stop_at_first=self.stop_at_first or (lean and not self.count_only),
+                                        deduplicate=self.deduplicate, strategy=self.strategy,
+                                        max_steps=self.max_steps, max_configurations=self.max_configurations,
+                                        max_seconds=self.max_seconds, lean=lean, histogram=self.histogram,
+                                        histogram_key=self.histogram_key)
+        for key, match_set in zip(kept, match_sets):
+            if match_set.status == BUDGET_EXCEEDED:
+                self.n_budget_exceeded += 1
+            results[key] = match_set
+        return results
+
     def _match_pyttern_bool(self, pattern_tree, code_tree):
         """
         Perform pattern matching and return a boolean result. Supports short-circuiting.
         """
         name = pattern_tree.get('name')
         if 'children' not in pattern_tree:
-            pattern_fsm = pattern_tree['result']
-            res = Matcher.match(pattern_fsm, code_tree, stop_at_first=self.stop_at_first)
+            res = self._match_leaf(pattern_tree['result'], code_tree, lean=True)
             match_found = res.count() > 0
             logger.debug(f"Leaf pattern '{name}' match result: {match_found}")
             return match_found
@@ -107,8 +206,7 @@ class PytternMatcher:
         """
         name = pattern_tree.get('name')
         if 'children' not in pattern_tree:
-            pattern_fsm = pattern_tree['result']
-            res = Matcher.match(pattern_fsm, code_tree, stop_at_first=self.stop_at_first)
+            res = self._match_leaf(pattern_tree['result'], code_tree)
             match_found = res.count() > 0
             logger.debug(f"Leaf pattern '{name}' match result: {match_found}")
             return {'name': name, 'result': match_found, 'matches': res}
@@ -128,93 +226,246 @@ class PytternMatcher:
         logger.debug(f"Result for logical operator '{name}': {result_bool}")
         return {'name': name, 'result': result_bool, 'children': child_results}
 
-    def _dir_to_pattern_tree(self, path, processor, op='and'):
-        """
-        Recursively traverse a directory and convert its structure into a pattern_tree.
-        """
-        logger.debug(f"Parsing directory '{path}' with operator '{op}'")
-        children = []
-        for item in sorted(os.listdir(path)):
-            item_path = os.path.join(path, item)
-            if item in ['and', 'or', 'not']:
-                children.append(self._dir_to_pattern_tree(item_path, processor, op=item))
-            elif os.path.isdir(item_path):
-                logger.debug(f"Descending into sub-directory '{item_path}'")
-                children.append(self._dir_to_pattern_tree(item_path, processor, op='and'))
-            elif os.path.isfile(item_path):
-                if self._get_processor_for_file(item):
-                    logger.debug(f"Compiling pattern file: {item_path}")
-                    tree = processor.generate_tree_from_file(item_path)
-                    fsm = processor.create_pda(tree)
-                    children.append({'name': item, 'result': fsm})
-        return {'name': op, 'children': children}
+    def _match_pyttern_count(self, pattern_tree, code_tree):
+        """
+        Count the matches of every leaf pattern, regardless of the logical operators.
+        :return: a dictionary from leaf pattern name to a MatchSet without Match objects, holding the number of matches
+            and the histograms of the chosen wildcards
+        """
+        counts = {}
+        for leaf in self._leaves(pattern_tree):
+            res = self._match_leaf(leaf['result'], code_tree, lean=True)
+            logger.debug(f"Leaf pattern '{leaf['name']}' matched {res.count()} time(s)")
+            counts[leaf['name']] = res
+        return counts
+
+    @staticmethod
+    def _leaves(pattern_tree):
+        """
+        Yield the leaf patterns of a pattern tree, in order.
+        """
+        leaves = [pattern_tree]
+        while leaves:
+            leaf = leaves.pop(0)
+            if 'children' in leaf:
+                leaves[0:0] = leaf['children']
+                continue
+            yield leaf
 
     def match(self, pattern_path, code_path, lang):
         """
         Main matching method. Compiles pattern and code from paths and matches them.
         The pattern can be a single file or a directory representing a composite pattern.
+        In count mode, the result is the dictionary of `_match_pyttern_count`.
         """
         logger.info(f"Starting match for pattern '{pattern_path}' on code '{code_path}' with language '{lang}'")
-        processor = self._language_processors.get(Languages[lang.upper()])
-        if not processor:
-            raise ValueError(f"Unsupported language: {lang}")
+        processor = get_processor(lang.lower())
 
         # Compile pattern
-        if os.path.isdir(pattern_path):
-            logger.debug(f"Pattern is a directory, compiling composite pattern from '{pattern_path}'")
-            pattern_tree = self._dir_to_pattern_tree(pattern_path, processor)
-        else:  # single file
-            logger.debug(f"Pattern is a single file, compiling from '{pattern_path}'")
-            tree = processor.generate_tree_from_file(pattern_path)
-            fsm = processor.create_pda(tree)
-            pattern_tree = {'name': os.path.basename(pattern_path), 'result': fsm}
+        pattern_tree = self._compile_pattern(pattern_path, processor)
 
         # Compile code
-        code_tree = processor.generate_tree_from_file(code_path)
+        code_tree = self.tree_of_file(code_path, processor)
 
         # Match
-        match_result = self.match_tree(pattern_tree, code_tree)
-        if self.match_details:
+        return self.shape_result(self.match_tree(pattern_tree, code_tree))
+
+    def _compile_pattern(self, pattern_path, processor):
+        """
+        Compile a pattern file, or a directory representing a composite pattern, into a pattern tree.
+        """
+        return compile_pattern(pattern_path, processor, self.pda_cache)
+
+    def tree_of_file(self, code_path, processor):
+        """
+        Parse a code file, or load its tree from the parse tree cache if there is one.
+        """
+        if self.tree_cache is not None:
+            return self.tree_cache.tree_of_file(str(code_path), processor)
+        return processor.generate_tree_from_file(str(code_path))
+
+    def shape_result(self, match_result):
+        """
+        Shape the result of `match_tree` as returned by `match`.
+        """
+        if self.match_details and not self.count_only:
             return match_result['result'], match_result
         return match_result
 
-    def match_wildcards(self, pattern_path, code_path):
+    def iter_match(self, pattern_path, code_path, lang):
+        """
+        Lazily match a pattern against a code file, yielding (pattern name, Match) pairs as soon as they are found.
+        The pattern can be a single file or a directory, whose leaf patterns are matched one after the other
+        regardless of the logical operators. Matching goes on only when the next match is requested, and the
+        pre-filter and budgets of this matcher apply to each leaf pattern.
+        """
+        processor = get_processor(lang.lower())
+
+        pattern_tree = self._compile_pattern(pattern_path, processor)
+        code_tree = self.tree_of_file(code_path, processor)
+
+        for leaf in self._leaves(pattern_tree):
+            pattern_fsm = leaf['result']
+            if self.prefilter and not Matcher.can_match(pattern_fsm, code_tree):
+                self.n_pruned += 1
+                continue
+            for match in Matcher.iter_matches(pattern_fsm, code_tree, deduplicate=self.deduplicate,
+                                              strategy=self.strategy, max_steps=self.max_steps,
+                                              max_configurations=self.max_configurations,
+                                              max_seconds=self.max_seconds):
+                yield leaf['name'], match
+
+    def match_wildcards(self, pattern_path, code_path, jobs=1):
         """
         Match files using glob patterns for both patterns and code files.
+        The patterns are compiled once for each language of the code files (see `PatternSet`). With jobs > 1, the
+        code files are spread over a pool of jobs processes, which receive the compiled patterns and send back the
+        results of each code file as soon as it is matched. The results are the same as with a single job, in the same
+        order. Detailed results hold nodes of the parse trees, which cannot be sent between processes, so they are
+        only available with a single job.
+        :param pattern_path: glob of the pattern files or directories
+        :param code_path: glob of the code files
+        :param jobs: number of processes matching the code files. Defaults to 1, which matches them in this process.
+        :return: the result of `match` by code file and pattern
         """
         ret = {}
+        self.n_pruned = 0
+        self.n_budget_exceeded = 0
         patterns_filespath = glob.glob(str(pattern_path))
         code_filespath = glob.glob(str(code_path))
         logger.info(f"Found {len(patterns_filespath)} pattern(s) and {len(code_filespath)} code file(s).")
 
+        code_files = []
         for code_filepath in code_filespath:
-            processor = self._get_processor_for_file(code_filepath)
-            if not processor:
+            lang = determine_language(code_filepath)
+            if lang is None:
                 logger.warning(f"No processor found for code file: {code_filepath}, skipping.")
                 continue
-
-            lang = processor.language.value.lower()
-            for pattern_filepath in patterns_filespath:
-                result = self.match(pattern_filepath, code_filepath, lang)
+            code_files.append((code_filepath, lang))
+
+        pattern_sets = {}
+        for _, lang in code_files:
+            if lang not in pattern_sets:
+                pattern_sets[lang] = PatternSet.compile(patterns_filespath, lang, self.pda_cache)
+        for code_filepath, file_results in self.match_code_files(code_files, pattern_sets, jobs):
+            for pattern_filepath, result in file_results.items():
                 if code_filepath not in ret:
                     ret[code_filepath] = {}
                 ret[code_filepath][pattern_filepath] = result
+        if self.prefilter:
+            logger.info(f"Pre-filter pruned {self.n_pruned} pattern/code pair(s).")
+        if self.n_budget_exceeded > 0:
+            logger.warning(f"{self.n_budget_exceeded} match(es) stopped because of a budget, results may be partial.")
         return ret
-    
-def match_files(pattern_path, code_path, lang=None, match_details=False, stop_at_first=True):
+
+    def log_cache_counts(self):
+        """
+        Log the hits, misses and evictions of the caches of compiled patterns and parse trees, if they are used.
+        """
+        if self.pda_cache is not None:
+            logger.info(f"Compiled pattern cache: {self.pda_cache.hits} hit(s), {self.pda_cache.misses} miss(es).")
+        if self.tree_cache is not None:
+            logger.info(f"Parse tree cache: {self.tree_cache.hits} hit(s), {self.tree_cache.misses} miss(es), "
+                        f"{self.tree_cache.evictions} eviction(s).")
+
+    def match_code_files(self, code_files, pattern_sets, jobs=1):
+        """
+        Generator of the results of the patterns on each code file, in the order of code_files, computed by a pool of
+        jobs processes when there are several jobs and files. The pre-filter, budget and parse tree cache counters of
+        the processes are added to the ones of this matcher.
+        :param code_files: (code path, language) pairs
+        :param pattern_sets: the PatternSet of each language of the code files
+        :return: generator of (code path, results of `PatternSet.match_tree`) pairs
+        """
+        if jobs > 1 and self.match_details and not self.count_only:
+            raise ValueError("Detailed results cannot be computed with more than one job")
+        if jobs <= 1 or len(code_files) <= 1:
+            for code_filepath, lang in code_files:
+                yield code_filepath, self.match_code_file(code_filepath, pattern_sets[lang])
+            return
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(self._options, pattern_sets, tracing.enabled)) as executor:
+            for code_filepath, results, counters in executor.map(_match_in_worker, code_files):
+                self.n_pruned += counters[0]
+                self.n_budget_exceeded += counters[1]
+                if self.tree_cache is not None:
+                    self.tree_cache.hits += counters[2]
+                    self.tree_cache.misses += counters[3]
+                    self.tree_cache.evictions += counters[4]
+                yield code_filepath, results
+
+    def match_code_file(self, code_filepath, pattern_set):
+        """
+        Match the patterns of a PatternSet against a code file, see `PatternSet.match_tree`.
+        """
+        processor = get_processor(pattern_set.lang)
+        code_tree = self.tree_of_file(code_filepath, processor)
+        logger.debug(f"Matching {len(pattern_set.patterns)} pattern(s) on code '{code_filepath}'")
+        return pattern_set.match_tree(code_tree, self)
+
+
+# Matcher of a worker process of `PytternMatcher.match_code_files` and the PatternSets to match, see `_init_worker`
+_worker = None
+
+
+def _init_worker(options, pattern_sets, trace):
+    """
+    Start a worker process of `PytternMatcher.match_code_files`, with a matcher created with the same options as the
+    one of the main process.
+    """
+    global _worker
+    tracing.enable(trace)
+    _worker = PytternMatcher(**options), pattern_sets
+
+
+def _match_in_worker(code_file):
+    matcher, pattern_sets = _worker
+    matcher.n_pruned = matcher.n_budget_exceeded = 0
+    tree_cache = matcher.tree_cache
+    if tree_cache is not None:
+        tree_cache.hits = tree_cache.misses = tree_cache.evictions = 0
+    code_filepath, lang = code_file
+    results = matcher.match_code_file(code_filepath, pattern_sets[lang])
+    counters = (matcher.n_pruned, matcher.n_budget_exceeded)
+    if tree_cache is not None:
+        counters += (tree_cache.hits, tree_cache.misses, tree_cache.evictions)
+    return code_filepath, results, counters
+
+
+def match_files(pattern_path, code_path, lang=None, match_details=False, stop_at_first=True, deduplicate=False,
+                strategy="dfs"):
     if lang is None:
         pattern_lang = determine_language(pattern_path)
         code_lang = determine_language(code_path)
         if code_lang != pattern_lang:
             raise ValueError(f"Pattern language ({pattern_lang}) and Code language ({code_lang}) should be the same.")
         lang = pattern_lang
-    matcher = PytternMatcher(match_details, stop_at_first)
+    matcher = PytternMatcher(match_details, stop_at_first, deduplicate, strategy=strategy)
     if match_details:
         res, det = matcher.match(pattern_path, code_path, lang)
         return res, det["matches"]
     return matcher.match(pattern_path, code_path, lang)
 
 
+def log_counts(results):
+    """
+    Log the number of matches of each pattern per code file, and the histograms summed over all the files.
+    :param results: count mode results, by code file and pattern file (see `PytternMatcher.match_wildcards`)
+    """
+    histograms = {}
+    total = 0
+    for code_filepath, patterns in results.items():
+        for pattern_filepath, counts in patterns.items():
+            for leaf_name, match_set in counts.items():
+                logger.info(f"{code_filepath}: {leaf_name} matched {match_set.count()} time(s)")
+                total += match_set.count()
+                for name, histogram in match_set.histograms.items():
+                    histograms.setdefault(name, Counter()).update(histogram)
+    logger.info(f"{total} match(es) in {len(results)} file(s)")
+    for name, histogram in histograms.items():
+        logger.info(f"Values of ?{name}: {dict(histogram.most_common())}")
+
+
 def run_application(host="0.0.0.0", port=5000):
     from .visualizer.web import application
     logger.enable("pyttern")
@@ -253,17 +504,50 @@ def configure_logger(verbosity: int):
             "<level>{message}</level>"
         )
         
-    # Add the configured handler
+    # Add the configured handler, hot-path trace points are only evaluated with -vv
     logger.add(sys.stdout, format=log_format, level=log_level)
+    tracing.enable(verbosity >= 2)
 
 
 
 def main():
     parser = argparse.ArgumentParser(description="Pyttern: A tool for pattern matching in code.")
     parser.add_argument("--web", action="store_true", help="Launch the web application.")
-    parser.add_argument("--lang", choices=['python', 'java'], help="Specify the language for single file matching.")
+    # The languages registered by other packages are only looked up when --lang is not a built-in one
+    parser.add_argument("--lang", help="Specify the language for single file matching: python, java or a language "
+                                       "registered by another package.")
     parser.add_argument("--details", action="store_true", help="Return detailed match information.")
     parser.add_argument("--stop-first", action="store_true", help="Stop at the first match found.")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Drop configurations that were already explored (faster, merges identical matches).")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="dfs",
+                        help="Order in which the matcher explores configurations: depth-first, breadth-first or "
+                             "best-first (closest to the end of the pattern first). Default: dfs.")
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="Stop each match after this number of steps, keeping the matches found so far.")
+    parser.add_argument("--max-configurations", type=int, default=None,
+                        help="Stop each match when more configurations than this are waiting to be explored.")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Stop each match after this number of seconds, keeping the matches found so far.")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="Match all the leaf patterns against each code file in a single traversal of its tree. "
+                             "The budgets then apply to the whole traversal.")
+    parser.add_argument("--count", action="store_true",
+                        help="Count the matches of each pattern in each code file, without recording them.")
+    parser.add_argument("--histogram", action="append", default=[], metavar="NAME",
+                        help="With --count, also count the values bound to this named wildcard. Use this flag multiple "
+                             "times for multiple wildcards.")
+    parser.add_argument("--histogram-key", choices=HISTOGRAM_KEYS, default="text",
+                        help="With --histogram, count values by text or by structural hash. Default: text.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="With glob patterns, match the code files in this number of processes. Not available "
+                             "with --details. Default: 1.")
+    parser.add_argument("--cache-dir", default=None, metavar="DIR",
+                        help="Keep the compiled patterns and the parse trees of the code files in this directory, to "
+                             "load them without compiling nor parsing them again in the next runs.")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_SIZE / 2 ** 20, metavar="MB",
+                        help="With --cache-dir, maximal size of the cached parse trees in megabytes, over which the "
+                             "least recently used ones are removed. Default: %(default)d.")
     parser.add_argument(
         '-s', '--sub', 
         action='append',
@@ -294,24 +578,40 @@ def main():
         parser.error("You must specify a pattern and a code file/path when not running the web application.")
         return
     
-    if args.sub_patterns:
-        for sub_pyttern in args.sub_patterns:
+    if args.sub:
+        for sub_pyttern in args.sub:
             ret = parse_subpattern_from_file(sub_pyttern, Languages.PYTHON)
             if len(ret) > 0:
                 logger.debug(f"Loaded sub patterns {[pat.name for pat in ret]} from file {sub_pyttern}")
             else:
                 logger.warning(f"No sub pytterns found in {sub_pyttern}")
 
-    matcher = PytternMatcher(match_details=args.details, stop_at_first=args.stop_first)
+    matcher = PytternMatcher(match_details=args.details, stop_at_first=args.stop_first, deduplicate=args.dedup,
+                             strategy=args.strategy, max_steps=args.max_steps,
+                             max_configurations=args.max_configurations, max_seconds=args.max_seconds,
+                             count_only=args.count, histogram=args.histogram, histogram_key=args.histogram_key,
+                             cache_dir=args.cache_dir, tree_cache_size=int(args.cache_size * 2 ** 20),
+                             single_pass=args.single_pass)
 
     # Use wildcards if they are likely present, otherwise treat as single files
     if '*' in args.pattern or '*' in args.code:
-        results = matcher.match_wildcards(args.pattern, args.code)
-        logger.info(results)
+        if args.jobs > 1 and args.details and not args.count:
+            parser.error("--details is not available with --jobs.")
+            return
+        results = matcher.match_wildcards(args.pattern, args.code, jobs=args.jobs)
+        if args.count:
+            log_counts(results)
+        else:
+            logger.info(results)
     else:
         if not args.lang:
             parser.error("--lang is required for single file matching.")
             return
+        try:
+            get_processor(args.lang)
+        except ValueError:
+            parser.error(f"Unsupported language: {args.lang} (choose from {', '.join(registered_languages())})")
+            return
 
         if not os.path.exists(args.pattern):
             logger.error(f"Pattern file not found: {args.pattern}")
@@ -321,7 +621,9 @@ def main():
             return
 
         result = matcher.match(args.pattern, args.code, args.lang)
-        if args.details:
+        if args.count:
+            log_counts({args.code: {args.pattern: result}})
+        elif args.details:
             res, det = result
             if res:
                 logger.success("Match found!")
@@ -333,6 +635,7 @@ def main():
                 logger.success("Match found!")
             else:
                 logger.warning("No match found.")
+    matcher.log_cache_counts()
 
 if __name__ == "__main__":
     logger.enable("pyttern")
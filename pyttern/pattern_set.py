@@ -0,0 +1,236 @@
+"""
+Patterns compiled once, to be matched against many code inputs (see `PatternSet`).
+"""
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from loguru import logger
+
+from .language_processors import determine_language, get_processor, Languages
+from .pda_cache import PDACache
+from .simulator.pda.PDA import PDA
+from .simulator.pda.compiled import CompiledPDA
+from .simulator.pda.transition import CallTransition
+from .subpattern.SubPattern import loaded_subpatterns
+from .subpattern.subpattern_parser import parse_subpattern_from_string
+
+OPERATORS = ('and', 'or', 'not')
+
+
+@dataclass(frozen=True, eq=False)
+class PatternNode(Mapping):
+    """
+    Node of a compiled pattern tree, read as the dictionaries of the pattern trees of `PytternMatcher`: a leaf is
+    {'name': file name, 'result': PDAs of the pattern} and an operator is {'name': 'and', 'or' or 'not',
+    'children': nodes}.
+    """
+    name: str
+    result: dict = None
+    children: tuple = None
+
+    def __getitem__(self, key):
+        if key == 'name':
+            return self.name
+        if key == 'result' and self.children is None:
+            return self.result
+        if key == 'children' and self.children is not None:
+            return self.children
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield 'name'
+        yield 'result' if self.children is None else 'children'
+
+    def __len__(self):
+        return 2
+
+
+def compile_pattern(pattern_path, processor, cache: PDACache = None) -> PatternNode:
+    """
+    Compile a pattern file, or a directory representing a composite pattern, into a pattern tree.
+    :param cache: the cache of compiled patterns to load the PDAs from and store them in, if any
+    """
+    pattern_path = str(pattern_path)
+    if os.path.isdir(pattern_path):
+        logger.debug(f"Pattern is a directory, compiling composite pattern from '{pattern_path}'")
+        return _dir_to_pattern_tree(pattern_path, processor, cache)
+    logger.debug(f"Pattern is a single file, compiling from '{pattern_path}'")
+    return PatternNode(os.path.basename(pattern_path), result=_compile_file(pattern_path, processor, cache))
+
+
+def _compile_file(path, processor, cache):
+    if cache is not None:
+        return cache.compile_file(path, processor)
+    return processor.create_pda(processor.generate_tree_from_file(path))
+
+
+def _dir_to_pattern_tree(path, processor, cache, op='and'):
+    """
+    Recursively traverse a directory and convert its structure into a pattern tree.
+    """
+    logger.debug(f"Parsing directory '{path}' with operator '{op}'")
+    children = []
+    for item in sorted(os.listdir(path)):
+        item_path = os.path.join(path, item)
+        if item in OPERATORS:
+            children.append(_dir_to_pattern_tree(item_path, processor, cache, op=item))
+        elif os.path.isdir(item_path):
+            logger.debug(f"Descending into sub-directory '{item_path}'")
+            children.append(_dir_to_pattern_tree(item_path, processor, cache, op='and'))
+        elif os.path.isfile(item_path) and determine_language(item) is not None:
+            logger.debug(f"Compiling pattern file: {item_path}")
+            children.append(PatternNode(item, result=_compile_file(item_path, processor, cache)))
+    return PatternNode(op, children=tuple(children))
+
+
+@dataclass(frozen=True)
+class PatternSet:
+    """
+    Patterns compiled once into PDAs, to be matched against many code inputs of the language lang.
+
+    patterns are the (path, pattern tree) pairs of the compiled pattern files and directories, in order, and
+    subpatterns the (name, definition) pairs of the sub-patterns they call. A set never changes once compiled and
+    matching only reads it: it can be shared between threads, each with its own PytternMatcher, and sent to other
+    processes, where the sub-patterns that are not loaded yet are loaded when the set is unpickled.
+    """
+    lang: str
+    patterns: tuple
+    subpatterns: tuple = ()
+
+    @classmethod
+    def compile(cls, paths_or_dir, lang=None, cache=None) -> "PatternSet":
+        """
+        Compile patterns, with the sub-patterns currently loaded.
+        :param paths_or_dir: a pattern file or a directory representing a composite pattern, or a list of them
+        :param lang: language of the patterns. Defaults to the language of the first pattern file.
+        :param cache: a PDACache, or the directory of one, to load the compiled patterns from and store them in
+        :return: the compiled patterns
+        """
+        if cache is not None and not isinstance(cache, PDACache):
+            cache = PDACache(cache)
+        if isinstance(paths_or_dir, (str, os.PathLike)):
+            paths_or_dir = [paths_or_dir]
+        paths = [str(path) for path in paths_or_dir]
+        if lang is None:
+            lang = _language_of(paths)
+        if isinstance(lang, Languages):
+            lang = lang.value
+        processor = get_processor(lang)
+        patterns = tuple((path, compile_pattern(path, processor, cache)) for path in paths)
+
+        names = {}
+        for _, tree in patterns:
+            for leaf in _leaves(tree):
+                for name in _called_subpatterns(leaf.result):
+                    names.setdefault(name)
+        subpatterns = tuple((name, loaded_subpatterns[name].code) for name in names if name in loaded_subpatterns)
+        pattern_set = cls(lang, patterns, subpatterns)
+        pattern_set._prepare()
+        return pattern_set
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name, code in self.subpatterns:
+            if name not in loaded_subpatterns:
+                parse_subpattern_from_string(code + "\n", Languages.PYTHON)
+        self._prepare()
+
+    def _prepare(self):
+        # The compiled forms of the PDAs and their analyses are computed lazily by the matchers: computing them once
+        # here leaves nothing to write while matching
+        for _, tree in self.patterns:
+            for leaf in _leaves(tree):
+                for pda in _all_pdas(leaf.result):
+                    compiled = CompiledPDA.of(pda)
+                    _ = compiled.required_symbols, compiled.anchors, compiled.distance_to_final
+
+    def match_tree(self, code_tree, matcher=None) -> dict:
+        """
+        Match every pattern against a code tree.
+        :param code_tree: the parse tree of the code, in the language of the patterns
+        :param matcher: the PytternMatcher whose options and counters are used. Defaults to a new PytternMatcher.
+        :return: the result of `PytternMatcher.match` by pattern path
+        """
+        matcher = _matcher(matcher)
+        results = matcher.match_trees([tree for _, tree in self.patterns], code_tree)
+        return {path: matcher.shape_result(result) for (path, _), result in zip(self.patterns, results)}
+
+    def match_file(self, code_path, matcher=None) -> dict:
+        """
+        Match every pattern against a code file, see `match_tree`. The tree of the file is loaded from the parse tree
+        cache of the matcher, if it has one.
+        """
+        code_lang = determine_language(code_path)
+        if code_lang is not None and code_lang != self.lang:
+            raise ValueError(f"Pattern language ({self.lang}) and Code language ({code_lang}) should be the same.")
+        matcher = _matcher(matcher)
+        return self.match_tree(matcher.tree_of_file(code_path, get_processor(self.lang)), matcher)
+
+    def match_many(self, code_paths, matcher=None, jobs=1) -> dict:
+        """
+        Match every pattern against code files, possibly in a pool of processes (see
+        `PytternMatcher.match_wildcards`).
+        :return: the results of `match_file` by code file, in the order of code_paths
+        """
+        matcher = _matcher(matcher)
+        code_files = []
+        for code_path in code_paths:
+            code_lang = determine_language(code_path)
+            if code_lang is not None and code_lang != self.lang:
+                raise ValueError(f"Pattern language ({self.lang}) and Code language ({code_lang}) should be the "
+                                 f"same.")
+            code_files.append((str(code_path), self.lang))
+        return dict(matcher.match_code_files(code_files, {self.lang: self}, jobs))
+
+
+def _matcher(matcher):
+    """
+    The given PytternMatcher, or a new one with the default options.
+    """
+    if matcher is not None:
+        return matcher
+    # Imported here because pyttern.main imports this module
+    from .main import PytternMatcher
+    return PytternMatcher()
+
+
+def _language_of(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                for file in sorted(files):
+                    if determine_language(file) is not None:
+                        return determine_language(file)
+        elif determine_language(path) is not None:
+            return determine_language(path)
+    raise ValueError(f"Cannot determine the language of the patterns {paths}")
+
+
+def _leaves(tree):
+    to_visit = [tree]
+    while to_visit:
+        node = to_visit.pop()
+        if node.children is None:
+            yield node
+        else:
+            to_visit.extend(node.children)
+
+
+def _all_pdas(pdas: dict):
+    """
+    PDAs of a pattern, including the ones of the sub-patterns it calls, nested in dictionaries.
+    """
+    for value in pdas.values():
+        if isinstance(value, PDA):
+            yield value
+        else:
+            yield from _all_pdas(value)
+
+
+def _called_subpatterns(pdas: dict):
+    for pda in _all_pdas(pdas):
+        for transitions in pda.transitions.values():
+            for transition in transitions:
+                if isinstance(transition.A, CallTransition):
+                    yield transition.A.subpattern_name
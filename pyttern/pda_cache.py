@@ -0,0 +1,90 @@
+"""
+Persistent cache of compiled patterns, shared by the runs of Pyttern (successive CI jobs, for instance).
+
+The PDAs of a pattern are stored in the binary format of `simulator.pda.serialize`, in a file named after a hash of
+everything they are compiled from: the text of the pattern, the language processor compiling it, the definitions of
+the loaded sub-patterns and the version of the compiler (see `fingerprints`). A pattern found in the cache is loaded
+without running the parser nor the compiler.
+"""
+import hashlib
+import os
+import tempfile
+
+from loguru import logger
+
+from .fingerprints import compiler_fingerprint
+from .simulator.pda import serialize
+from .subpattern.SubPattern import loaded_subpatterns
+
+
+class PDACache:
+    """
+    Cache of compiled patterns in a directory, in a sub-directory for each version of the binary format.
+    `hits` and `misses` count the patterns loaded from the cache and the ones that had to be compiled.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.join(str(directory), f"pda-v{serialize.FORMAT_VERSION}")
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"PDACache({self.directory!r}, hits={self.hits}, misses={self.misses})"
+
+    @staticmethod
+    def key(code: str, processor) -> str:
+        """
+        Hash of what the PDAs of a pattern are compiled from.
+        """
+        digest = hashlib.sha256()
+        for part in (compiler_fingerprint(), type(processor).__name__, code):
+            digest.update(part.encode("utf-8") + b"\0")
+        for name in sorted(loaded_subpatterns):
+            digest.update(f"{name}\0{loaded_subpatterns[name].code}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    def compile_file(self, pattern_path, processor) -> dict:
+        """
+        PDAs of a pattern file, as `processor.create_pda(processor.generate_tree_from_file(pattern_path))`, loaded
+        from the cache or compiled and stored in it.
+        """
+        with open(pattern_path, 'r', encoding="utf-8") as f:
+            code = f.read()
+        return self.compile_code(code, processor)
+
+    def compile_code(self, code: str, processor) -> dict:
+        """
+        PDAs of the code of a pattern, loaded from the cache or compiled and stored in it.
+        """
+        code = code.strip()
+        path = os.path.join(self.directory, self.key(code, processor) + ".pda")
+        pdas = self._load(path)
+        if pdas is not None:
+            self.hits += 1
+            return pdas
+        self.misses += 1
+        pdas = processor.create_pda(processor.generate_tree_from_code(code))
+        self._store(path, pdas)
+        return pdas
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, "rb") as f:
+                return serialize.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cached PDA {path}: {e}")
+            return None
+
+    def _store(self, path, pdas):
+        # Written to a temporary file first, so that concurrent runs never read a partial file
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(serialize.dumps(pdas))
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Cannot store the compiled pattern in {self.directory}: {e}")
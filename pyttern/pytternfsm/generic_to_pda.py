@@ -6,6 +6,7 @@ from typing import TypeAlias, TypeVar
 from antlr4.tree.Tree import TerminalNode
 from loguru import logger
 
+from .. import tracing
 from ..simulator.pda.PDA import PDA
 from ..simulator.pda.PDA_alphabets import NavigationAlphabet
 from ..simulator.pda.transition import NodeTransition, TransitionCondition, NamedTransition, Transition
@@ -46,7 +47,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
         super().visit(tree)
         self.depth = 0
         self.pda.final_states = self.current_state
-        logger.trace(f"var_names: {self.__var_names}")
+        tracing.log(lambda: f"var_names: {self.__var_names}")
         self.dict_pda["__main__"] = self.pda
         return self.dict_pda
     
@@ -55,7 +56,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
         pass
 
     def visitChildren(self, node):
-        logger.trace(f"Visiting {node.__class__.__name__} {hash(node)}: {node.getText()}")
+        tracing.log(lambda: f"Visiting {node.__class__.__name__} {hash(node)}: {node.getText()}")
 
         children = node.children
         if len(children) == 0:
@@ -98,7 +99,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
         return next_state
     
     def visitStatement(self, ctx):
-        logger.trace(f"Visiting Stmt {hash(ctx)}: {ctx.getText()}")
+        tracing.log(lambda: f"Visiting Stmt {hash(ctx)}: {ctx.getText()}")
 
         # Handle multiple compound wildcard
         lookahead_multiple_body = self.lookahead(ctx, self.grammar.Multiple_compound_wildcardContext)
@@ -132,7 +133,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
     def visitNumber_wildcard(self, ctx):
         numbers_node = ctx.getChild(0, self.grammar.Wildcard_numberContext)
         low, high = self.visitWildcard_number(numbers_node)
-        logger.trace(f"Visiting Simple_wildcard with numbers: low={low}, high={high}")
+        tracing.log(lambda: f"Visiting Simple_wildcard with numbers: low={low}, high={high}")
 
         if low > high:
             logger.error(f"Invalid simple wildcard: low={low} > high={high}")
@@ -179,7 +180,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
         if ctx.COMMA() is None:
             high = low
         
-        logger.trace(f"Visiting Wildcard_number: low={low}, high={high}")
+        tracing.log(lambda: f"Visiting Wildcard_number: low={low}, high={high}")
         if low > high:
             logger.error(f"Invalid wildcard number: low={low} > high={high}")
             return 1, 1
@@ -195,15 +196,15 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
 
     def visitTerminal(self, node):
         if isinstance(node, TerminalNode):
-            logger.trace(f"Visiting terminal {node}")
+            tracing.log(lambda: f"Visiting terminal {node}")
             node_text = str(node).strip()
             node_transition = NodeTransition(node_text)
         else:
-            logger.trace(f"Visiting {node.__class__.__name__} as terminal")
+            tracing.log(lambda: f"Visiting {node.__class__.__name__} as terminal")
             node_text = f"{node.__class__.__name__}/0,0"
             node_transition = NodeTransition(node.__class__.__name__, 0, 0)
 
-        logger.trace(f"last node: {self.__last_node}, current node: {node}, node text: {node_text}")
+        tracing.log(lambda: f"last node: {self.__last_node}, current node: {node}, node text: {node_text}")
 
         return self._add_up_transition(node, node_transition)
 
@@ -220,7 +221,7 @@ class Generic_to_PDA(metaclass=abc.ABCMeta):
     def visitContains_wildcard(self, ctx):
         self.add_body_transition()
 
-        logger.trace(f"Type of contains wildcard: {ctx.getChild(2).__class__.__name__}")
+        tracing.log(lambda: f"Type of contains wildcard: {ctx.getChild(2).__class__.__name__}")
         prune_tree = self.tree_pruner.visit(ctx)
         return prune_tree.getChild(2).accept(self)
 
@@ -3,6 +3,7 @@ import math
 from antlr4.tree.Tree import TerminalNode
 from loguru import logger
 
+from ... import tracing
 from ...antlr.java.JavaParserVisitor import JavaParserVisitor
 from ...antlr.java.JavaParser import JavaParser
 from .tree_pruner import TreePruner
@@ -37,7 +38,7 @@ class Java_to_PDA(Generic_to_PDA, JavaParserVisitor):
         :param ctx: The context to define boundaries for.
         :return: A tuple of (down, up) boundaries.
         """
-        logger.debug(f"Defining boundaries for {ctx.__class__.__name__} {hash(ctx)}: {ctx.getText()}")
+        tracing.log(lambda: f"Defining boundaries for {ctx.__class__.__name__} {hash(ctx)}: {ctx.getText()}", "DEBUG")
         down = up = 0
 
         if isinstance(ctx, (self.grammar.CompilationUnitContext, 
@@ -1,9 +1,28 @@
+from collections import Counter
 from dataclasses import dataclass
 
 from antlr4 import ParserRuleContext
 
 from ...simulator.pda.transition import Transition
 
+# Status of a MatchSet
+COMPLETE = "complete"  # every configuration was explored (or the match stopped at the first match on purpose)
+BUDGET_EXCEEDED = "budget_exceeded"  # the match was interrupted by a budget, the matches are the ones found so far
+
+
+def path_to_list(path) -> list:
+    """
+    Rebuild the list of (Transition, code_node) pairs from a persistent path.
+    A path is either None (empty path) or a (transition, code_node, parent_path) tuple, so that extending a path is
+    O(1) and configurations sharing a prefix share its memory.
+    """
+    ret = []
+    while path is not None:
+        transition, node, path = path
+        ret.append((transition, node))
+    ret.reverse()
+    return ret
+
 
 @dataclass
 class Match:
@@ -14,14 +33,27 @@ class Match:
 class MatchSet:
     def __init__(self):
         self.matches = []
+        self.status = COMPLETE
+        self.exceeded = None  # Name of the budget that interrupted the match, if any
+        self.n_unrecorded = 0  # Matches counted without a Match object (lean mode of the Matcher)
+        self.histograms: dict[str, Counter] = {}  # Values bound to chosen named wildcards, counted by key
+
+    def histogram(self, name: str) -> Counter:
+        """
+        Number of matches binding each value to the named wildcard name, by value key (see `Matcher.match`).
+        The histogram is empty if name was not chosen or is not a named wildcard of the pattern.
+        """
+        return self.histograms.get(name, Counter())
 
     def record(self, match: Match):
         self.matches.append(match)
 
     def count(self):
-        return len(self.matches)
+        return len(self.matches) + self.n_unrecorded
 
     def __str__(self):
+        if self.status != COMPLETE:
+            return f"MatchSet with {self.count()} matches ({self.status}: {self.exceeded}): {self.matches}"
         return f"MatchSet with {self.count()} matches: {self.matches}"
 
     def __repr__(self):
@@ -4,6 +4,7 @@ from antlr4.tree.Tree import TerminalNode
 from loguru import logger
 
 from .tree_pruner import BlockEndContext, TreePruner
+from ... import tracing
 from ...antlr.python import Python3ParserVisitor, Python3Parser
 from ...subpattern.SubPattern import loaded_subpatterns, SubPatternCallContext
 from ...simulator.pda.PDA_alphabets import NavigationAlphabet
@@ -30,20 +31,22 @@ class Python_to_PDA(Generic_to_PDA, Python3ParserVisitor):
         :param ctx: The context to define boundaries for.
         :return: A tuple of (down, up) boundaries.
         """
-        logger.trace(f"Defining boundaries for {ctx.__class__.__name__} {hash(ctx)}: {ctx.getText()}")
+        tracing.log(lambda: f"Defining boundaries for {ctx.__class__.__name__} {hash(ctx)}: {ctx.getText()}")
         down = up = 0
         if isinstance(ctx, (self.grammar.File_inputContext, self.grammar.BlockContext)):
-            logger.trace(f"Context {ctx.__class__.__name__} is a file input or block, setting boundaries to 1 and inf")
+            tracing.log(lambda: f"Context {ctx.__class__.__name__} is a file input or block, setting boundaries to 1 "
+                                f"and inf")
             down = 1
             up = math.inf
         elif isinstance(ctx, self.grammar.If_stmtContext):
-            logger.trace(f"Context {ctx.__class__.__name__} is an if statement, setting boundaries to 1 and inf")
+            tracing.log(lambda: f"Context {ctx.__class__.__name__} is an if statement, setting boundaries to 1 and inf")
             down = 1
             up = math.inf
         else:
             for child in ctx.children:
                 if self.lookahead(child, (self.grammar.Double_wildcardContext, self.grammar.List_wildcardContext)) is not None:
-                    logger.trace(f"Child {child.__class__.__name__} is a double wildcard, setting boundaries to 0 and inf")
+                    tracing.log(lambda: f"Child {child.__class__.__name__} is a double wildcard, setting boundaries to 0 "
+                                        f"and inf")
                     up = math.inf
                     continue
 
@@ -55,7 +58,8 @@ class Python_to_PDA(Generic_to_PDA, Python3ParserVisitor):
                 if simple_node is not None:
                     numbers_node = simple_node.getChild(0, self.grammar.Wildcard_numberContext)
                     if numbers_node is not None:
-                        logger.trace(f"Child {child.__class__.__name__} has wildcard numbers, visiting numbers node")
+                        tracing.log(lambda: f"Child {child.__class__.__name__} has wildcard numbers, visiting numbers "
+                                            f"node")
                         min_n, max_n = numbers_node.accept(self)
                         up += max_n
                         down += min_n
@@ -86,7 +90,7 @@ class Python_to_PDA(Generic_to_PDA, Python3ParserVisitor):
 
     def visitFile_input(self, ctx):
         subpattern_call = self.lookahead(ctx, Python3Parser.Subpattern_callContext)
-        logger.trace(f"Checking for subpattern in {ctx.getText()} -> {subpattern_call}")
+        tracing.log(lambda: f"Checking for subpattern in {ctx.getText()} -> {subpattern_call}")
 
         if subpattern_call:
             name = subpattern_call.NAME().getText()
@@ -111,7 +115,7 @@ class Python_to_PDA(Generic_to_PDA, Python3ParserVisitor):
 
     def visitBlock(self, ctx:Python3Parser.BlockContext):
         subpattern_call = self.lookahead(ctx, Python3Parser.Subpattern_callContext)
-        logger.trace(f"Checking for subpattern in {ctx.getText()} -> {subpattern_call}")
+        tracing.log(lambda: f"Checking for subpattern in {ctx.getText()} -> {subpattern_call}")
 
         if subpattern_call:
             name = subpattern_call.NAME().getText()
@@ -136,7 +140,7 @@ class Python_to_PDA(Generic_to_PDA, Python3ParserVisitor):
 
     def visitStmt(self, ctx:Python3Parser.StmtContext):
         # Handle double wildcard as Stmt
-        logger.trace(f"Visiting Stmt {hash(ctx)}: {ctx.getText()}")
+        tracing.log(lambda: f"Visiting Stmt {hash(ctx)}: {ctx.getText()}")
 
         lookahead_double_wildcard = self.lookahead(ctx, self.grammar.Double_wildcardContext)
         if lookahead_double_wildcard:
@@ -1,12 +1,26 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterator
+
 from antlr4.ParserRuleContext import ParserRuleContext
 from antlr4.tree.Tree import TerminalNode, Tree
 from loguru import logger
 
+from .. import tracing
 from .pda.PDA import PDA
 from .pda.PDA_alphabets import NavigationAlphabet
-from .pda.transition import NodeTransition, NamedTransition, CallTransition, NotCallTransition
+from .pda.compiled import CompiledPDA, ANY_NODE, BOUNDED_NODE, NAMED
+from .pda.stack import EMPTY_STACK, decode
+from .events import EventBuffer, STEP, TRANSITION, MATCH, CALL
+from .frontier import make_frontier
+from .tree_index import TreeIndex, NO_NODE
+from .pda.transition import NotCallTransition
 from ..subpattern.SubPattern import loaded_subpatterns
-from ..pytternfsm.python.match_set import MatchSet, Match
+from ..pytternfsm.python.match_set import MatchSet, Match, path_to_list, BUDGET_EXCEEDED
+
+# Keys of the values counted in the histograms of a MatchSet: the text of the bound subtree, or its structural hash
+HISTOGRAM_KEYS = ("text", "hash")
 
 
 def join_dicts(m_a: dict, m_b: dict) -> dict:
@@ -54,15 +68,110 @@ def composition(mapping, bindings):
             result[u] = bindings[t]
     return result
 
+def bind(bindings: tuple, slot: int, value) -> tuple:
+    """
+    Copy of the bindings of a configuration, with value bound to the variable of the given slot. Bindings are
+    immutable tuples indexed by variable slots (see `CompiledPDA.slots`), so configurations share them until a
+    variable is bound.
+    """
+    return bindings[:slot] + (value,) + bindings[slot + 1:]
+
+
+def _pretty_bindings(bindings: dict) -> dict:
+    return {k: (f"{v.__class__.__name__}: {v.getText()}" if v is not None else "None") for k, v in bindings.items()}
+
+
+def exceeded_budget(n_step, n_configurations, deadline, max_steps=None, max_configurations=None) -> str | None:
+    """
+    Name of the budget of a run that is exceeded, or None (see `Matcher.run`).
+    :param deadline: the time.perf_counter() value the run must stop at, or None
+    """
+    if max_steps is not None and n_step >= max_steps:
+        return "max_steps"
+    if max_configurations is not None and n_configurations > max_configurations:
+        return "max_configurations"
+    if deadline is not None and time.perf_counter() >= deadline:
+        return "max_seconds"
+    return None
+
+
+def configuration_key(state, node_id, stack, bindings) -> tuple:
+    """
+    Fingerprint of a configuration used to detect duplicates. Two configurations with the same key have the same
+    future, whatever path led to them, so only the first one needs to be explored.
+    :param state: state of the PDA
+    :param node_id: id of the current node in the tree index
+    :param stack: current stack of the PDA (integer encoded)
+    :param bindings: current variable bindings (tuple indexed by variable slots)
+    :return: a hashable key made of the state, the node, the stack and the identity of bound values
+    """
+    return state, node_id, stack, tuple(map(id, bindings))
+
+
+class SubpatternMemo:
+    """
+    Memo table of sub-pattern calls, shared by a Matcher and the matchers it starts for sub-patterns.
+
+    The bindings found by a sub-pattern only depend on the sub-pattern PDA, the node it is called on and the values
+    bound to its parameters, so they are computed once per (PDA, tree index, node id, bound values) and reused by every
+    configuration reaching the same call. Node ids are only meaningful in their TreeIndex, which is part of the key, so
+    a memo can be shared by runs on different trees. Bound values are fingerprinted by identity, as in
+    `configuration_key`.
+    `hits` and `misses` count the calls answered from the table and the ones that had to run the sub-pattern.
+    """
+
+    def __init__(self):
+        self.table = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self):
+        return f"SubpatternMemo(entries={len(self.table)}, hits={self.hits}, misses={self.misses})"
+
+
 class Matcher:
-    def __init__(self, pdas: dict[str, PDA], parse_tree: Tree):
+    def __init__(self, pdas: dict[str, PDA], parse_tree: Tree, deduplicate=False, tree_index: TreeIndex = None,
+                 subpattern_memo: SubpatternMemo = None, strategy="dfs", lean=False, events: EventBuffer = None,
+                 anchored=True, histogram=(), histogram_key="text"):
         self.pda = pdas["__main__"]
         self.callable = pdas
         self.parse_tree = parse_tree
+        self.tree_index = tree_index if tree_index is not None else TreeIndex.of(parse_tree)
+        self.root_id = self.tree_index.node_id(parse_tree)
+        self.compiled = CompiledPDA.of(self.pda)
+        self._class_keys = [self.compiled.node_key(name, None) for name in self.tree_index.class_names]
+        # Bindings of configurations are tuples indexed by these slots, see `bind` and `bindings_of`
+        self.variables = list(self.compiled.variables)
+        self.slots = dict(self.compiled.slots)
         self.match_set = MatchSet()
-        self.configurations = []
+        self.configurations = make_frontier(strategy, self.compiled)
         self.n_step = 0
+        self.deduplicate = deduplicate
+        self._visited = set()
         self._listeners = []
+        self._trace = tracing.step_tracing()
+        self.subpattern_memo = subpattern_memo if subpattern_memo is not None else SubpatternMemo()
+        # In lean mode, configurations carry no path and matches are only counted (see `MatchSet.n_unrecorded`)
+        self.lean = lean
+        self.events = events
+        self._on_step = self._on_transition = self._on_match = self._on_call = None
+        if events is not None:
+            self._on_step = events.writer(STEP)
+            self._on_transition = events.writer(TRANSITION)
+            self._on_match = events.writer(MATCH)
+            self._on_call = events.writer(CALL)
+        # Nodes where the anchors of the PDA can be matched, by prefix state (see `_push`)
+        self._anchors = self._anchor_candidates() if anchored else {}
+        if histogram_key not in HISTOGRAM_KEYS:
+            raise ValueError(f"Unknown histogram key {histogram_key}, expected one of {HISTOGRAM_KEYS}")
+        self.histogram_key = histogram_key
+        # Named wildcards of the PDA whose values are counted at each match, in `MatchSet.histograms`
+        self._histogram = tuple(name for name in histogram if name in self.pda.named_wildcards)
+        for name in self._histogram:
+            self.match_set.histograms[name] = Counter()
 
     def add_listener(self, listener):
         self._listeners.append(listener)
@@ -74,7 +183,10 @@ class Matcher:
         self._listeners.clear()
 
     @staticmethod
-    def match(pda: dict[str, PDA], parse_tree: ParserRuleContext, stop_at_first=False, bindings=None) -> MatchSet:
+    def match(pda: dict[str, PDA], parse_tree: ParserRuleContext, stop_at_first=False, bindings=None,
+              deduplicate=False, tree_index: TreeIndex = None, subpattern_memo: SubpatternMemo = None,
+              strategy="dfs", max_steps=None, max_configurations=None, max_seconds=None, lean=False,
+              events: EventBuffer = None, anchored=True, histogram=(), histogram_key="text") -> MatchSet:
         """
         Matches a given parse tree against a Pushdown Automaton (PDA) and returns the resulting matches.
 
@@ -82,125 +194,345 @@ class Matcher:
         :param parse_tree: The parse tree to match against the PDA.
         :param stop_at_first: A boolean indicating whether to stop after the first match is found. Defaults to False.
         :param bindings: An optional dictionary of initial variable bindings. Defaults to None.
+        :param deduplicate: A boolean indicating whether configurations already explored should be dropped instead of
+            being explored again. Defaults to False.
+        :param tree_index: An optional index of a tree containing parse_tree. Defaults to the index of parse_tree.
+        :param subpattern_memo: An optional memo table of sub-pattern calls, to share it between runs (on the same
+            tree or not, see `SubpatternMemo`) or to read its counters afterwards. Defaults to a new table for this
+            run.
+        :param strategy: The order in which configurations are explored, one of "dfs", "bfs" or "best" (see
+            `frontier`). Defaults to "dfs".
+        :param max_steps: Optional maximum number of steps (see `run`).
+        :param max_configurations: Optional maximum number of configurations waiting to be explored (see `run`).
+        :param max_seconds: Optional maximum duration of the match in seconds (see `run`).
+        :param lean: A boolean indicating whether matches should only be counted. The returned MatchSet then has no
+            Match objects, only a count, and no transition path is built during the search. Defaults to False.
+        :param events: An optional buffer recording the events of the match (see `events`). Defaults to None.
+        :param anchored: A boolean indicating whether configurations that cannot reach a node labelled by an anchor
+            of the PDA (see `CompiledPDA.anchors`) should be dropped. The matches are the same, in fewer steps.
+            Defaults to True.
+        :param histogram: Names of named wildcards whose bound values are counted at each match, in
+            `MatchSet.histograms`. With lean, this gives value statistics without building any Match. Names that are
+            not named wildcards of the PDA are ignored. Defaults to none.
+        :param histogram_key: How bound values are counted, one of "text" (the text of the bound subtree) or "hash"
+            (its structural hash, see `TreeIndex`, so that subtrees of the same shape are counted together whatever
+            their layout). Unbound values are counted under None. Defaults to "text".
         :return: A MatchSet object containing the results of the matching process.
         """
 
-        matcher = Matcher(pda, parse_tree)
+        matcher = Matcher(pda, parse_tree, deduplicate, tree_index, subpattern_memo, strategy, lean, events, anchored,
+                          histogram, histogram_key)
         logger.debug("Starting match")
         matcher.start(bindings)
-        while len(matcher.configurations) > 0:
-            matcher.step()
-            if stop_at_first and matcher.match_set.count() > 0:
-                break
-        logger.debug(f"Match finished with {matcher.match_set.count()} matches")
+        matcher.run(stop_at_first, max_steps, max_configurations, max_seconds)
+        logger.debug(f"Match finished with {matcher.match_set.count()} matches ({matcher.subpattern_memo})")
         return matcher.match_set
 
+    @staticmethod
+    def iter_matches(pda: dict[str, PDA], parse_tree: ParserRuleContext, bindings=None, deduplicate=False,
+                     tree_index: TreeIndex = None, subpattern_memo: SubpatternMemo = None, strategy="dfs",
+                     max_steps=None, max_configurations=None, max_seconds=None) -> Iterator[Match]:
+        """
+        Lazy version of `Matcher.match`: yields each Match as soon as it is found. The search only goes on when the
+        next match is requested, so the caller can stop at any point, and yielded matches are not kept by the
+        matcher. The iteration also ends when a budget is exceeded. The parameters are the ones of `Matcher.match`.
+        """
+        matcher = Matcher(pda, parse_tree, deduplicate, tree_index, subpattern_memo, strategy)
+        matcher.start(bindings)
+        for match in matcher.iter_run(max_steps, max_configurations, max_seconds):
+            matcher.match_set.matches.clear()
+            yield match
+
+    def run(self, stop_at_first=False, max_steps=None, max_configurations=None, max_seconds=None) -> MatchSet:
+        """
+        Steps the matcher until there are no more configurations to explore, or until a budget is exceeded.
+        In the latter case, the match set keeps the matches found so far and its status is BUDGET_EXCEEDED, with the
+        name of the budget in `exceeded`. Sub-pattern calls are not interrupted: budgets are checked between steps.
+
+        :param stop_at_first: A boolean indicating whether to stop after the first match is found.
+        :param max_steps: Maximum number of steps of this matcher, or None.
+        :param max_configurations: Maximum number of configurations waiting to be explored, or None.
+        :param max_seconds: Maximum duration of the run in seconds, or None.
+        :return: The match set of the matcher.
+        """
+        for _ in self.iter_run(max_steps, max_configurations, max_seconds):
+            if stop_at_first:
+                break
+        return self.match_set
+
+    def iter_run(self, max_steps=None, max_configurations=None, max_seconds=None) -> Iterator[Match]:
+        """
+        Generator form of `run`: steps the matcher and yields each new match once it is recorded in the match set
+        (None in lean mode, where matches are only counted).
+        """
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        configurations = self.configurations
+        match_set = self.match_set
+        while len(configurations) > 0:
+            n_matches = match_set.count()
+            self.step()
+            if match_set.count() > n_matches:
+                yield None if self.lean else match_set.matches[-1]
+            if len(configurations) == 0:
+                break
+            exceeded = exceeded_budget(self.n_step, len(configurations), deadline, max_steps, max_configurations)
+            if exceeded is not None:
+                logger.warning(f"Match stopped after {self.n_step} steps: {exceeded} budget exceeded")
+                self.match_set.status = BUDGET_EXCEEDED
+                self.match_set.exceeded = exceeded
+                break
+
+    @staticmethod
+    def can_match(pda: dict[str, PDA], parse_tree: Tree) -> bool:
+        """
+        Cheap necessary condition for `Matcher.match` to find a match: every node label required by the PDA (see
+        `CompiledPDA.required_symbols`) appears in the parse tree. If it returns False, the PDA cannot match the tree.
+
+        :param pda: The PDAs of the pattern, as given to `Matcher.match`.
+        :param parse_tree: The parse tree to match against the PDA.
+        :return: False if the PDA cannot match the tree, True if it may.
+        """
+        required = CompiledPDA.of(pda["__main__"]).required_symbols
+        return required <= TreeIndex.of(parse_tree).symbols
+
+    def use_slots(self, variables: list, slots: dict):
+        """
+        Index the bindings of the configurations with slots shared with other matchers, so that they can explore the
+        same configurations (see `MultiMatcher`). Must be called before `start`.
+        :param variables: the variables of the shared slots, including the ones of this matcher
+        :param slots: the slot of each variable
+        """
+        self.variables, self.slots = variables, slots
+
     def start(self, initial_bindings=None):
-        bindings = {t: None for t in self.pda.named_wildcards}
+        bindings = [None] * len(self.variables)
         if initial_bindings is not None:
-            bindings.update(initial_bindings)
-        first_config = (self.pda.initial_state, self.parse_tree, "", bindings, [])
-        self.configurations.append(first_config)
+            for name, value in initial_bindings.items():
+                if name not in self.slots:
+                    self.slots[name] = len(self.variables)
+                    self.variables.append(name)
+                    bindings.append(value)
+                else:
+                    bindings[self.slots[name]] = value
+        first_config = (self.pda.initial_state, self.root_id, EMPTY_STACK, tuple(bindings), None)
+        self._push(first_config)
         for listener in self._listeners:
             listener.on_start(self, self.pda.initial_state, self.parse_tree)
         return self
 
     def step(self):
-        logger.trace(f"Step {self.n_step}")
+        if self._trace:
+            logger.trace(f"Step {self.n_step}")
         if len(self.configurations) == 0:
             raise Warning("No more configurations to process")
         current_config = self.configurations.pop()
-        logger.trace(f"Checking config: {current_config}")
-        current_state, current_node, stack, var, matches = current_config
-        for listener in self._listeners:
-            listener.step(self, current_state, current_node, stack, var, matches)
+        current_state, current_id, stack, var, path = current_config
+        current_node = self.tree_index.nodes[current_id]
+        if self._trace:
+            logger.trace(f"Checking config: {(current_state, current_node, decode(stack), self.bindings_of(var))}")
+        if self._listeners:
+            matches = path_to_list(path)
+            bindings = self.bindings_of(var)
+            for listener in self._listeners:
+                listener.step(self, current_state, current_node, decode(stack), bindings, matches)
+        if self._on_step is not None:
+            self._on_step((STEP, self.n_step, current_state, current_id, stack))
 
-        if current_state == self.pda.final_states:
+        if current_state == self.compiled.final_state:
             logger.debug("Match found")
-            match = Match(self.n_step, var.copy(), matches)
-            self.match_set.record(match)
-            for listener in self._listeners:
-                listener.on_match(self, match)
+            self.record_match(var, None if self.lean else path_to_list(path), self.n_step)
+            if self._on_match is not None:
+                self._on_match((MATCH, self.n_step, current_state, current_id, self.match_set.count()))
             return self
 
 
-        for transition in self.pda.get_transitions(current_state):
-            # Transition components
-            alpha = transition.alpha
-            A = transition.A
-            t = transition.t
-            q_prime = transition.q_prime
-            beta = transition.beta
+        index = self.tree_index
+        text = index.texts[current_id]
+        if text is None:
+            key = self._class_keys[index.class_id[current_id]]
+        else:
+            key = self.compiled.node_key(None, text)
 
-            if not stack.endswith(alpha):
-                logger.trace(f"Wrong stack elements: expecting {alpha} but was {stack[-len(alpha):]}")
+        for kind, A, alpha_bits, alpha_length, t, q_prime, beta_bits, beta_length, transition in \
+                self.compiled.get_transitions(current_state, key):
+            if (stack >> alpha_length) == 0 or (stack & ((1 << alpha_length) - 1)) != alpha_bits:
+                if self._trace:
+                    logger.trace(f"Wrong stack elements: expecting {transition.alpha} but was {decode(stack)}")
                 continue
-            new_stack = stack.removesuffix(alpha)
-
-            class_name = current_node.__class__.__name__
-
-            new_var = var.copy()
-            new_vars = []
+            new_stack = stack >> alpha_length
 
             # Default terminal node
-            if isinstance(A, NodeTransition):
-                if not self._match_node(current_node, A):
-                    if isinstance(current_node, TerminalNode):
-                        logger.trace(f"Wrong input: expecting {A.name} but was {str(current_node)}")
-                    else:
-                        logger.trace(f"Wrong input: expecting {A.name} but was {class_name}")
+            if kind == ANY_NODE:
+                new_vars = (var,)
+            elif kind == BOUNDED_NODE:
+                if not A.down <= index.child_count[current_id] <= A.up:
+                    if self._trace:
+                        logger.trace(f"Wrong input: expecting {A.name} with {A.down} to {A.up} children")
                     continue
-                new_vars.append(new_var)
+                new_vars = (var,)
 
             # Handle Variables
-            elif isinstance(A, NamedTransition):
-                name = A.name
-                if new_var[name] is None:
-                    logger.trace(f"New variable: {name}")
-                    new_var[name] = current_node
-                elif not self._match_tree(new_var[name], current_node):
-                    logger.trace(f"Wrong variable: {name} expecting {new_var[name]} but was {current_node}")
+            elif kind == NAMED:
+                slot = self.slots[A.name]
+                bound = var[slot]
+                if bound is None:
+                    if self._trace:
+                        logger.trace(f"New variable: {A.name}")
+                    new_vars = (bind(var, slot, current_node),)
+                elif not self.match_tree(bound, current_node):
+                    if self._trace:
+                        logger.trace(f"Wrong variable: {A.name} expecting {bound} but was {current_node}")
                     continue
-                new_vars.append(new_var)
+                else:
+                    new_vars = (var,)
 
             # Handle subpatterns
-            elif isinstance(A, CallTransition):
-                logger.trace(f"Handling subpattern transition: {A}")
-                possible_bindings = self.call_subpattern(A, current_node, new_var)
-                if len(possible_bindings) < 1:
-                    continue
-                new_vars += possible_bindings
-
             else:
-                logger.error(f"Unknown transition type: {A}")
-                raise ValueError(f"Unknown transition type: {A} ({type(A)})")
-
+                if self._trace:
+                    logger.trace(f"Handling subpattern transition: {A}")
+                new_vars = self.call_subpattern(A, current_node, var)
+                if len(new_vars) < 1:
+                    continue
 
-            next_node = self._get_next_node(current_node, t)
-            if next_node is None:
-                logger.trace(f"Wrong direction: cannot get next node at {t}")
+            next_node = self.next_node(current_id, t)
+            if next_node == NO_NODE:
+                if self._trace:
+                    logger.trace(f"Wrong direction: cannot get next node at {t}")
                 continue
 
-            logger.trace(f"Taking {transition}")
+            if self._trace:
+                logger.trace(f"Taking {transition}")
+            if self._on_transition is not None:
+                self._on_transition((TRANSITION, self.n_step, current_state, current_id, q_prime, next_node))
 
-            new_stack += beta
-            new_matches = matches + [(transition, current_node)]
+            new_stack = (new_stack << beta_length) | beta_bits
+            new_path = None if self.lean else (transition, current_node, path)
 
             for variables in new_vars:
-                new_config = (q_prime, next_node, new_stack, variables.copy(), new_matches)
-                self.configurations.append(new_config)
+                self._push((q_prime, next_node, new_stack, variables, new_path))
 
         self.n_step += 1
         return self
 
+    def _push(self, config):
+        """
+        Adds a configuration to the ones to explore. The configuration is dropped if its state is in the prefix of an
+        anchor and no node labelled by this anchor can be reached from its node. In deduplicate mode, it is also
+        dropped if an equivalent one (see `configuration_key`) was already pushed.
+        """
+        state, node, stack, variables, _ = config
+        if not self.reaches_anchors(state, node):
+            if self._trace:
+                logger.trace(f"No anchor reachable from node {node} in state {state}")
+            return
+        if self.deduplicate:
+            key = configuration_key(state, node, stack, variables)
+            if key in self._visited:
+                if self._trace:
+                    logger.trace(f"Configuration already explored: {key}")
+                return
+            self._visited.add(key)
+        self.configurations.append(config)
+
+    def record_match(self, bindings: tuple, matches: list | None, n_step: int):
+        """
+        Record a match in the match set: its values in the histograms and, unless in lean mode, a Match with these
+        bindings and transition path, which is given to the listeners.
+        :param bindings: the bindings of the final configuration
+        :param matches: the (transition, node) pairs of the path to the final configuration, None in lean mode
+        :param n_step: the step the match was found at
+        """
+        if self._histogram:
+            self._count_values(bindings)
+        if self.lean:
+            self.match_set.n_unrecorded += 1
+            return
+        match = Match(n_step, self.bindings_of(bindings), matches)
+        self.match_set.record(match)
+        for listener in self._listeners:
+            listener.on_match(self, match)
+
+    def bindings_of(self, bindings: tuple) -> dict:
+        """
+        Dictionary form of the bindings of a configuration, as in `Match.bindings`: every named wildcard of the PDA,
+        bound or not, and the other variables (sub-pattern arguments, initial bindings) that are bound.
+        """
+        slots = self.slots
+        result = {name: bindings[slots[name]] for name in self.compiled.named_wildcards}
+        for name, slot in slots.items():
+            if bindings[slot] is not None and name not in result:
+                result[name] = bindings[slot]
+        return result
+
+    def _count_values(self, bindings):
+        """
+        Count the values bound to the histogram wildcards by a match in the histograms of the match set.
+        """
+        histograms = self.match_set.histograms
+        index = self.tree_index
+        slots = self.slots
+        for name in self._histogram:
+            value = bindings[slots[name]]
+            if value is None:
+                key = None
+            elif self.histogram_key == "text":
+                key = value.getText()
+            else:
+                key = index.hashes[index.node_id(value)]
+            histograms[name][key] += 1
+
+    def _anchor_candidates(self) -> dict[int, tuple]:
+        """
+        Map each state in the prefix of an anchor to the ids of the nodes labelled by the anchors of this state, the
+        rarest anchor first.
+        """
+        by_state = {}
+        for name, prefix in self.compiled.anchors.items():
+            ids = self.tree_index.ids_of(name)
+            for state in prefix:
+                by_state.setdefault(state, []).append(ids)
+        return {state: tuple(sorted(candidates, key=len)) for state, candidates in by_state.items()}
+
+    def in_anchor_prefix(self, state) -> bool:
+        """
+        Check if configurations in state are dropped when they cannot reach the anchors of the PDA (see `_push`).
+        """
+        return state in self._anchors
+
+    def reaches_anchors(self, state, node_id) -> bool:
+        """
+        Check if a configuration in state at node_id can still reach the anchors of the PDA. Always True for states
+        that are not in the prefix of an anchor, or when the matcher is not anchored.
+        """
+        candidates = self._anchors.get(state)
+        return candidates is None or self._reaches_candidates(node_id, candidates)
+
+    def _reaches_candidates(self, node_id, candidates) -> bool:
+        """
+        Check if every anchor of a prefix state labels a node that can be reached from node_id. Before its anchor, the
+        PDA only goes to children and next siblings, so the reachable nodes are the ones of the subtrees of node_id
+        and of its next siblings, which are contiguous in pre-order.
+        """
+        index = self.tree_index
+        if node_id == self.root_id:
+            end = node_id + index.sizes[node_id]
+        else:
+            parent = index.parent[node_id]
+            end = parent + index.sizes[parent]
+        for ids in candidates:
+            position = bisect_left(ids, node_id)
+            if position == len(ids) or ids[position] >= end:
+                return False
+        return True
+
     def call_subpattern(self, transition, current_node, bindings):
         """
         Calls a subpattern transition (CallTransition or NotCallTransition) against the current node.
 
         :param transition: The transition object.
         :param current_node: The current node in the parse tree.
-        :param bindings: The current variable bindings.
-        :return: A list of binding dicts.
+        :param bindings: The current variable bindings, a tuple indexed by variable slots.
+        :return: A list of bindings tuples, one per match of the subpattern.
         """
         subpattern_name = transition.subpattern_name
         trnsf_name = transition.transformation_name
@@ -216,86 +548,106 @@ class Matcher:
         subpattern_pdas = self.callable[to_call]
         subpattern_pda = subpattern_pdas["__main__"]
 
-        m_j_to_i = mapping(subpattern.args_order, args)
-        comp = composition(m_j_to_i, bindings)
-        m_j_epsilon = {u: None for u in subpattern_pda.named_wildcards}
-        subpattern_params = join_dicts(m_j_epsilon, comp)
-
-        logger.trace(f"Calling subpattern {subpattern_name}:{trnsf_name} on node {current_node} with bindings {subpattern_params}")
-
-        match_set = Matcher.match(subpattern_pdas, current_node, stop_at_first=False, bindings=subpattern_params)
+        # Parameters of the call: m_j_epsilon ⊕ m_(j->i)[bindings] (see `join_dicts` and `composition`)
+        slots = self.slots
+        subpattern_params = {u: None for u in subpattern_pda.named_wildcards}
+        for u, t in mapping(subpattern.args_order, args).items():
+            slot = slots.get(t)
+            if slot is not None and bindings[slot] is not None:
+                subpattern_params[u] = bindings[slot]
+
+        memo = self.subpattern_memo
+        node_id = self.tree_index.get_node_id(current_node)
+        key = (id(subpattern_pda), id(self.tree_index), node_id,
+               tuple((name, id(value)) for name, value in subpattern_params.items()))
+        sub_matches = memo.table.get(key)
+        memo_hit = int(sub_matches is not None)
+        if sub_matches is None:
+            memo.misses += 1
+            if self._trace:
+                logger.trace(f"Calling subpattern {subpattern_name}:{trnsf_name} on node {current_node} with bindings {subpattern_params}")
+            match_set = Matcher.match(subpattern_pdas, current_node, stop_at_first=False, bindings=subpattern_params,
+                                      deduplicate=self.deduplicate, tree_index=self.tree_index,
+                                      subpattern_memo=memo)
+            # The tree index and the parameters are kept alive with the entry, so that their ids in the key cannot
+            # be reused
+            sub_matches = memo.table[key] = (match_set.matches, subpattern_params, self.tree_index)
+        else:
+            memo.hits += 1
+            if self._trace:
+                logger.trace(f"Subpattern {subpattern_name}:{trnsf_name} on node {current_node} found in memo")
+        sub_matches = sub_matches[0]
+        if self._on_call is not None:
+            self._on_call((CALL, self.n_step, node_id, memo_hit, len(sub_matches)))
 
         if isinstance(transition, NotCallTransition):
-            if match_set.count() > 0:
-                logger.trace(f"NOT subpattern {subpattern_name}:{trnsf_name} failed (match found)")
+            if len(sub_matches) > 0:
+                if self._trace:
+                    logger.trace(f"NOT subpattern {subpattern_name}:{trnsf_name} failed (match found)")
                 return []
             else:
-                logger.trace(f"NOT subpattern {subpattern_name}:{trnsf_name} succeeded (no match found)")
-                return [bindings.copy()]
+                if self._trace:
+                    logger.trace(f"NOT subpattern {subpattern_name}:{trnsf_name} succeeded (no match found)")
+                return [bindings]
 
-        if match_set.count() == 0:
-            logger.trace(f"subpattern {subpattern_name}:{trnsf_name} did not match")
+        if len(sub_matches) == 0:
+            if self._trace:
+                logger.trace(f"subpattern {subpattern_name}:{trnsf_name} did not match")
             return []
 
+        # Bindings after the call: bindings ⊕ m_(i->j)[sub-pattern bindings], on the slots of the arguments
+        returned = [(slots[t], u) for t, u in mapping(args, subpattern.args_order).items()]
         new_bindings = []
-        for match in match_set.matches:
-            pretty_bindings = {k: (f"{v.__class__.__name__}: {v.getText()}" if v is not None else "None") for k,
-            v in match.bindings.items()}
-            logger.debug(f"subpattern {subpattern_name}:{trnsf_name} matched with bindings {pretty_bindings}")
+        for match in sub_matches:
+            tracing.log(lambda: f"subpattern {subpattern_name}:{trnsf_name} matched with bindings "
+                                f"{_pretty_bindings(match.bindings)}", "DEBUG")
             sub_bindings = match.bindings
-            m_i_to_j = mapping(args, subpattern.args_order)
-            comp = composition(m_i_to_j, sub_bindings)
-            new_binding = bindings.copy()
-            new_binding.update(comp)
-            new_bindings.append(new_binding)
+            new_binding = list(bindings)
+            for slot, u in returned:
+                if u in sub_bindings:
+                    new_binding[slot] = sub_bindings[u]
+            new_bindings.append(tuple(new_binding))
 
         return new_bindings
 
 
-    def _get_next_node(self, node, directions):
-        current_node = node
+    def next_node(self, node_id, directions):
+        """
+        Id of the node reached from node_id by following the navigation directions of a transition, or NO_NODE.
+        """
+        index = self.tree_index
         for direction in directions:
             match direction:
                 case NavigationAlphabet.RIGHT_SIBLING:
-                    if current_node == self.parse_tree:
-                        return None
-                    try:
-                        parent = current_node.parentCtx
-                        if parent is None:
-                            return None
-                        siblings = list(parent.getChildren())
-                        index = siblings.index(current_node)
-                        current_node = siblings[index + 1]
-                    except IndexError:
-                        return None
+                    if node_id == self.root_id:
+                        return NO_NODE
+                    node_id = index.next_sibling[node_id]
                 case NavigationAlphabet.LEFT_CHILD:
-                    try:
-                        children = list(current_node.getChildren())
-                        current_node = children[0]
-                    except AttributeError:
-                        return None
-                    except IndexError:
-                        return None
+                    node_id = index.first_child[node_id]
                 case NavigationAlphabet.PARENT:
-                    if current_node == self.parse_tree:
-                        return None
-                    current_node = current_node.parentCtx
-        return current_node
-
-    @staticmethod
-    def _match_node(input, A: NodeTransition):
-        name = A.name
-        down, up = A.down, A.up
-        if name == "":
-            return True
-        if isinstance(input, TerminalNode):
-            return str(input) == name
-
-        return input.__class__.__name__ == name and down <= input.getChildCount() <= up
+                    if node_id == self.root_id:
+                        return NO_NODE
+                    node_id = index.parent[node_id]
+            if node_id == NO_NODE:
+                return NO_NODE
+        return node_id
+
+    def match_tree(self, tree1, tree2):
+        """
+        Check if two subtrees are equal, as required for two bindings of the same named wildcard.
+        """
+        if self._trace:
+            logger.trace(f'Matching {tree1} and {tree2}')
+        if tree1 is None or tree2 is None:
+            return False
+        index = self.tree_index
+        id1, id2 = index.get_node_id(tree1), index.get_node_id(tree2)
+        if id1 != NO_NODE and id2 != NO_NODE:
+            return index.equal_subtrees(id1, id2)
+        return Matcher._compare_trees(tree1, tree2)
 
     @staticmethod
-    def _match_tree(tree1, tree2):
-        logger.trace(f'Matching {tree1} and {tree2}')
+    def _compare_trees(tree1, tree2):
         if tree1 is None or tree2 is None:
             return False
         if isinstance(tree1, TerminalNode) and isinstance(tree2, TerminalNode):
@@ -305,6 +657,6 @@ class Matcher:
         if len(tree1.children) != len(tree2.children):
             return False
         for child1, child2 in zip(tree1.children, tree2.children):
-            if not Matcher._match_tree(child1, child2):
+            if not Matcher._compare_trees(child1, child2):
                 return False
         return True
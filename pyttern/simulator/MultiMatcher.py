@@ -0,0 +1,351 @@
+import time
+
+from antlr4.tree.Tree import Tree
+from loguru import logger
+
+from .Matcher import Matcher, SubpatternMemo, bind, configuration_key, exceeded_budget
+from .events import EventBuffer, STEP, TRANSITION, MATCH
+from .frontier import make_frontier
+from .pda.PDA import PDA
+from .pda.compiled import ANY_NODE, BOUNDED_NODE, NAMED, OTHER, terminal_key
+from .pda.stack import EMPTY_STACK
+from .tree_index import TreeIndex, NO_NODE
+from ..pytternfsm.python.match_set import MatchSet, BUDGET_EXCEEDED
+
+
+class _MergedEdge:
+    """
+    A transition of the merged automaton. It stands for one transition of each member of the target merged state:
+    `transitions[i]` is the original transition that leads to the i-th member of the target, from the member
+    `sources[i]` of the source merged state. All these transitions have the same condition, navigation and stack
+    operations, so they are taken together.
+    """
+    __slots__ = ("kind", "condition", "alpha_bits", "alpha_length", "navigation", "beta_bits", "beta_length",
+                 "target", "sources", "transitions", "pattern")
+
+    def __init__(self, kind, condition, alpha_bits, alpha_length, navigation, beta_bits, beta_length, pattern):
+        self.kind = kind
+        self.condition = condition
+        self.alpha_bits = alpha_bits
+        self.alpha_length = alpha_length
+        self.navigation = navigation
+        self.beta_bits = beta_bits
+        self.beta_length = beta_length
+        self.pattern = pattern
+        self.target = None
+        self.sources = []
+        self.transitions = []
+
+
+class MultiMatcher:
+    """
+    Matches several patterns against the same parse tree in a single traversal.
+
+    The PDAs of the patterns are merged lazily into one automaton whose states are tuples of (pattern id, state)
+    members. Transitions of different patterns with the same condition, navigation and stack operations are merged
+    into one edge, so common prefixes (e.g. `file_input -> stmt` and the statement skipping loops) are explored once
+    for all the patterns. Named wildcards and sub-pattern calls are specific to a pattern and split its members from
+    the others. Each pattern gets the same matches as with `Matcher.match`, although possibly in another order.
+    As in the Matcher, the members that cannot reach the anchors of their pattern are dropped from merged states.
+
+    Each pattern has a lane: a Matcher of its PDAs that is never stepped, but calls its sub-patterns, compares the
+    values of its named wildcards and records its matches. In the events of the match, states are the ids of the merged
+    states, whose members are given by `members`.
+    """
+
+    def __init__(self, patterns: list[dict[str, PDA]], parse_tree: Tree, deduplicate=False,
+                 tree_index: TreeIndex = None, anchored=True, subpattern_memo: SubpatternMemo = None, strategy="dfs",
+                 lean=False, events: EventBuffer = None, histogram=(), histogram_key="text"):
+        self.parse_tree = parse_tree
+        self.tree_index = tree_index if tree_index is not None else TreeIndex.of(parse_tree)
+        self.subpattern_memo = subpattern_memo if subpattern_memo is not None else SubpatternMemo()
+        self.lanes = [Matcher(pdas, parse_tree, deduplicate, self.tree_index, self.subpattern_memo, lean=lean,
+                              events=events, anchored=anchored, histogram=histogram, histogram_key=histogram_key)
+                      for pdas in patterns]
+        self.match_sets = [lane.match_set for lane in self.lanes]
+        self._navigator = self.lanes[0] if self.lanes else None
+        # Minimal distance to the final state of the members of each merged state, for the "best" strategy
+        self.distance_to_final = {}
+        self.configurations = make_frontier(strategy, self)  # reads distance_to_final, filled as states are merged
+        self.n_step = 0
+        self.deduplicate = deduplicate
+        self.lean = lean
+        self.events = events
+        self._on_step = self._on_transition = self._on_match = None
+        if events is not None:
+            self._on_step = events.writer(STEP)
+            self._on_transition = events.writer(TRANSITION)
+            self._on_match = events.writer(MATCH)
+        self._visited = set()
+        self._finished = set()
+
+        self.root_id = self.tree_index.node_id(parse_tree)
+
+        # Union of the symbols of all the compiled PDAs, translated back to each PDA's own symbols by `_lane_key`
+        self._names = list(dict.fromkeys(name for lane in self.lanes for name in lane.compiled.symbols))
+        self._symbols = {name: symbol for symbol, name in enumerate(self._names)}
+        self._class_keys = [self._node_key(name, None) for name in self.tree_index.class_names]
+        # The lanes share the slots of the union of their variables, so that they can call sub-patterns on the bindings
+        # of merged configurations
+        self.variables = list(dict.fromkeys(name for lane in self.lanes for name in lane.variables))
+        self.slots = {name: slot for slot, name in enumerate(self.variables)}
+        for lane in self.lanes:
+            lane.use_slots(self.variables, self.slots)
+
+        self._states = []
+        self._state_ids = {}
+        self._edges = {}
+        # For each merged state, its members in the prefix of an anchor: (member, lane, state)
+        self._anchored_members = []
+        self._restricted_edges = {}
+
+    @staticmethod
+    def match(patterns: list[dict[str, PDA]], parse_tree: Tree, stop_at_first=False, deduplicate=False,
+              tree_index: TreeIndex = None, anchored=True, subpattern_memo: SubpatternMemo = None, strategy="dfs",
+              max_steps=None, max_configurations=None, max_seconds=None, lean=False, events: EventBuffer = None,
+              histogram=(), histogram_key="text") -> list[MatchSet]:
+        """
+        Matches a parse tree against several patterns at once. The parameters are the ones of `Matcher.match`, applied
+        to every pattern, except for the budgets, which apply to the whole traversal.
+
+        :param patterns: The PDAs of each pattern, as returned by `create_pda`.
+        :param parse_tree: The parse tree to match against the patterns.
+        :param stop_at_first: A boolean indicating whether to stop matching a pattern after its first match.
+        :return: One MatchSet per pattern, in the order of patterns.
+        """
+        matcher = MultiMatcher(patterns, parse_tree, deduplicate, tree_index, anchored, subpattern_memo, strategy,
+                               lean, events, histogram, histogram_key)
+        logger.debug(f"Starting match of {len(patterns)} patterns")
+        matcher.start()
+        matcher.run(stop_at_first, max_steps, max_configurations, max_seconds)
+        logger.debug(f"Match finished in {matcher.n_step} steps")
+        return matcher.match_sets
+
+    def run(self, stop_at_first=False, max_steps=None, max_configurations=None, max_seconds=None) -> list[MatchSet]:
+        """
+        Steps the matcher until there are no more configurations to explore, or until a budget is exceeded (see
+        `Matcher.run`). In the latter case, the match sets of the patterns that are not finished are marked
+        BUDGET_EXCEEDED.
+
+        :param stop_at_first: A boolean indicating whether to stop matching a pattern after its first match.
+        :return: The match sets of the patterns.
+        """
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        configurations = self.configurations
+        while len(configurations) > 0:
+            self.step(stop_at_first)
+            if len(configurations) == 0 or len(self._finished) == len(self.lanes):
+                break
+            exceeded = exceeded_budget(self.n_step, len(configurations), deadline, max_steps, max_configurations)
+            if exceeded is not None:
+                logger.warning(f"Match stopped after {self.n_step} steps: {exceeded} budget exceeded")
+                for pattern, match_set in enumerate(self.match_sets):
+                    if pattern not in self._finished:
+                        match_set.status = BUDGET_EXCEEDED
+                        match_set.exceeded = exceeded
+                break
+        return self.match_sets
+
+    def members(self, state_id) -> tuple:
+        """
+        Members of a merged state: the (pattern id, state) pairs of the states of the patterns' PDAs it stands for.
+        """
+        return self._states[state_id]
+
+    def start(self):
+        initial = tuple((pattern, lane.compiled.initial_state) for pattern, lane in enumerate(self.lanes)
+                        if lane.reaches_anchors(lane.compiled.initial_state, self.root_id))
+        if not initial:
+            return self
+        bindings = (None,) * len(self.variables)
+        self._push((self._state_id(initial), self.root_id, EMPTY_STACK, bindings, None))
+        return self
+
+    def step(self, stop_at_first=False):
+        if len(self.configurations) == 0:
+            raise Warning("No more configurations to process")
+        state_id, current_id, stack, var, path = self.configurations.pop()
+        members = self._states[state_id]
+        index = self.tree_index
+        current_node = index.nodes[current_id]
+        if self._on_step is not None:
+            self._on_step((STEP, self.n_step, state_id, current_id, stack))
+
+        for member, (pattern, state) in enumerate(members):
+            if state == self.lanes[pattern].compiled.final_state and pattern not in self._finished:
+                self._record(pattern, member, var, path)
+                if self._on_match is not None:
+                    self._on_match((MATCH, self.n_step, state_id, current_id, self.match_sets[pattern].count()))
+                if stop_at_first:
+                    self._finished.add(pattern)
+        if self._finished and all(pattern in self._finished for pattern, _ in members):
+            self.n_step += 1
+            return self
+
+        text = index.texts[current_id]
+        if text is None:
+            key = self._class_keys[index.class_id[current_id]]
+        else:
+            key = self._node_key(None, text)
+
+        for edge in self._get_edges(state_id, key):
+            if edge.pattern is not None and edge.pattern in self._finished:
+                continue
+            if (stack >> edge.alpha_length) == 0 or (stack & ((1 << edge.alpha_length) - 1)) != edge.alpha_bits:
+                continue
+            kind, condition = edge.kind, edge.condition
+
+            if kind == ANY_NODE:
+                new_vars = [var]
+            elif kind == BOUNDED_NODE:
+                if not condition.down <= index.child_count[current_id] <= condition.up:
+                    continue
+                new_vars = [var]
+            elif kind == NAMED:
+                slot = self.slots[condition.name]
+                bound = var[slot]
+                if bound is None:
+                    new_vars = [bind(var, slot, current_node)]
+                elif self.lanes[edge.pattern].match_tree(bound, current_node):
+                    new_vars = [var]
+                else:
+                    continue
+            else:
+                new_vars = self.lanes[edge.pattern].call_subpattern(condition, current_node, var)
+                if len(new_vars) < 1:
+                    continue
+
+            next_node = self._navigator.next_node(current_id, edge.navigation)
+            if next_node == NO_NODE:
+                continue
+            edge = self._restrict(edge, next_node)
+            if edge is None:
+                continue
+            if self._on_transition is not None:
+                self._on_transition((TRANSITION, self.n_step, state_id, current_id, edge.target, next_node))
+
+            new_stack = ((stack >> edge.alpha_length) << edge.beta_length) | edge.beta_bits
+            new_path = None if self.lean else (edge, current_node, path)
+            for variables in new_vars:
+                self._push((edge.target, next_node, new_stack, variables, new_path))
+
+        self.n_step += 1
+        return self
+
+    def _push(self, config):
+        if self.deduplicate:
+            key = configuration_key(*config[:4])
+            if key in self._visited:
+                return
+            self._visited.add(key)
+        self.configurations.append(config)
+
+    def _restrict(self, edge: _MergedEdge, node_id: int) -> _MergedEdge | None:
+        """
+        Drop from the target of an edge the members that cannot reach the anchors of their pattern from node_id (see
+        `Matcher._push`).
+        :return: the edge to take, whose target only has the remaining members, or None if no member remains
+        """
+        anchored = self._anchored_members[edge.target]
+        if not anchored:
+            return edge
+        dropped = tuple(member for member, lane, state in anchored if not lane.reaches_anchors(state, node_id))
+        if not dropped:
+            return edge
+        members = self._states[edge.target]
+        if len(dropped) == len(members):
+            return None
+        restricted = self._restricted_edges.get((edge, dropped))
+        if restricted is None:
+            kept = [member for member in range(len(members)) if member not in dropped]
+            restricted = _MergedEdge(edge.kind, edge.condition, edge.alpha_bits, edge.alpha_length, edge.navigation,
+                                     edge.beta_bits, edge.beta_length, edge.pattern)
+            restricted.target = self._state_id(tuple(members[member] for member in kept))
+            restricted.sources = tuple(edge.sources[member] for member in kept)
+            restricted.transitions = tuple(edge.transitions[member] for member in kept)
+            self._restricted_edges[(edge, dropped)] = restricted
+        return restricted
+
+    def _record(self, pattern, member, var, path):
+        matches = None
+        if not self.lean:
+            matches = []
+            while path is not None:
+                edge, node, path = path
+                matches.append((edge.transitions[member], node))
+                member = edge.sources[member]
+            matches.reverse()
+        self.lanes[pattern].record_match(var, matches, self.n_step)
+
+    def _node_key(self, class_name, text):
+        if text is not None:
+            symbol = self._symbols.get(text)
+            return OTHER if symbol is None else terminal_key(symbol)
+        return self._symbols.get(class_name, OTHER)
+
+    def _lane_key(self, lane, key):
+        if key == OTHER:
+            return OTHER
+        if key >= 0:
+            return lane.compiled.node_key(self._names[key], None)
+        return lane.compiled.node_key(None, self._names[-2 - key])
+
+    def _state_id(self, members: tuple) -> int:
+        state_id = self._state_ids.get(members)
+        if state_id is None:
+            state_id = len(self._states)
+            self._state_ids[members] = state_id
+            self._states.append(members)
+            anchored = []
+            distance = None
+            for member, (pattern, state) in enumerate(members):
+                lane = self.lanes[pattern]
+                if lane.in_anchor_prefix(state):
+                    anchored.append((member, lane, state))
+                member_distance = lane.compiled.distance_to_final.get(state)
+                if member_distance is not None and (distance is None or member_distance < distance):
+                    distance = member_distance
+            self._anchored_members.append(tuple(anchored))
+            if distance is not None:
+                self.distance_to_final[state_id] = distance
+        return state_id
+
+    def _get_edges(self, state_id, key):
+        edges = self._edges.get((state_id, key))
+        if edges is None:
+            edges = self._merge_edges(state_id, key)
+            self._edges[(state_id, key)] = edges
+        return edges
+
+    def _merge_edges(self, state_id, key) -> tuple:
+        edges = {}
+        targets = {}
+        for member, (pattern, state) in enumerate(self._states[state_id]):
+            lane = self.lanes[pattern]
+            if state == lane.compiled.final_state:
+                continue
+            for kind, condition, alpha_bits, alpha_length, navigation, q_prime, beta_bits, beta_length, transition in \
+                    lane.compiled.get_transitions(state, self._lane_key(lane, key)):
+                if kind in (ANY_NODE, BOUNDED_NODE):
+                    bounds = (condition.down, condition.up) if kind == BOUNDED_NODE else None
+                    label = (kind, bounds, alpha_bits, alpha_length, navigation, beta_bits, beta_length)
+                    edge_pattern = None
+                else:
+                    label = (kind, pattern, id(condition), alpha_bits, alpha_length, navigation, beta_bits,
+                             beta_length)
+                    edge_pattern = pattern
+                edge = edges.get(label)
+                if edge is None:
+                    edge = _MergedEdge(kind, condition, alpha_bits, alpha_length, navigation, beta_bits, beta_length,
+                                       edge_pattern)
+                    edges[label] = edge
+                    targets[label] = []
+                targets[label].append((pattern, q_prime))
+                edge.sources.append(member)
+                edge.transitions.append(transition)
+
+        for label, edge in edges.items():
+            edge.target = self._state_id(tuple(targets[label]))
+            edge.sources = tuple(edge.sources)
+            edge.transitions = tuple(edge.transitions)
+        return tuple(edges.values())
@@ -0,0 +1,108 @@
+"""
+Structured event stream of the Matcher.
+
+Unlike listeners, which are called with live ANTLR objects on every step, events are small tuples of ints written into
+a fixed-size ring buffer. Only the kinds of events subscribed to are built. Each event starts with its kind and the
+step of the matcher that produced it:
+    - (STEP, step, state, node_id, stack): a configuration is explored (stack is integer encoded, see `pda.stack`)
+    - (TRANSITION, step, state, node_id, q_prime, next_node_id): a transition is taken
+    - (MATCH, step, state, node_id, n_matches): a match is found, n_matches is the number of matches found so far
+    - (CALL, step, node_id, memo_hit, n_sub_matches): a sub-pattern is called on a node, memo_hit is 1 if the result
+      came from the memo table (see `SubpatternMemo`)
+Node ids are the ones of the `TreeIndex` of the matcher.
+
+When the ring is full, the oldest events are overwritten, unless a spill file is given: the ring is then written to it
+before being reused, so that no event is lost (see `read_events`).
+"""
+from collections import deque
+from typing import Iterable, Iterator, TextIO
+
+STEP = 0
+TRANSITION = 1
+MATCH = 2
+CALL = 3
+
+EVENT_KINDS = (STEP, TRANSITION, MATCH, CALL)
+EVENT_NAMES = ("step", "transition", "match", "call")
+
+
+class EventBuffer:
+    """
+    Ring buffer of the events of the kinds subscribed to.
+    `n_events` counts all the events emitted, `n_spilled` the ones written to the spill file and `dropped` the ones
+    overwritten.
+    """
+
+    def __init__(self, capacity: int = 65536, kinds: Iterable[int] = EVENT_KINDS, spill: TextIO = None):
+        """
+        :param capacity: maximum number of events kept in memory
+        :param kinds: kinds of events to record, among EVENT_KINDS
+        :param spill: optional text file the events are written to when the ring is full, one event per line
+        """
+        if capacity < 1:
+            raise ValueError(f"Event buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.kinds = frozenset(kinds)
+        unknown = self.kinds.difference(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kinds: {sorted(unknown)}")
+        self.spill = spill
+        self.n_events = 0
+        self.n_spilled = 0
+        self._ring = deque(maxlen=capacity)
+
+    def writer(self, kind: int):
+        """
+        Get the function to call to emit an event of the given kind, or None if this kind is not subscribed to.
+        Producers keep the result so that unsubscribed events cost a single None check and are never built.
+        """
+        return self.emit if kind in self.kinds else None
+
+    def emit(self, event: tuple):
+        ring = self._ring
+        if self.spill is not None and len(ring) == self.capacity:
+            self.flush()
+        ring.append(event)
+        self.n_events += 1
+
+    def flush(self):
+        """
+        Write the events in memory to the spill file and empty the ring. Does nothing without a spill file.
+        """
+        if self.spill is None:
+            return
+        self.spill.write("".join(" ".join(map(str, event)) + "\n" for event in self._ring))
+        self.n_spilled += len(self._ring)
+        self._ring.clear()
+
+    @property
+    def dropped(self) -> int:
+        return self.n_events - self.n_spilled - len(self._ring)
+
+    def of_kind(self, kind: int) -> Iterator[tuple]:
+        """
+        Iterate over the events of the given kind still in memory, oldest first.
+        """
+        return (event for event in self._ring if event[0] == kind)
+
+    def __iter__(self):
+        return iter(self._ring)
+
+    def __len__(self):
+        return len(self._ring)
+
+    def __repr__(self):
+        kinds = ", ".join(EVENT_NAMES[kind] for kind in sorted(self.kinds))
+        return (f"EventBuffer(kinds=[{kinds}], events={self.n_events}, in memory={len(self._ring)}, "
+                f"spilled={self.n_spilled}, dropped={self.dropped})")
+
+
+def read_events(spill: TextIO) -> Iterator[tuple]:
+    """
+    Read back the events written to a spill file.
+    :param spill: the spill file, opened for reading
+    :return: the events, in the order they were emitted
+    """
+    for line in spill:
+        if line.strip():
+            yield tuple(map(int, line.split()))
@@ -0,0 +1,75 @@
+"""
+Exploration strategies of the Matcher.
+
+The frontier holds the configurations that are still to be explored. Its order decides which part of the search
+space is explored first; it does not change the set of matches found by a complete run, only their order and the
+number of steps before the first one (see `Matcher.match` with stop_at_first).
+    - "dfs": depth-first, the last configuration pushed is explored first (the historical behaviour)
+    - "bfs": breadth-first, configurations are explored in the order they were pushed
+    - "best": best-first, the configuration whose state is the closest to the final state (see
+      `CompiledPDA.distance_to_final`) is explored first, depth-first among equally close ones
+"""
+import heapq
+from collections import deque
+
+from .pda.compiled import CompiledPDA
+
+
+class Frontier:
+    """
+    Interface of a frontier: configurations are added with `append` and removed with `pop`.
+    """
+
+    def append(self, config):
+        raise NotImplementedError
+
+    def pop(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class DepthFirstFrontier(list, Frontier):
+    pass
+
+
+class BreadthFirstFrontier(deque, Frontier):
+    def pop(self):
+        return self.popleft()
+
+
+class BestFirstFrontier(Frontier):
+    def __init__(self, compiled: CompiledPDA):
+        self._distances = compiled.distance_to_final
+        self._heap = []
+        self._counter = 0
+
+    def append(self, config):
+        self._counter += 1
+        heapq.heappush(self._heap, (self._distances.get(config[0], len(self._distances)), -self._counter, config))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+STRATEGIES = ("dfs", "bfs", "best")
+
+
+def make_frontier(strategy: str, compiled: CompiledPDA) -> Frontier:
+    """
+    Create an empty frontier for the given strategy.
+    :param strategy: one of STRATEGIES
+    :param compiled: the compiled PDA being simulated
+    :return: the frontier
+    """
+    if strategy == "dfs":
+        return DepthFirstFrontier()
+    if strategy == "bfs":
+        return BreadthFirstFrontier()
+    if strategy == "best":
+        return BestFirstFrontier(compiled)
+    raise ValueError(f"Unknown exploration strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
@@ -0,0 +1,167 @@
+"""
+Incremental matching of a file edited over time, over the trees of `language_processors.incremental`, where the
+top-level statements that were not edited are the same objects from one version of the tree to the next.
+
+The search inside a top-level statement only depends on the statement and on the configuration entering it: its
+state, its node and stack relative to the statement, and its bindings. What such a configuration leads to inside the
+statement, the configurations leaving it and the final ones, is summarized once and replayed at each later match of
+the same PDAs, until the statement is edited. The matches are the ones of `Matcher`, possibly in another order.
+"""
+from dataclasses import dataclass
+
+from antlr4.tree.Tree import Tree
+
+from .Matcher import Matcher
+from .pda.PDA import PDA
+from .tree_index import NO_NODE
+from ..pytternfsm.python.match_set import MatchSet, path_to_list
+
+# Node of the configurations leaving the statement of a _StatementMatcher
+_EXIT = -2
+
+
+@dataclass
+class StatementSummary:
+    """
+    What a configuration entering a top-level statement leads to inside it. Exits are (state, directions, stack,
+    bindings, path) where directions are the rest of the navigation from the statement itself, finals are (state,
+    node, stack, bindings, path) where node is relative to the statement, and paths are the lists of (Transition,
+    node) taken inside the statement.
+    """
+    entry_bindings: tuple
+    exits: list
+    finals: list
+    n_step: int
+
+
+class IncrementalMatcher(Matcher):
+    """
+    Matcher reusing the summaries of the top-level statements it enters, kept in summaries from one run to the next:
+    {id(statement): (statement, {entry key: StatementSummary})}. Summaries of statements that are not in the tree
+    anymore are dropped. The configurations are explored depth first, without listeners, events nor lean mode.
+    `n_reused` is the number of steps replayed from the summaries of previous runs.
+    """
+
+    def __init__(self, pdas: dict[str, PDA], parse_tree: Tree, summaries: dict, deduplicate=False, anchored=True):
+        super().__init__(pdas, parse_tree, deduplicate, anchored=anchored)
+        index = self.tree_index
+        statements = set()
+        child = index.first_child[self.root_id]
+        while child != NO_NODE:
+            statements.add(id(index.nodes[child]))
+            child = index.next_sibling[child]
+        for key in [key for key in summaries if key not in statements]:
+            del summaries[key]
+        self.summaries = summaries
+        self.n_reused = 0
+
+    def step(self):
+        state, node, _, _, _ = config = self.configurations[-1]
+        parent = self.tree_index.parent
+        if state != self.compiled.final_state and node != self.root_id and parent[node] != self.root_id:
+            self.configurations.pop()
+            self._enter(config)
+            return self
+        return super().step()
+
+    def _enter(self, config):
+        state, node, stack, variables, path = config
+        index = self.tree_index
+        statement = node
+        while index.parent[statement] != self.root_id:
+            statement = index.parent[statement]
+        statement_node = index.nodes[statement]
+        summaries = self.summaries.setdefault(id(statement_node), (statement_node, {}))[1]
+        key = (state, node - statement, stack, tuple(map(id, variables)))
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = _StatementMatcher(self, statement).summarize(config)
+        else:
+            self.n_reused += summary.n_step
+        self.n_step += summary.n_step
+
+        for q, directions, new_stack, new_variables, segment in summary.exits:
+            next_node = self.next_node(statement, directions)
+            if next_node != NO_NODE:
+                self._push((q, next_node, new_stack, new_variables, _extend(path, segment)))
+        for q, offset, new_stack, new_variables, segment in summary.finals:
+            self._push((q, statement + offset, new_stack, new_variables, _extend(path, segment)))
+
+
+class _StatementMatcher(Matcher):
+    """
+    Matcher confined to a top-level statement of the tree of an IncrementalMatcher, whose configurations leaving the
+    statement and final configurations are collected instead of being explored.
+    """
+
+    def __init__(self, matcher: IncrementalMatcher, statement: int):
+        super().__init__(matcher.callable, matcher.parse_tree, matcher.deduplicate, matcher.tree_index,
+                         matcher.subpattern_memo, anchored=False)
+        self._anchors = matcher._anchors
+        self.use_slots(matcher.variables, matcher.slots)
+        self.statement = statement
+        self.exits = []
+        self.finals = []
+        self._directions = ()
+
+    def summarize(self, config) -> StatementSummary:
+        state, node, stack, variables, _ = config
+        self._push((state, node, stack, variables, None))
+        self.run()
+        return StatementSummary(variables, self.exits, self.finals, self.n_step)
+
+    def next_node(self, node_id, directions):
+        for position, direction in enumerate(directions):
+            node_id = super().next_node(node_id, (direction,))
+            if node_id == NO_NODE:
+                return NO_NODE
+            if node_id == self.statement:
+                self._directions = directions[position + 1:]
+                return _EXIT
+        return node_id
+
+    def _push(self, config):
+        state, node, stack, variables, path = config
+        if node == _EXIT:
+            self.exits.append((state, self._directions, stack, variables, path_to_list(path)))
+        elif state == self.compiled.final_state:
+            self.finals.append((state, node - self.statement, stack, variables, path_to_list(path)))
+        else:
+            super()._push(config)
+
+
+def _extend(path, segment: list):
+    for transition, node in segment:
+        path = (transition, node, path)
+    return path
+
+
+class IncrementalMatches:
+    """
+    Match state of a file edited over time: the statement summaries and the last MatchSet of each PDAs matched with
+    `match`, which is returned again as long as the tree is the same.
+    """
+
+    def __init__(self):
+        self._by_pdas = {}
+        self.n_step = 0
+        self.n_reused = 0
+
+    def match(self, pdas: dict[str, PDA], parse_tree: Tree, deduplicate=False) -> MatchSet:
+        """
+        Match a version of the tree of the file with PDAs, see `IncrementalMatcher`. `n_step` and `n_reused` are the
+        steps of this match and the ones replayed from previous matches.
+        """
+        key = (id(pdas), deduplicate)
+        state = self._by_pdas.get(key)
+        if state is None:
+            state = self._by_pdas[key] = [pdas, {}, None, None]
+        _, summaries, last_tree, last_match_set = state
+        if last_tree is parse_tree:
+            self.n_step, self.n_reused = 0, 0
+            return last_match_set
+        matcher = IncrementalMatcher(pdas, parse_tree, summaries, deduplicate)
+        matcher.start().run()
+        self.n_step, self.n_reused = matcher.n_step, matcher.n_reused
+        state[2], state[3] = parse_tree, matcher.match_set
+        return matcher.match_set
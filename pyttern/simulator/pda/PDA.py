@@ -11,6 +11,7 @@ class PDAEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, PDA):
             json_object = o.__dict__.copy()
+            json_object.pop("version", None)
             for elem in json_object:
                 if isinstance(json_object[elem], set):
                     json_object[elem] = list(json_object[elem])
@@ -32,6 +33,9 @@ class PDA:
         - δ is the transition set
         - q0 is the initial state
         - qf is the final states
+
+    `version` is incremented by every change of the PDA, so that its compiled form can tell it is stale (see
+    `CompiledPDA`). Code changing `states` or `transitions` directly must call `changed`.
     """
 
     states: set[int] = field(default_factory=lambda: {0})
@@ -39,11 +43,16 @@ class PDA:
     transitions: dict[int, list[Transition]] = field(default_factory=lambda: {0: []})
     initial_state: int = 0
     final_states: int = 0
+    version: int = field(default=0, init=False, repr=False, compare=False)
+
+    def changed(self) -> None:
+        self.version += 1
 
     def new_state(self) -> int:
         new_state = len(self.states)
         self.states.add(new_state)
         self.transitions[new_state] = []
+        self.changed()
         return new_state
 
     def last_state(self) -> int:
@@ -55,6 +64,7 @@ class PDA:
             raise ValueError("State not in the PDA")
         if transition not in self.transitions[current_state]:
             self.transitions[current_state].append(transition)
+            self.changed()
         else:
             logger.warning(f"Transition {transition} already exists in state {current_state}")
 
@@ -0,0 +1,183 @@
+import math
+import weakref
+from collections import deque
+
+from .PDA import PDA
+from .requirements import required_symbols, anchors
+from .stack import encode_word
+from .transition import NodeTransition, NamedTransition, CallTransition
+
+# Kind of the condition of a compiled transition
+ANY_NODE = 0  # NodeTransition('') or a NodeTransition already selected by the dispatch key
+BOUNDED_NODE = 1  # NodeTransition on a rule node, the number of children still has to be checked
+NAMED = 2
+CALL = 3
+
+# Dispatch key of the nodes whose class or text is never mentioned by the PDA
+OTHER = -1
+
+
+def terminal_key(symbol: int) -> int:
+    return -2 - symbol
+
+
+class CompiledPDA:
+    """
+    Frozen runtime form of a `PDA`, used by the `Matcher`.
+
+    Rule-context class names and terminal texts mentioned by NodeTransitions are interned to small ints (`symbols`).
+    A node is then summarized by a dispatch key: the symbol of its class for rule nodes, `terminal_key(symbol)` of its
+    text for terminal nodes, or OTHER if the PDA never mentions it. For each state, `dispatch[state]` maps every key to
+    the tuple of transitions that can fire on such a node, in the order of `PDA.get_transitions(state)`: wildcard
+    NodeTransitions, NamedTransitions and CallTransitions are in every bucket, exact NodeTransitions only in the bucket
+    of their name.
+
+    Each compiled transition is a tuple (kind, condition, alpha_bits, alpha_length, navigation, q_prime, beta_bits,
+    beta_length, transition) where bits and lengths are the integer encoding of the stack words (see `stack`).
+
+    The variables of the PDA are numbered (`slots`): the named wildcards, in alphabetical order, then the arguments of
+    sub-pattern calls that are not named wildcards. The Matcher represents the bindings of a configuration by a tuple
+    indexed by these slots.
+    """
+
+    def __init__(self, pda: PDA):
+        self.pda = pda
+        self.initial_state = pda.initial_state
+        self.final_state = pda.final_states
+        self.named_wildcards = tuple(sorted(pda.named_wildcards))
+        variables = dict.fromkeys(self.named_wildcards)
+        for transitions in pda.transitions.values():
+            for transition in transitions:
+                if isinstance(transition.A, CallTransition):
+                    variables.update(dict.fromkeys(transition.A.args))
+        self.variables = tuple(variables)
+        self.slots = {name: slot for slot, name in enumerate(self.variables)}
+        self.symbols = {}
+        self.dispatch = {}
+        self._required_symbols = None
+        self._anchors = None
+        self._distance_to_final = None
+        self._version = pda.version
+
+        for transitions in pda.transitions.values():
+            for transition in transitions:
+                condition = transition.A
+                if isinstance(condition, NodeTransition) and condition.name != "":
+                    self.symbols.setdefault(condition.name, len(self.symbols))
+
+        for state, transitions in pda.transitions.items():
+            self.dispatch[state] = self._compile_state(transitions)
+
+    @staticmethod
+    def of(pda: PDA) -> "CompiledPDA":
+        """
+        Return the compiled form of a PDA. Compiled PDAs are cached as long as the PDA is alive and unchanged.
+        """
+        cached = _cache.get(id(pda))
+        if cached is not None:
+            reference, compiled = cached
+            if reference() is pda and compiled.is_up_to_date():
+                return compiled
+        compiled = CompiledPDA(pda)
+        key = id(pda)
+        _cache[key] = (weakref.ref(pda, lambda _: _cache.pop(key, None)), compiled)
+        return compiled
+
+    def is_up_to_date(self) -> bool:
+        return self._version == self.pda.version
+
+    @property
+    def required_symbols(self) -> frozenset[str]:
+        """
+        Class names and terminal texts that label at least one node of every tree matched by the PDA.
+        """
+        if self._required_symbols is None:
+            self._required_symbols = required_symbols(self.pda)
+        return self._required_symbols
+
+    @property
+    def anchors(self) -> dict[str, frozenset[int]]:
+        """
+        Required names that can anchor a match, with the states of the prefix before them (see `requirements`).
+        """
+        if self._anchors is None:
+            self._anchors = anchors(self.pda)
+        return self._anchors
+
+    @property
+    def distance_to_final(self) -> dict[int, int]:
+        """
+        Minimal number of transitions from each state to the final state, ignoring conditions and the stack.
+        States from which the final state cannot be reached are absent.
+        """
+        if self._distance_to_final is None:
+            predecessors = {}
+            for transitions in self.pda.transitions.values():
+                for transition in transitions:
+                    predecessors.setdefault(transition.q_prime, []).append(transition.q)
+            distances = {self.final_state: 0}
+            to_visit = deque([self.final_state])
+            while to_visit:
+                state = to_visit.popleft()
+                for previous in predecessors.get(state, ()):
+                    if previous not in distances:
+                        distances[previous] = distances[state] + 1
+                        to_visit.append(previous)
+            self._distance_to_final = distances
+        return self._distance_to_final
+
+    def node_key(self, class_name: str | None, text: str | None) -> int:
+        """
+        Dispatch key of a node, given its class name (rule nodes) or its text (terminal nodes).
+        """
+        if text is not None:
+            symbol = self.symbols.get(text)
+            return OTHER if symbol is None else terminal_key(symbol)
+        return self.symbols.get(class_name, OTHER)
+
+    def get_transitions(self, state: int, key: int) -> tuple:
+        buckets = self.dispatch[state]
+        return buckets.get(key, buckets[OTHER])
+
+    def _compile_state(self, transitions) -> dict[int, tuple]:
+        names = {transition.A.name for transition in transitions
+                 if isinstance(transition.A, NodeTransition) and transition.A.name != ""}
+        keys = [OTHER]
+        for name in names:
+            keys.append(self.symbols[name])
+            keys.append(terminal_key(self.symbols[name]))
+
+        buckets = {}
+        for key in keys:
+            bucket = []
+            for transition in transitions:
+                kind = self._kind(transition.A, key)
+                if kind is None:
+                    continue
+                alpha_bits, alpha_length = encode_word(transition.alpha)
+                beta_bits, beta_length = encode_word(transition.beta)
+                bucket.append((kind, transition.A, alpha_bits, alpha_length, tuple(transition.t), transition.q_prime,
+                               beta_bits, beta_length, transition))
+            buckets[key] = tuple(bucket)
+        return buckets
+
+    def _kind(self, condition, key: int) -> int | None:
+        if isinstance(condition, NodeTransition):
+            if condition.name == "":
+                return ANY_NODE
+            symbol = self.symbols[condition.name]
+            if key == symbol:
+                if condition.down == 0 and condition.up == math.inf:
+                    return ANY_NODE
+                return BOUNDED_NODE
+            if key == terminal_key(symbol):
+                return ANY_NODE
+            return None
+        if isinstance(condition, NamedTransition):
+            return NAMED
+        if isinstance(condition, CallTransition):
+            return CALL
+        raise ValueError(f"Unknown transition type: {condition} ({type(condition)})")
+
+
+_cache: dict[int, tuple[weakref.ref, CompiledPDA]] = {}
@@ -0,0 +1,194 @@
+"""
+Optimization pass over the PDAs built by `Generic_to_PDA`.
+
+The builder emits many epsilon transitions (a NodeTransition('') without navigation nor stack operation) to connect
+its intermediate states, and each of them costs the matcher a step and a configuration. The pass rewrites a PDA
+without changing its matches:
+    - useless states, that cannot be reached from the initial state or cannot reach the final state, are removed with
+      their transitions
+    - an epsilon transition q -> r is replaced, at its position in the transitions of q, by copies of the transitions
+      of r starting from q
+    - equivalent states, whose transitions are the same in the same order up to equivalent targets, are merged, so
+      that identical skip loops are explored once
+    - states are renumbered densely, in breadth-first order from the initial state
+Every accepting path of the original PDA maps to exactly one accepting path of the optimized PDA, with the same
+bindings, so the number of matches and their bindings are preserved. Identical transitions are therefore never
+deduplicated: each one is a distinct path. Only the transition paths of matches (`Match.matches`) get shorter.
+"""
+from dataclasses import dataclass, replace
+
+from loguru import logger
+
+from .PDA import PDA
+from .transition import NodeTransition, Transition
+
+
+@dataclass
+class OptimizationStats:
+    states_before: int
+    transitions_before: int
+    states_after: int
+    transitions_after: int
+
+    def __str__(self):
+        return (f"{self.states_before} states, {self.transitions_before} transitions -> "
+                f"{self.states_after} states, {self.transitions_after} transitions")
+
+
+def optimize(pda: PDA) -> OptimizationStats:
+    """
+    Optimize a PDA in place.
+    :param pda: the PDA to optimize
+    :return: the number of states and transitions before and after the optimization
+    """
+    states_before, transitions_before = len(pda.states), _count_transitions(pda)
+    _remove_useless_states(pda)
+    _collapse_epsilons(pda)
+    _remove_useless_states(pda)
+    _merge_equivalent_states(pda)
+    _renumber(pda)
+    pda.changed()
+    stats = OptimizationStats(states_before, transitions_before, len(pda.states), _count_transitions(pda))
+    logger.debug(f"Optimized PDA: {stats}")
+    return stats
+
+
+def optimize_all(pdas: dict) -> dict:
+    """
+    Optimize in place every PDA of the result of `create_pda`, including the PDAs of the sub-patterns it calls.
+    :param pdas: a dictionary of PDAs, or of such dictionaries for sub-pattern transformations
+    :return: pdas
+    """
+    seen = set()
+    to_visit = [pdas]
+    while to_visit:
+        value = to_visit.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, PDA):
+            optimize(value)
+        elif isinstance(value, dict):
+            to_visit.extend(value.values())
+    return pdas
+
+
+def is_epsilon(transition: Transition) -> bool:
+    condition = transition.A
+    return (isinstance(condition, NodeTransition) and condition.name == "" and not transition.t
+            and not transition.alpha and not transition.beta)
+
+
+def _count_transitions(pda: PDA) -> int:
+    return sum(len(transitions) for transitions in pda.transitions.values())
+
+
+def _remove_useless_states(pda: PDA):
+    predecessors = {}
+    for transitions in pda.transitions.values():
+        for transition in transitions:
+            predecessors.setdefault(transition.q_prime, []).append(transition.q)
+    reachable = _closure(pda.initial_state, lambda state: (t.q_prime for t in pda.transitions[state]))
+    co_reachable = _closure(pda.final_states, lambda state: predecessors.get(state, ()))
+    useful = (reachable & co_reachable) | {pda.initial_state, pda.final_states}
+
+    pda.transitions = {state: [transition for transition in transitions if transition.q_prime in useful]
+                       for state, transitions in pda.transitions.items() if state in useful}
+    pda.states = useful
+
+
+def _closure(start: int, successors) -> set[int]:
+    seen = {start}
+    to_visit = [start]
+    while to_visit:
+        for state in successors(to_visit.pop()):
+            if state not in seen:
+                seen.add(state)
+                to_visit.append(state)
+    return seen
+
+
+def _collapse_epsilons(pda: PDA):
+    """
+    Inline the epsilon transitions whose target has no epsilon transition itself, until there is none left. Epsilon
+    cycles, which the matcher could not run anyway, are left as they are.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for state, transitions in pda.transitions.items():
+            if not any(_can_inline(pda, state, transition) for transition in transitions):
+                continue
+            inlined = []
+            for transition in transitions:
+                if _can_inline(pda, state, transition):
+                    inlined.extend(replace(target_transition, q=state)
+                                   for target_transition in pda.transitions[transition.q_prime])
+                else:
+                    inlined.append(transition)
+            pda.transitions[state] = inlined
+            changed = True
+
+
+def _can_inline(pda: PDA, state: int, transition: Transition) -> bool:
+    target = transition.q_prime
+    return (is_epsilon(transition) and target != state and target != pda.final_states
+            and not any(is_epsilon(target_transition) for target_transition in pda.transitions[target]))
+
+
+def _merge_equivalent_states(pda: PDA):
+    """
+    Merge the states with the same transitions, in the same order, up to the equivalence of their targets. The
+    classes are refined from {final state, other states} until they are stable.
+    """
+    classes = {state: int(state == pda.final_states) for state in pda.transitions}
+    n_classes = len(set(classes.values()))
+    while True:
+        signatures = {}
+        refined = {}
+        for state, transitions in pda.transitions.items():
+            signature = (classes[state], tuple(_label(transition) + (classes[transition.q_prime],)
+                                               for transition in transitions))
+            refined[state] = signatures.setdefault(signature, len(signatures))
+        classes = refined
+        if len(signatures) == n_classes:
+            break
+        n_classes = len(signatures)
+
+    representatives = {}
+    for state in sorted(pda.transitions):
+        representatives.setdefault(classes[state], state)
+    merged = {state: representatives[classes[state]] for state in pda.transitions}
+    if len(representatives) == len(merged):
+        return
+
+    pda.transitions = {state: [replace(transition, q_prime=merged[transition.q_prime]) for transition in transitions]
+                       for state, transitions in pda.transitions.items() if merged[state] == state}
+    pda.states = set(pda.transitions)
+    pda.initial_state = merged[pda.initial_state]
+    pda.final_states = merged[pda.final_states]
+
+
+def _label(transition: Transition) -> tuple:
+    return str(transition.alpha), repr(transition.A), tuple(transition.t), str(transition.beta)
+
+
+def _renumber(pda: PDA):
+    order = [pda.initial_state]
+    numbers = {pda.initial_state: 0}
+    for state in order:
+        for transition in pda.transitions[state]:
+            if transition.q_prime not in numbers:
+                numbers[transition.q_prime] = len(order)
+                order.append(transition.q_prime)
+    for state in sorted(pda.transitions):
+        if state not in numbers:
+            numbers[state] = len(order)
+            order.append(state)
+
+    pda.transitions = {numbers[state]: [replace(transition, q=numbers[state], q_prime=numbers[transition.q_prime])
+                                        for transition in pda.transitions[state]]
+                       for state in order}
+    pda.states = set(range(len(order)))
+    pda.initial_state = numbers[pda.initial_state]
+    pda.final_states = numbers[pda.final_states]
@@ -0,0 +1,74 @@
+"""
+Static analysis of the node labels a PDA needs to reach its final state.
+
+A NodeTransition with a name only fires on a node of that class (rule nodes) or with that text (terminal nodes). If
+every path from the initial state to the final state goes through a NodeTransition named N, a tree without any node
+labelled N can never be matched. Such names are found by removing, for each candidate N, all the transitions on N
+and checking whether the final state is still reachable. The stack is ignored, which can only make more states
+reachable, so the result is sound: it may miss requirements, but never reports a name that is not required.
+
+A required name N is an anchor when the transitions taken before the first transition on N never go to a parent
+node. The states of this prefix are the ones reachable without taking a transition on N. From a configuration in
+such a state at node n, the node where N is matched is then in the subtree of n or of one of its next siblings, so the
+configuration can be dropped when no node labelled N is there (see `Matcher`).
+"""
+from .PDA import PDA
+from .PDA_alphabets import NavigationAlphabet
+from .transition import NodeTransition
+
+
+def required_symbols(pda: PDA) -> frozenset[str]:
+    """
+    Compute the NodeTransition names (rule class names or terminal texts) present on every accepting path of a PDA.
+    :param pda: the PDA to analyse
+    :return: the names that must label at least one node of any tree the PDA matches
+    """
+    names = {transition.A.name for transition in pda.get_transitions()
+             if isinstance(transition.A, NodeTransition) and transition.A.name != ""}
+    if not _is_reachable(pda, None):
+        return frozenset()
+    return frozenset(name for name in names if not _is_reachable(pda, name))
+
+
+def anchors(pda: PDA) -> dict[str, frozenset[int]]:
+    """
+    Find the required names of a PDA that can anchor its matches.
+    :param pda: the PDA to analyse
+    :return: for each anchor name, the states of the prefix before the first transition on this name
+    """
+    result = {}
+    for name in required_symbols(pda):
+        prefix = _reachable_states(pda, name)
+        if not any(NavigationAlphabet.PARENT in transition.t
+                   for state in prefix for transition in pda.get_transitions(state)
+                   if not _is_named(transition.A, name)):
+            result[name] = frozenset(prefix)
+    return result
+
+
+def _is_named(condition, name: str) -> bool:
+    return isinstance(condition, NodeTransition) and condition.name == name
+
+
+def _is_reachable(pda: PDA, excluded: str | None) -> bool:
+    """
+    Check if the final state is reachable from the initial state without taking a NodeTransition named excluded.
+    """
+    return pda.final_states in _reachable_states(pda, excluded)
+
+
+def _reachable_states(pda: PDA, excluded: str | None) -> set[int]:
+    """
+    Compute the states reachable from the initial state without taking a NodeTransition named excluded.
+    """
+    seen = {pda.initial_state}
+    to_visit = [pda.initial_state]
+    while to_visit:
+        state = to_visit.pop()
+        for transition in pda.get_transitions(state):
+            if _is_named(transition.A, excluded):
+                continue
+            if transition.q_prime not in seen:
+                seen.add(transition.q_prime)
+                to_visit.append(transition.q_prime)
+    return seen
@@ -0,0 +1,137 @@
+"""
+Serialization of compiled patterns: the dictionaries of PDAs returned by `create_pda`, with the main PDA under
+"__main__" and the dictionaries of PDAs of the sub-pattern transformations it calls under "name::transformation".
+
+The JSON form is the one of `PDAEncoder`, read back by `PDADecoder`. The binary form is smaller and faster to read:
+the marshal of nested tuples of the fields, after a header with the version of the format.
+"""
+import json
+import marshal
+
+from .PDA import PDA, PDAEncoder
+from .PDA_alphabets import NavigationAlphabet
+from .transition import Transition, NodeTransition, NamedTransition, CallTransition, NotCallTransition
+
+# Version of the binary format, in its header
+FORMAT_VERSION = 1
+_MAGIC = b"PYTPDA"
+_HEADER = _MAGIC + bytes([FORMAT_VERSION])
+
+# Tags of the conditions in the binary format
+_NODE, _NAMED, _CALL, _NOT_CALL = range(4)
+_DIRECTIONS = {direction.value: direction for direction in NavigationAlphabet}
+
+
+class PDADecoder(json.JSONDecoder):
+    """
+    Decoder of the JSON written with `PDAEncoder`: PDAs, transitions and conditions are decoded back to their
+    classes, and the other objects, such as the dictionaries of PDAs, to dictionaries.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(object_hook=self._decode_object, **kwargs)
+
+    @staticmethod
+    def _decode_object(o):
+        if "transitions" in o and "final_states" in o:
+            return PDA(set(o["states"]), set(o["named_wildcards"]),
+                       {int(state): transitions for state, transitions in o["transitions"].items()},
+                       o["initial_state"], o["final_states"])
+        if "q_prime" in o:
+            return Transition(o["q"], o["alpha"], o["A"], [NavigationAlphabet[name] for name in o["t"]],
+                              o["q_prime"], o["beta"])
+        kind = o.get("type")
+        if kind == "NodeTransition":
+            return NodeTransition(o["name"], _number(o["down"]), _number(o["up"]))
+        if kind == "NamedTransition":
+            return NamedTransition(o["name"])
+        if kind in ("CallTransition", "NotCallTransition"):
+            condition = NotCallTransition if kind == "NotCallTransition" else CallTransition
+            return condition(o["subpattern_name"], o["transformation_name"], list(o["args"]))
+        return o
+
+
+def _number(text: str):
+    # NodeTransition bounds are written as text, and can be infinite
+    number = float(text)
+    return int(number) if number.is_integer() else number
+
+
+def to_json(pdas: dict) -> str:
+    return json.dumps(pdas, cls=PDAEncoder)
+
+
+def from_json(text: str) -> dict:
+    return json.loads(text, cls=PDADecoder)
+
+
+def dumps(pdas: dict) -> bytes:
+    """
+    Binary form of a dictionary of PDAs.
+    """
+    return _HEADER + marshal.dumps(_pdas_to_tuple(pdas))
+
+
+def loads(data: bytes) -> dict:
+    """
+    Dictionary of PDAs of a binary form written by `dumps`.
+    :raises ValueError: if the data is not in the current binary format
+    """
+    if data[:len(_HEADER)] != _HEADER:
+        raise ValueError("Not a PDA of the current binary format")
+    try:
+        return _pdas_from_tuple(marshal.loads(data[len(_HEADER):]))
+    except (EOFError, TypeError) as e:
+        raise ValueError(f"Corrupted PDA: {e}") from e
+
+
+def _pdas_to_tuple(pdas: dict) -> tuple:
+    # Each entry is (name, True, PDA) or (name, False, nested dictionary of PDAs)
+    return tuple((name, True, _pda_to_tuple(value)) if isinstance(value, PDA)
+                 else (name, False, _pdas_to_tuple(value)) for name, value in pdas.items())
+
+
+def _pdas_from_tuple(entries: tuple) -> dict:
+    return {name: _pda_from_tuple(value) if is_pda else _pdas_from_tuple(value) for name, is_pda, value in entries}
+
+
+def _pda_to_tuple(pda: PDA) -> tuple:
+    transitions = tuple((state, tuple(_transition_to_tuple(transition) for transition in state_transitions))
+                        for state, state_transitions in pda.transitions.items())
+    return tuple(pda.states), tuple(sorted(pda.named_wildcards)), pda.initial_state, pda.final_states, transitions
+
+
+def _pda_from_tuple(fields: tuple) -> PDA:
+    states, named_wildcards, initial_state, final_states, transitions = fields
+    return PDA(set(states), set(named_wildcards),
+               {state: [_transition_from_tuple(transition) for transition in state_transitions]
+                for state, state_transitions in transitions},
+               initial_state, final_states)
+
+
+def _transition_to_tuple(transition: Transition) -> tuple:
+    condition = transition.A
+    if isinstance(condition, NodeTransition):
+        encoded = (_NODE, condition.name, condition.down, condition.up)
+    elif isinstance(condition, NamedTransition):
+        encoded = (_NAMED, condition.name)
+    elif isinstance(condition, CallTransition):
+        tag = _NOT_CALL if isinstance(condition, NotCallTransition) else _CALL
+        encoded = (tag, condition.subpattern_name, condition.transformation_name, tuple(condition.args))
+    else:
+        raise TypeError(f"Cannot serialize the condition {condition!r}")
+    return (transition.q, transition.alpha, encoded, tuple(direction.value for direction in transition.t),
+            transition.q_prime, transition.beta)
+
+
+def _transition_from_tuple(fields: tuple) -> Transition:
+    q, alpha, encoded, directions, q_prime, beta = fields
+    tag = encoded[0]
+    if tag == _NODE:
+        condition = NodeTransition(encoded[1], encoded[2], encoded[3])
+    elif tag == _NAMED:
+        condition = NamedTransition(encoded[1])
+    else:
+        condition = (NotCallTransition if tag == _NOT_CALL else CallTransition)(encoded[1], encoded[2],
+                                                                               list(encoded[3]))
+    return Transition(q, alpha, condition, [_DIRECTIONS[direction] for direction in directions], q_prime, beta)
@@ -0,0 +1,58 @@
+"""
+Integer encoding of the PDA stack.
+
+The stack alphabet only has two symbols (see `StackAlphabet`), so a stack is encoded as an integer where each symbol
+is one bit and the top of the stack is the least significant bit. A leading 1 bit marks the bottom of the stack, so
+`EMPTY_STACK` is 1 and the stack "IBI" is 0b1010. Pushing and popping a word are then a shift and an or, and
+checking the top of the stack is a mask, whatever the depth of the stack.
+"""
+from functools import lru_cache
+
+from .PDA_alphabets import StackAlphabet
+
+EMPTY_STACK = 1
+
+_BITS = {StackAlphabet.INDENT.value: 0, StackAlphabet.BODY.value: 1}
+_SYMBOLS = {bit: symbol for symbol, bit in _BITS.items()}
+
+
+@lru_cache(maxsize=None)
+def encode_word(word: str) -> tuple[int, int]:
+    """
+    Encode a word of stack symbols (as used in `Transition.alpha` and `Transition.beta`).
+    :param word: the symbols, the last one being the top of the stack
+    :return: a tuple (bits, length)
+    """
+    bits = 0
+    for symbol in word:
+        bits = (bits << 1) | _BITS[symbol]
+    return bits, len(word)
+
+
+def ends_with(stack: int, word: str) -> bool:
+    bits, length = encode_word(word)
+    return (stack >> length) > 0 and (stack & ((1 << length) - 1)) == bits
+
+
+def pop(stack: int, word: str) -> int:
+    return stack >> encode_word(word)[1]
+
+
+def push(stack: int, word: str) -> int:
+    bits, length = encode_word(word)
+    return (stack << length) | bits
+
+
+def encode(word: str) -> int:
+    return push(EMPTY_STACK, word)
+
+
+def decode(stack: int) -> str:
+    """
+    Decode an integer stack into its string representation (top of the stack last).
+    """
+    symbols = []
+    while stack > EMPTY_STACK:
+        symbols.append(_SYMBOLS[stack & 1])
+        stack >>= 1
+    return "".join(reversed(symbols))
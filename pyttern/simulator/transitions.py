@@ -1,6 +1,8 @@
 from antlr4.tree.Tree import TerminalNodeImpl
 from loguru import logger
 
+from .tree_index import TreeIndex
+
 
 class Transition:
     def __call__(self, node, variables):
@@ -110,7 +112,11 @@ class VarTransition(Transition):
             return True
 
         logger.debug(f"Comparing {variable} and {node}")
-        res = self.__compare_asts(variable, node)
+        index = TreeIndex.find(variable)
+        if index is not None and index is TreeIndex.find(node):
+            res = index.equal_subtrees(index.get_node_id(variable), index.get_node_id(node))
+        else:
+            res = self.__compare_asts(variable, node)
         logger.debug(f"Result: {res}")
         return res
 
@@ -0,0 +1,216 @@
+import zlib
+from array import array
+
+from antlr4.tree.Tree import TerminalNode, Tree
+
+NO_NODE = -1
+
+_HASH_MASK = (1 << 64) - 1
+_HASH_FACTOR = 0x100000001B3
+_NO_IDS = array('i')
+
+
+class TreeIndex:
+    """
+    Flattened, array-backed view of a (pruned) parse tree.
+
+    Every node gets an integer id in pre-order, so that the root is 0 and the nodes of a subtree have consecutive ids.
+    The structure of the tree is stored in parallel arrays indexed by node id, which lets the matcher navigate in O(1)
+    without calling `getChildren()` or allocating lists:
+        - parent, first_child, next_sibling: node ids, or NO_NODE
+        - child_count: number of children of the node
+        - class_id: index of the node class name in `class_names`
+        - label: interned label of the node, its class name for rule nodes and its text for terminal nodes
+    `texts` holds the text of terminal nodes and None for rule nodes.
+
+    `hashes` and `sizes` are computed on demand, bottom-up: the structural (Merkle) hash of a subtree combines the
+    label of its root with the hashes of its children, and is stable across processes. Two structurally equal subtrees
+    always have the same hash, so most comparisons of subtrees are answered by `equal_subtrees` in O(1).
+
+    The index is built once per tree and cached on its root, see `TreeIndex.of`.
+    """
+
+    def __init__(self, root: Tree):
+        self.root = root
+        self.nodes = []
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.child_count = array('i')
+        self.class_id = array('i')
+        self.label = array('i')
+        self.class_names = []
+        self.texts = []
+        self._class_ids = {}
+        self._labels = {}
+        self._ids = {}
+        self._hashes = None
+        self._sizes = None
+        self._symbols = None
+        self._ids_by_symbol = None
+        self._build()
+
+    @staticmethod
+    def of(tree: Tree) -> "TreeIndex":
+        """
+        Return the index of a tree, building it the first time it is needed.
+        :param tree: root of the tree to index
+        :return: the TreeIndex of the tree
+        """
+        index = getattr(tree, "tree_index", None)
+        if index is None or index.root is not tree:
+            index = TreeIndex(tree)
+            tree.tree_index = index
+        return index
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @staticmethod
+    def find(node: Tree) -> "TreeIndex | None":
+        """
+        Return the index of the tree containing node, if that tree was indexed.
+        """
+        while node is not None:
+            index = getattr(node, "tree_index", None)
+            if index is not None and index.root is node:
+                return index
+            node = getattr(node, "parentCtx", None)
+        return None
+
+    def node_id(self, node: Tree) -> int:
+        return self._ids[id(node)]
+
+    def get_node_id(self, node: Tree) -> int:
+        """
+        Return the id of node, or NO_NODE if it is not part of the indexed tree.
+        """
+        return self._ids.get(id(node), NO_NODE)
+
+    @property
+    def hashes(self) -> array:
+        if self._hashes is None:
+            self._compute_hashes()
+        return self._hashes
+
+    @property
+    def sizes(self) -> array:
+        if self._sizes is None:
+            self._compute_hashes()
+        return self._sizes
+
+    @property
+    def symbols(self) -> frozenset[str]:
+        """
+        Summary of the labels present in the tree: the class names of its nodes and the texts of its terminal nodes.
+        A pattern whose required symbols (see `CompiledPDA.required_symbols`) are not all in this set cannot match.
+        """
+        if self._symbols is None:
+            self._symbols = frozenset(self.class_names).union(text for text in self.texts if text is not None)
+        return self._symbols
+
+    def ids_of(self, symbol: str) -> array:
+        """
+        Ids of the nodes labelled symbol: the rule nodes of this class and the terminal nodes with this text.
+        :param symbol: a class name or a terminal text
+        :return: the ids, in increasing order (empty if there is no such node)
+        """
+        if self._ids_by_symbol is None:
+            ids_by_symbol = {}
+            texts, class_names, class_id = self.texts, self.class_names, self.class_id
+            for node_id, text in enumerate(texts):
+                if text is None:
+                    text = class_names[class_id[node_id]]
+                ids = ids_by_symbol.get(text)
+                if ids is None:
+                    ids = ids_by_symbol[text] = array('i')
+                ids.append(node_id)
+            self._ids_by_symbol = ids_by_symbol
+        return self._ids_by_symbol.get(symbol, _NO_IDS)
+
+    def equal_subtrees(self, node_id_1: int, node_id_2: int) -> bool:
+        """
+        Check if the subtrees rooted at two nodes are structurally equal (same labels and same shape).
+        The hashes and sizes are compared first; the full comparison is only needed when they are equal.
+        """
+        if node_id_1 == node_id_2:
+            return True
+        hashes, sizes = self.hashes, self.sizes
+        if hashes[node_id_1] != hashes[node_id_2] or sizes[node_id_1] != sizes[node_id_2]:
+            return False
+        # Subtrees are contiguous in pre-order, and the pre-order sequence of (label, child count) defines a tree
+        end_1, end_2 = node_id_1 + sizes[node_id_1], node_id_2 + sizes[node_id_2]
+        return (self.label[node_id_1:end_1] == self.label[node_id_2:end_2]
+                and self.child_count[node_id_1:end_1] == self.child_count[node_id_2:end_2])
+
+    def _compute_hashes(self):
+        label_hashes = [zlib.crc32(f"{kind}:{name}".encode()) for kind, name in self._labels]
+        n = len(self.nodes)
+        hashes = array('Q', bytes(8 * n))
+        sizes = array('i', bytes(4 * n))
+        first_child, next_sibling, label = self.first_child, self.next_sibling, self.label
+        # Children have bigger ids than their parent
+        for node_id in range(n - 1, -1, -1):
+            value = label_hashes[label[node_id]]
+            size = 1
+            child_id = first_child[node_id]
+            while child_id != NO_NODE:
+                value = ((value * _HASH_FACTOR) ^ hashes[child_id]) & _HASH_MASK
+                size += sizes[child_id]
+                child_id = next_sibling[child_id]
+            hashes[node_id] = value
+            sizes[node_id] = size
+        self._hashes = hashes
+        self._sizes = sizes
+
+    def _intern_class(self, node) -> int:
+        name = node.__class__.__name__
+        class_id = self._class_ids.get(name)
+        if class_id is None:
+            class_id = len(self.class_names)
+            self._class_ids[name] = class_id
+            self.class_names.append(name)
+        return class_id
+
+    def _add_node(self, node, parent_id) -> int:
+        node_id = len(self.nodes)
+        self.nodes.append(node)
+        self._ids[id(node)] = node_id
+        self.parent.append(parent_id)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.child_count.append(0)
+        class_id = self._intern_class(node)
+        self.class_id.append(class_id)
+        if isinstance(node, TerminalNode):
+            text = str(node)
+            key = ("T", text)
+        else:
+            text = None
+            key = ("R", self.class_names[class_id])
+        self.texts.append(text)
+        label = self._labels.get(key)
+        if label is None:
+            label = len(self._labels)
+            self._labels[key] = label
+        self.label.append(label)
+        return node_id
+
+    def _build(self):
+        last_child = {}
+        to_visit = [(self.root, NO_NODE)]
+        while to_visit:
+            node, parent_id = to_visit.pop()
+            node_id = self._add_node(node, parent_id)
+            if parent_id != NO_NODE:
+                previous = last_child.get(parent_id, NO_NODE)
+                if previous == NO_NODE:
+                    self.first_child[parent_id] = node_id
+                else:
+                    self.next_sibling[previous] = node_id
+                last_child[parent_id] = node_id
+
+            children = getattr(node, "children", None)
+            if children:
+                self.child_count[node_id] = len(children)
+                to_visit.extend((child, node_id) for child in reversed(children))
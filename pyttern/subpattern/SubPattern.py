@@ -15,11 +15,11 @@ from loguru import logger
 from pyttern.simulator.pda.PDA_alphabets import NavigationAlphabet
 from pyttern.simulator.pda.transition import CallTransition, NodeTransition, NotCallTransition, Transition
 
-from ..antlr.python import Python3Parser
-
 from ..simulator.pda import PDA
 
 def prune(tree: RuleContext, ctx: RuleContext | None):
+    from ..antlr.python import Python3Parser
+
     if isinstance(ctx, Python3Parser.Expr_wildcardContext):
         tree = tree.getChild(0) #stmt -> simple_stmts
         tree = tree.getChild(0) #simple_stmts -> simple_stmt
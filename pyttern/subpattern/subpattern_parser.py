@@ -4,14 +4,18 @@ from antlr4 import InputStream, CommonTokenStream
 from loguru import logger
 
 from .SubPattern import BaseSubPattern
-from .subpattern_visitor import SubPattern_Visitor
-from ..antlr.python import Python3Parser
-from ..antlr.python.Python3Lexer import Python3Lexer
 from ..language_processors import Languages
 from ..pyttern_error_listener import Python3ErrorListener, PytternErrorListener
-from ..pytternfsm.python.tree_pruner import TreePruner
+
+# The Python grammar is imported by the functions that parse sub-patterns, so that matching only Java code does not
+# import it (see `language_processors`)
+
 
 def string_to_subpattern_tree(subpattern_string):
+    from ..antlr.python import Python3Parser
+    from ..antlr.python.Python3Lexer import Python3Lexer
+    from ..pytternfsm.python.tree_pruner import TreePruner
+
     logger.info("Generating subpattern tree")
     stream = InputStream(subpattern_string)
     lexer = Python3Lexer(stream)
@@ -40,6 +44,8 @@ def parse_subpattern_from_string(code: str, language: Languages, override: bool=
     :return: The list of parsed subpatterns.
     :raises ValueError: If the code format is invalid or no subpattern definition is found.
     """
+    from .subpattern_visitor import SubPattern_Visitor
+
     logger.trace("Parsing subpattern from string")
 
     subpattern_tree = string_to_subpattern_tree(code)
@@ -84,6 +90,9 @@ def parse_diagnostics(code: str) -> list[dict]:
     | `end_line` | `int` | *(Optional)* **0-indexed** ending line number. Defaults to `line` if omitted. |
     | `end_character`| `int` | *(Optional)* **0-indexed** ending character offset. Defaults to `character + 1` if omitted. |
     """
+    from ..antlr.python import Python3Parser
+    from ..antlr.python.Python3Lexer import Python3Lexer
+
     code = code.strip() + "\n"
     stream = InputStream(code)
 
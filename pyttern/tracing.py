@@ -0,0 +1,46 @@
+"""
+Trace points in hot paths (Matcher steps, PDA compilation visitors).
+
+The message of a `logger.trace(f"...")` call is built before loguru checks the level, and some of them render whole
+subtrees with `getText()`. Costly messages are therefore built only when they are logged:
+    - the PDA translators log them with `log`, which builds the message only if a loguru handler accepts its level
+    - the Matcher, whose trace points run on every step, checks the `enabled` switch instead, so that they cost a
+      boolean check when tracing is off. The Matcher reads it once, when it is created (see `step_tracing`).
+
+The switch is off by default and turned on by `configure_logger` with -vv, or by `enable()`.
+"""
+from typing import Callable
+
+from loguru import logger
+
+enabled = False
+# Whether the message telling that the switch is off was logged, see `step_tracing`
+_hinted = False
+
+
+def enable(value: bool = True):
+    """
+    Turn the hot-path trace points on or off. Their messages are still filtered by the loguru handlers.
+    """
+    global enabled
+    enabled = value
+
+
+def log(message: Callable[[], str], level: str = "TRACE"):
+    """
+    Log a message that is costly to build, at the given level. The message is only built if a handler accepts it.
+    :param message: function building the message
+    """
+    logger.opt(lazy=True, depth=1).log(level, "{}", message)
+
+
+def step_tracing() -> bool:
+    """
+    Value of the switch for a new Matcher. When it is off, the first call logs at TRACE level how to turn it on, so
+    that programs configuring loguru at TRACE without calling `enable` know why the Matcher steps are not traced.
+    """
+    global _hinted
+    if not enabled and not _hinted:
+        _hinted = True
+        logger.trace("The trace points of the Matcher steps are off, call pyttern.tracing.enable() to turn them on")
+    return enabled
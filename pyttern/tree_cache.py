@@ -0,0 +1,135 @@
+"""
+Persistent cache of the pruned parse trees of code files, to scan again mostly unchanged repositories without parsing
+the files that did not change.
+
+The tree of a file is stored in the binary format of `language_processors.tree_serialize`, in a file named after a
+hash of the content of the file, the grammar of the language processor (see `BaseProcessor.grammar_version`) and the
+version of the code building the trees (see `fingerprints`). The cache is limited in size: when it grows over its
+maximal size, the entries used the least recently (the entries are touched when they are used) are removed.
+"""
+import hashlib
+import os
+import tempfile
+
+from loguru import logger
+
+from .language_processors import tree_serialize
+from .fingerprints import tree_fingerprint
+
+# Default maximal size of a TreeCache, in bytes
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class TreeCache:
+    """
+    Cache of parse trees in a directory, in a sub-directory for each version of the binary format. `hits` and
+    `misses` count the trees loaded from the cache and the ones that had to be parsed, and `evictions` the entries
+    removed to stay under max_size bytes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = os.path.join(str(directory), f"trees-v{tree_serialize.FORMAT_VERSION}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Total size of the entries, read from the directory at the first store
+        self._size = None
+
+    def __repr__(self):
+        return (f"TreeCache({self.directory!r}, hits={self.hits}, misses={self.misses}, "
+                f"evictions={self.evictions})")
+
+    @staticmethod
+    def key(content: bytes, processor) -> str:
+        """
+        Hash of what the tree of a file is generated from.
+        """
+        digest = hashlib.sha256()
+        for part in (tree_fingerprint(), type(processor).__name__, processor.grammar_version()):
+            digest.update(part.encode("utf-8") + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def tree_of_file(self, file, processor):
+        """
+        Tree of a code file, as `processor.generate_tree_from_file(file)`, loaded from the cache or generated and
+        stored in it.
+        """
+        with open(file, "rb") as f:
+            content = f.read()
+        path = os.path.join(self.directory, self.key(content, processor) + ".tree")
+        tree = self._load(path, processor)
+        if tree is not None:
+            self.hits += 1
+            return tree
+        self.misses += 1
+        tree = processor.generate_tree_from_file(file)
+        self._store(path, tree_serialize.dumps(tree))
+        return tree
+
+    @staticmethod
+    def _load(path, processor):
+        try:
+            with open(path, "rb") as f:
+                tree = tree_serialize.loads(f.read(), processor.tree_node_classes())
+            os.utime(path)
+            return tree
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cached tree {path}: {e}")
+            return None
+
+    def _store(self, path, data: bytes):
+        if len(data) > self.max_size:
+            return
+        # Written to a temporary file first, so that concurrent runs never read a partial file
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Cannot store the parse tree in {self.directory}: {e}")
+            return
+        self._size += len(data)
+        if self._size > self.max_size:
+            self._evict()
+
+    def _entries(self):
+        """
+        (modification time, size, path) of the entries of the cache.
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".tree"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        # Down to 90% of the maximal size, so that the next stores do not evict again right away
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Cannot remove the cached tree {path}: {e}")
+                continue
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+        logger.debug(f"Parse tree cache reduced to {size} bytes")
@@ -1,4 +1,5 @@
 import json
+from collections import deque
 from functools import wraps
 
 from antlr4 import ParseTreeVisitor
@@ -34,6 +35,9 @@ app.config['SWAGGER'] = {
 
 swagger = Swagger(app, template_file='swagger_template.yml')
 
+# Number of steps of a match kept for the debugger, the oldest ones are dropped beyond it
+DEBUG_STEPS_CAPACITY = 10000
+
 """ Helper classes and methods """
 
 
@@ -107,8 +111,20 @@ def get_matcher(pattern_code, code, lang=None) -> Matcher:
     return Matcher(pyttern_fsm, code_tree)
 
 class JsonListener(Pyttern_listener):
-    def __init__(self):
-        self.data = []
+    """
+    Record the steps of a match for the debugger. Only the last capacity steps are kept in data, oldest first.
+    """
+
+    def __init__(self, capacity=DEBUG_STEPS_CAPACITY):
+        self.data = deque(maxlen=capacity)
+        self.n_step = 0
+
+    @property
+    def first_step(self):
+        """
+        Index of the oldest step still in data, the number of steps dropped before it.
+        """
+        return self.n_step - len(self.data)
 
     def step(self, _, fsm, ast, stack, variables, matches):
         state_info = (str(fsm), hash(ast))
@@ -132,6 +148,7 @@ class JsonListener(Pyttern_listener):
             "stack": stack,
             "code_pos": pos
         })
+        self.n_step += 1
 
     def on_match(self, _, __):
         self.data[-1]["match"] = True
@@ -362,6 +379,15 @@ def match():
               lang:
                 type: string
                 description: The language of the code/pattern (python/java). If empty, try to determine the language.
+              maxSteps:
+                type: integer
+                description: Optional maximum number of steps of the match
+              maxConfigurations:
+                type: integer
+                description: Optional maximum number of configurations waiting to be explored
+              maxSeconds:
+                type: number
+                description: Optional maximum duration of the match in seconds
             required:
               - code
               - pattern
@@ -392,6 +418,12 @@ def match():
                             items:
                             type: integer
                             description: List of step indices where a match was found
+                        exceeded:
+                            type: string
+                            description: Name of the budget that stopped the match, null if it was complete
+                        first_step:
+                            type: integer
+                            description: Index of the first step kept, /api/step shows it for the older ones
     """
     logger.info("Asking to start match")
     data = request.json
@@ -406,17 +438,27 @@ def match():
     json_listener = JsonListener()
     matcher.add_listener(json_listener)
     matcher.start()
-    first_state = matcher.configurations[-1]
-    fsm, ast, _, _, _ = first_state
-    first_state_info = (str(fsm), hash(ast))
-    while len(matcher.configurations) > 0:
-        matcher.step()
+    first_state_info = (str(matcher.pda.initial_state), hash(matcher.parse_tree))
+    match_set = matcher.run(**__get_budgets(data))
     logger.debug(f"Number of steps: {matcher.n_step}")
-    session["data"] = json_listener.data
-    match_states = [i for i, data in enumerate(json_listener.data) if data["match"]]
+    session["data"] = list(json_listener.data)
+    session["first_step"] = json_listener.first_step
+    match_states = [json_listener.first_step + i for i, data in enumerate(json_listener.data) if data["match"]]
     logger.debug(f"Matching states: {match_states}")
     return json.dumps(
-        {"status": "ok", "n_steps": matcher.n_step, "state": first_state_info, "match_states": match_states})
+        {"status": "ok", "n_steps": matcher.n_step, "state": first_state_info, "match_states": match_states,
+         "exceeded": match_set.exceeded, "first_step": json_listener.first_step})
+
+
+def __get_budgets(data):
+    """
+    Read the optional budgets of a match request (maxSteps, maxConfigurations, maxSeconds).
+    """
+    return {
+        'max_steps': data.get("maxSteps"),
+        'max_configurations': data.get("maxConfigurations"),
+        'max_seconds': data.get("maxSeconds"),
+    }
 
 
 @app.route("/api/batch_match", methods=['POST'])
@@ -447,12 +489,22 @@ def batch_match():
               lang:
                 type: string
                 description: The language of the code/pattern (python/java). If empty, try to determine the language.
+              maxSteps:
+                type: integer
+                description: Optional maximum number of steps of each match
+              maxConfigurations:
+                type: integer
+                description: Optional maximum number of configurations waiting to be explored in each match
+              maxSeconds:
+                type: number
+                description: Optional maximum duration of each match in seconds
             required:
                 - codes
                 - compoundPattern
     responses:
       '200':
-        description: Match result
+        description: Match result. `pruned` counts the patterns skipped by the pre-filter for each file, and
+          `budgetExceeded` the patterns whose match was stopped by a budget (their result may be partial).
         content:
           application/json:
             schema:
@@ -478,7 +530,7 @@ def batch_match():
 
     processor = get_processor(lang)
     logger.debug(processor)
-    matcher = PytternMatcher(match_details=True)
+    matcher = PytternMatcher(match_details=True, **__get_budgets(data))
     pattern_tree = matcher.parse_json_pattern(patterns, lang)
     logger.debug(pattern_tree)
 
@@ -497,17 +549,21 @@ def batch_match():
 
         name = pattern_tree['name']
         pattern_tree['name'] = "and"
-        matches[filename] = matcher.match_tree(pattern_tree, code_tree)
+        matcher.n_pruned = 0
+        matcher.n_budget_exceeded = 0
+        matches[filename] = matcher.match_tree(pattern_tree, code_tree), matcher.n_pruned, matcher.n_budget_exceeded
         pattern_tree['name'] = name
 
     results = []
     for filename in matches:
-        match = matches[filename]
+        match, pruned, budget_exceeded = matches[filename]
         patterns = dict(__get_pyt_files(match))
         result = {
             'name': filename,
             'match': match['result'],
-            'patternsMatchResults': patterns
+            'patternsMatchResults': patterns,
+            'pruned': pruned,
+            'budgetExceeded': budget_exceeded
         }
         results.append(result)            
     return json.dumps(results)
@@ -667,8 +723,11 @@ def step():
     """
     if "data" not in session or session["data"] is None:
         return Response("Missing match data", status=400)
-    current_step = int(request.json["step"])
-    logger.info(f"Getting step {current_step}")
+    # The steps dropped by the JsonListener are shown as the oldest step kept
+    current_step = max(int(request.json["step"]) - session.get("first_step", 0), 0)
+    logger.info(f"Getting step {request.json['step']}")
+    if current_step >= len(session["data"]):
+        return Response("Step not recorded", status=400)
     current_data = session["data"][current_step]
     last_data = session["data"][current_step - 1] if current_step > 0 else None
     logger.debug(f"Current step: {current_data}")
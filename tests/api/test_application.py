@@ -1,5 +1,6 @@
 import json
 import pytest
+from pyttern.visualizer.web import application
 from pyttern.visualizer.web.application import app
 
 
@@ -29,6 +30,15 @@ def test_batch_match_success(client, data):
         result_early_return = r['patternsMatchResults']['earlyreturn.pyt']
         print(f"{r['match']} == (not {result_okreturn}) and {result_early_return}")
         assert r['match'] == (not result_okreturn) and result_early_return
+        assert 0 <= r['pruned'] <= 2
+
+
+def test_batch_match_budget(client, data):
+    """Test batch_match endpoint with a step budget."""
+    response = client.post('/api/batch_match', json=dict(data, maxSteps=1))
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert all(r['budgetExceeded'] + r['pruned'] == 2 for r in result)
 
 
 def test_validate_python_success(client):
@@ -73,6 +83,30 @@ def test_code_parsing_success(client):
     assert "TREE" in result["graph"]
 
 
+def test_match_budget(client):
+    """Test match endpoint with a step budget."""
+    response = client.post('/api/match', json={"code": "x = 42\ny = 1\n", "pattern": "?:*\n    ? = ?\n",
+                                               "lang": "python", "maxSteps": 3})
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert result["n_steps"] == 3
+    assert result["exceeded"] == "max_steps"
+
+
+def test_match_bounded_steps(client, monkeypatch):
+    """Test match endpoint keeps only the last steps of a long match."""
+    monkeypatch.setattr(application.JsonListener.__init__, "__defaults__", (5,))
+    response = client.post('/api/match', json={"code": "x = 42\ny = 1\n", "pattern": "?:*\n    ? = ?\n",
+                                               "lang": "python"})
+    result = json.loads(response.data)
+    assert result["first_step"] > 0
+    assert result["match_states"] and all(step >= result["first_step"] for step in result["match_states"])
+    first = json.loads(client.post('/api/step', json={"step": result["first_step"]}).data)
+    assert json.loads(client.post('/api/step', json={"step": 0}).data) == first
+    response = client.post('/api/step', json={"step": result["match_states"][-1]})
+    assert json.loads(response.data)["match"]
+
+
 def test_match_execution_success(client):
     """Test match endpoint matching a pattern against code."""
     response = client.post('/api/match', json={"code": "x = 42", "pattern": "? = ?", "lang": "python"})
@@ -0,0 +1,51 @@
+"""
+Fixtures shared by the tests of the matchers, most of which match small patterns against the code of
+tests_files/small/base_futures.py.
+"""
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+
+BASE_FUTURES = Path(__file__).parent / "tests_files" / "small" / "base_futures.py"
+
+
+@pytest.fixture
+def base_futures_path():
+    return BASE_FUTURES
+
+
+@pytest.fixture
+def base_futures_tree():
+    return get_processor("python").generate_tree_from_file(str(BASE_FUTURES))
+
+
+@pytest.fixture(scope="session")
+def compile_pattern():
+    """Function compiling the code of a Python pattern into its PDAs."""
+    def compile_pattern(pattern):
+        processor = get_processor("python")
+        return processor.create_pda(processor.generate_tree_from_code(pattern))
+    return compile_pattern
+
+
+@pytest.fixture(scope="session")
+def run_matcher():
+    """Function creating a Matcher and running it, until its first match if stop_at_first is set."""
+    def run_matcher(pda, code_tree, *args, stop_at_first=False, **kwargs):
+        matcher = Matcher(pda, code_tree, *args, **kwargs)
+        matcher.start().run(stop_at_first=stop_at_first)
+        return matcher
+    return run_matcher
+
+
+@pytest.fixture(scope="session")
+def match_summary():
+    """Function summarizing a match set by its bindings and matched nodes, in any order, to compare match sets."""
+    def match_summary(match_set):
+        return Counter((tuple(sorted((k, id(v)) for k, v in m.bindings.items())),
+                        tuple((id(t), id(n)) for t, n in m.matches)) for m in match_set.matches)
+    return match_summary
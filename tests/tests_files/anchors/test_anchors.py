@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.MultiMatcher import MultiMatcher
+from pyttern.simulator.pda.compiled import CompiledPDA
+from pyttern.simulator.tree_index import TreeIndex
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+SUBPATTERNS = BASE.parent / "subpatterns"
+
+PATTERNS = [
+    "?:*\n    ? = ?\n",
+    "?:*\n    ?x = ?x + 1\n",
+    "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "?:*\n    for ? in ?:\n        ?:*\n            return ?\n",
+    "?:*\n    def ?(?*):\n        ?*\n",
+    "?:*\n    while ?:\n        ?*\n",
+    "def ?(?*):\n    ?*\n",
+]
+
+
+def signature(match_set):
+    return [(tuple((k, id(v)) for k, v in m.bindings.items()), tuple((id(t), id(n)) for t, n in m.matches))
+            for m in match_set.matches]
+
+
+def test_anchors(compile_pattern):
+    compiled = CompiledPDA.of(compile_pattern("?:*\n    for ?i in ?:\n        ?*\n")["__main__"])
+    anchors = compiled.anchors
+    assert "For_stmtContext" in anchors
+    assert compiled.initial_state in anchors["For_stmtContext"]
+    assert set(anchors) <= compiled.required_symbols
+    # The PDA goes back to the parent of `?i` before matching `in`
+    assert "in" in compiled.required_symbols
+    assert "in" not in anchors
+
+
+def test_ids_of():
+    code_tree = get_processor("python").generate_tree_from_code("for i in x:\n    pass\nfor j in y:\n    pass\n")
+    index = TreeIndex.of(code_tree)
+    loops = index.ids_of("For_stmtContext")
+    assert len(loops) == 2 and list(loops) == sorted(loops)
+    assert all(index.class_names[index.class_id[node_id]] == "For_stmtContext" for node_id in loops)
+    assert len(index.ids_of("for")) == 2
+    assert len(index.ids_of("While_stmtContext")) == 0
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_same_matches(pattern, compile_pattern, run_matcher, base_futures_tree):
+    pda = compile_pattern(pattern)
+    full = run_matcher(pda, base_futures_tree, anchored=False)
+    anchored = run_matcher(pda, base_futures_tree, anchored=True)
+    assert signature(anchored.match_set) == signature(full.match_set)
+    assert anchored.n_step < full.n_step
+
+
+def test_same_matches_deduplicate(compile_pattern, run_matcher, base_futures_tree):
+    pda = compile_pattern(PATTERNS[0])
+    full = run_matcher(pda, base_futures_tree, True, anchored=False)
+    anchored = run_matcher(pda, base_futures_tree, True, anchored=True)
+    assert signature(anchored.match_set) == signature(full.match_set)
+
+
+def test_no_candidate(compile_pattern, run_matcher):
+    pda = compile_pattern("?:*\n    while ?:\n        ?*\n")
+    matcher = run_matcher(pda, get_processor("python").generate_tree_from_code("x = 1\n"), anchored=True)
+    assert matcher.n_step == 0
+    assert matcher.match_set.count() == 0
+
+
+def test_subpatterns(compile_pattern):
+    parse_subpattern_from_file(str(SUBPATTERNS / "or" / "simple" / "incr.myt"), Languages.PYTHON, override=True)
+    pda = compile_pattern("def ?(?*):\n    ?:*\n        for ?i in range(?*):\n            ?$Incr(?i)\n")
+    code_tree = get_processor("python").generate_tree_from_file(str(SUBPATTERNS / "or" / "simple" /
+                                                                     "increment_1_ok.py"))
+    full = Matcher.match(pda, code_tree, anchored=False)
+    assert full.count() > 0
+    assert signature(Matcher.match(pda, code_tree)) == signature(full)
+
+
+def test_multi_matcher(compile_pattern, base_futures_tree):
+    pdas = [compile_pattern(pattern) for pattern in PATTERNS]
+    anchored = MultiMatcher.match(pdas, base_futures_tree)
+    full = MultiMatcher.match(pdas, base_futures_tree, anchored=False)
+    for anchored_set, full_set in zip(anchored, full):
+        assert sorted(signature(anchored_set)) == sorted(signature(full_set))
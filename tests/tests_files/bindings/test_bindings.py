@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.simulator.Matcher import Matcher, bind
+from pyttern.simulator.MultiMatcher import MultiMatcher
+from pyttern.simulator.pda.compiled import CompiledPDA
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+COMPOUND = BASE.parent / "subpatterns" / "or" / "compound"
+
+
+def test_slots(compile_pattern):
+    compiled = CompiledPDA.of(compile_pattern("?:*\n    ?y = ?x + ?y\n")["__main__"])
+    assert compiled.variables == ("x", "y")
+    assert compiled.slots == {"x": 0, "y": 1}
+
+
+def test_bind():
+    bindings = (None, None, None)
+    assert bind(bindings, 1, "a") == (None, "a", None)
+    assert bindings == (None, None, None)
+
+
+def test_bindings_are_shared(compile_pattern, base_futures_tree):
+    pda = compile_pattern("?:*\n    ?x = ?\n")
+    matcher = Matcher(pda, base_futures_tree, anchored=False)
+    matcher.start()
+    unbound = matcher.configurations[0][3]
+    assert unbound == (None,)
+    for _ in range(200):
+        matcher.step()
+        for config in matcher.configurations:
+            assert isinstance(config[3], tuple)
+            assert config[3][0] is not None or config[3] is unbound
+
+
+def test_match_bindings(compile_pattern):
+    pda = compile_pattern("?:*\n    ?x = ?y\n")
+    match_set = Matcher.match(pda, get_processor("python").generate_tree_from_code("a = 1\n"))
+    assert match_set.count() == 1
+    bindings = match_set.matches[0].bindings
+    assert list(bindings) == ["x", "y"]
+    assert bindings["x"].getText() == "a" and bindings["y"].getText() == "1"
+
+
+def test_initial_bindings(compile_pattern):
+    pda = compile_pattern("?:*\n    ?x = ?\n")
+    code_tree = get_processor("python").generate_tree_from_code("a = 1\n")
+    match_set = Matcher.match(pda, code_tree, bindings={"other": code_tree})
+    assert match_set.matches[0].bindings["other"] is code_tree
+    assert match_set.matches[0].bindings["x"].getText() == "a"
+
+
+def test_subpattern_arguments():
+    parse_subpattern_from_file(str(COMPOUND / "loop.myt"), Languages.PYTHON, override=True)
+    processor = get_processor("python")
+    pdas = processor.create_pda(processor.generate_tree_from_file(str(COMPOUND / "loop.pyt")))
+    # ?i and ?v are only arguments of the call, they still get a slot
+    assert CompiledPDA.of(pdas["__main__"]).variables == ("i", "v")
+    match_set = Matcher.match(pdas, processor.generate_tree_from_file(str(COMPOUND / "for_loop.py")))
+    assert [{name: value.getText() for name, value in match.bindings.items()} for match in match_set.matches] == \
+           [{"i": "i", "v": "10"}]
+
+
+def test_multi_matcher_slots(compile_pattern, base_futures_tree):
+    patterns = [compile_pattern("?:*\n    ?x = ?\n"), compile_pattern("?:*\n    ?y = ?x\n")]
+    matcher = MultiMatcher(patterns, base_futures_tree)
+    assert matcher.variables == ["x", "y"]
+    assert all(lane.slots is matcher.slots for lane in matcher.lanes)
+    for match_set, pda in zip(MultiMatcher.match(patterns, base_futures_tree), patterns):
+        expected = Matcher.match(pda, base_futures_tree)
+        assert sorted(tuple((name, id(value)) for name, value in match.bindings.items())
+                      for match in match_set.matches) == \
+               sorted(tuple((name, id(value)) for name, value in match.bindings.items())
+                      for match in expected.matches)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.pytternfsm.python.match_set import BUDGET_EXCEEDED, COMPLETE
+from pyttern.simulator.Matcher import Matcher
+
+BASE = Path(__file__).parent
+PATTERN = "?:*\n    ? = ?\n"
+
+
+@pytest.fixture
+def trees(compile_pattern, base_futures_tree):
+    return compile_pattern(PATTERN), base_futures_tree
+
+
+def test_complete(trees):
+    pda, code_tree = trees
+    match_set = Matcher.match(pda, code_tree, max_steps=10 ** 9, max_configurations=10 ** 9, max_seconds=3600)
+    assert match_set.status == COMPLETE
+    assert match_set.exceeded is None
+    assert match_set.count() == Matcher.match(pda, code_tree).count()
+
+
+def test_max_steps(trees):
+    pda, code_tree = trees
+    full = Matcher.match(pda, code_tree)
+
+    matcher = Matcher(pda, code_tree)
+    match_set = matcher.start().run(max_steps=1000)
+    assert matcher.n_step == 1000
+    assert match_set.status == BUDGET_EXCEEDED
+    assert match_set.exceeded == "max_steps"
+    assert 0 < match_set.count() < full.count()
+    assert [m.bindings for m in match_set.matches] == [m.bindings for m in full.matches[:match_set.count()]]
+
+
+def test_max_configurations(trees):
+    pda, code_tree = trees
+    matcher = Matcher(pda, code_tree)
+    match_set = matcher.start().run(max_configurations=3)
+    assert match_set.exceeded == "max_configurations"
+    assert len(matcher.configurations) > 3
+
+
+def test_max_seconds(trees):
+    pda, code_tree = trees
+    match_set = Matcher.match(pda, code_tree, max_seconds=0)
+    assert match_set.status == BUDGET_EXCEEDED
+    assert match_set.exceeded == "max_seconds"
+
+
+def test_pytternmatcher_budgets(base_futures_path):
+    pattern_path = str(BASE.parent / "count" / "match_var_assign.pyt")
+    code_path = str(base_futures_path)
+
+    matcher = PytternMatcher(match_details=True, max_steps=10)
+    result, details = matcher.match(pattern_path, code_path, "python")
+    assert details['matches'].status == BUDGET_EXCEEDED
+    assert matcher.n_budget_exceeded == 1
+
+    matcher = PytternMatcher(match_details=True)
+    result, details = matcher.match(pattern_path, code_path, "python")
+    assert details['matches'].status == COMPLETE
+    assert matcher.n_budget_exceeded == 0
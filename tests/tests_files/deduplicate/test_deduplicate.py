@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import match_files
+from pyttern.language_processors import get_processor
+
+BASE = Path(__file__).parent
+
+
+@pytest.fixture
+def run(compile_pattern, run_matcher, base_futures_tree):
+    # Without anchors, to compare the work of the two modes on the whole search
+    return lambda pattern_code, deduplicate: run_matcher(compile_pattern(pattern_code), base_futures_tree,
+                                                         deduplicate, anchored=False)
+
+
+@pytest.mark.parametrize("pattern_code", [
+    "?:*\n    ?x = ?\n",
+    "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "?:*\n    for ? in ?:\n        ?:*\n            return ?\n",
+])
+def test_deduplicate_same_bindings(run, pattern_code):
+    full = run(pattern_code, deduplicate=False)
+    dedup = run(pattern_code, deduplicate=True)
+
+    assert dedup.n_step < full.n_step
+    assert (dedup.match_set.count() > 0) == (full.match_set.count() > 0)
+
+    def bindings(matcher):
+        return {tuple(id(v) for v in m.bindings.values()) for m in matcher.match_set.matches}
+    assert bindings(dedup) == bindings(full)
+
+
+def test_deduplicate_steps_are_linear(run, base_futures_path):
+    dedup = run("?:*\n    ?x = ?x + 1\n", deduplicate=True)
+    n_nodes = len(base_futures_path.read_text().splitlines())
+    assert dedup.n_step < 50 * n_nodes
+
+
+def test_deduplicate_steps_scale_linearly(compile_pattern, run_matcher):
+    # Each function repeats the same statements, so that the work on a file of n functions is linear in n
+    function = "def f{}(a):\n    b = a + 1\n    for c in a:\n        if c:\n            b = b + 1\n    return b\n\n\n"
+    processor = get_processor("python")
+    pda = compile_pattern("?:*\n    ?x = ?x + 1\n")
+    n_steps = {}
+    for n_functions in (10, 40):
+        code_tree = processor.generate_tree_from_code("".join(function.format(i) for i in range(n_functions)))
+        matcher = run_matcher(pda, code_tree, True, anchored=False)
+        assert matcher.match_set.count() == n_functions
+        n_steps[n_functions] = matcher.n_step
+    # Four times more functions: about four times more steps, against sixteen without deduplication
+    assert n_steps[40] < 5 * n_steps[10]
+
+
+def test_match_files_deduplicate():
+    pattern_path = BASE.parent / "count" / "match_var_assign.pyt"
+    code_path = BASE.parent / "count" / "multiple_var_assign.py"
+    assert match_files(pattern_path, code_path) == match_files(pattern_path, code_path, deduplicate=True)
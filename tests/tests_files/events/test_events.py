@@ -0,0 +1,99 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.simulator.Matcher import Matcher, SubpatternMemo
+from pyttern.simulator.events import EventBuffer, read_events, STEP, TRANSITION, MATCH, CALL
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+SUBPATTERNS = Path(__file__).parent.parent / "subpatterns"
+PATTERN = "?:*\n    ?x = ?\n"
+CODE = "def f(a):\n    x = 1\n    y = 2\n    return x\n"
+
+
+def run(pattern, code=CODE, **kwargs):
+    processor = get_processor("python")
+    pda = processor.create_pda(processor.generate_tree_from_code(pattern))
+    matcher = Matcher(pda, processor.generate_tree_from_code(code), **kwargs)
+    matcher.start()
+    return matcher, matcher.run()
+
+
+def test_events_of_a_match():
+    events = EventBuffer()
+    matcher, match_set = run(PATTERN, events=events)
+
+    steps = list(events.of_kind(STEP))
+    # Configurations in the final state are explored without counting a step
+    assert len(steps) == matcher.n_step + match_set.count()
+    assert steps[0][2:4] == (matcher.pda.initial_state, matcher.root_id)
+
+    matches = list(events.of_kind(MATCH))
+    assert len(matches) == match_set.count() == 2
+    assert [event[4] for event in matches] == [1, 2]
+    assert all(event[2] == matcher.compiled.final_state for event in matches)
+
+    transitions = list(events.of_kind(TRANSITION))
+    assert len(transitions) > 0
+    assert all(len(event) == 6 and all(isinstance(value, int) for value in event) for event in transitions)
+    assert events.dropped == 0 and len(events) == events.n_events
+
+
+def test_subscription():
+    events = EventBuffer(kinds=(MATCH,))
+    _, match_set = run(PATTERN, events=events)
+    assert [event[0] for event in events] == [MATCH] * match_set.count()
+    assert events.writer(STEP) is None
+
+
+def test_lean_match_events():
+    events = EventBuffer(kinds=(MATCH,))
+    _, match_set = run(PATTERN, lean=True, events=events)
+    assert [event[4] for event in events] == [1, 2]
+    assert match_set.count() == 2
+
+
+def test_ring_buffer_keeps_last_events():
+    reference = EventBuffer()
+    run(PATTERN, events=reference)
+
+    events = EventBuffer(capacity=8)
+    run(PATTERN, events=events)
+    assert len(events) == 8
+    assert events.dropped == reference.n_events - 8
+    assert list(events) == list(reference)[-8:]
+
+
+def test_spill():
+    reference = EventBuffer()
+    run(PATTERN, events=reference)
+
+    spill = io.StringIO()
+    events = EventBuffer(capacity=8, spill=spill)
+    run(PATTERN, events=events)
+    events.flush()
+    assert len(events) == 0 and events.dropped == 0
+    assert events.n_spilled == reference.n_events
+    spill.seek(0)
+    assert list(read_events(spill)) == list(reference)
+
+
+def test_call_events():
+    parse_subpattern_from_file(str(SUBPATTERNS / "or" / "simple" / "incr.myt"), Languages.PYTHON, override=True)
+    code = (SUBPATTERNS / "or" / "simple" / "increment_1_ok.py").read_text()
+    memo = SubpatternMemo()
+    events = EventBuffer(kinds=(CALL,))
+    run("?:*\n    ?$Incr(?x)\n", code, subpattern_memo=memo, events=events)
+    calls = list(events)
+    assert len(calls) == memo.hits + memo.misses
+    assert sum(event[3] for event in calls) == memo.hits
+
+
+def test_invalid_buffer():
+    with pytest.raises(ValueError):
+        EventBuffer(capacity=0)
+    with pytest.raises(ValueError):
+        EventBuffer(kinds=(42,))
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import match_files
+from pyttern.simulator.frontier import STRATEGIES
+from pyttern.simulator.pda.compiled import CompiledPDA
+
+BASE = Path(__file__).parent
+
+PATTERNS = [
+    "?:*\n    ? = ?\n",
+    "?:*\n    ? = ?\n    ?*\n    return ?\n",
+    "?:*\n    def ?(?*):\n        ?*\n",
+]
+
+
+@pytest.fixture
+def run(run_matcher, base_futures_tree):
+    return lambda pda, strategy, stop_at_first=False: run_matcher(pda, base_futures_tree, strategy=strategy,
+                                                                  stop_at_first=stop_at_first)
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_strategies_find_same_matches(pattern, compile_pattern, run, match_summary):
+    pda = compile_pattern(pattern)
+    reference = run(pda, "dfs")
+    for strategy in STRATEGIES:
+        matcher = run(pda, strategy)
+        assert match_summary(matcher.match_set) == match_summary(reference.match_set), strategy
+        assert matcher.n_step == reference.n_step
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_best_first_reaches_first_match_quickly(pattern, compile_pattern, run):
+    pda = compile_pattern(pattern)
+    best = run(pda, "best", stop_at_first=True)
+    assert best.match_set.count() == 1
+    assert best.n_step <= run(pda, "bfs", stop_at_first=True).n_step
+    assert best.n_step <= run(pda, "dfs", stop_at_first=True).n_step
+
+
+def test_distance_to_final(compile_pattern):
+    compiled = CompiledPDA(compile_pattern(PATTERNS[0])["__main__"])
+    distances = compiled.distance_to_final
+    assert distances[compiled.final_state] == 0
+    assert distances[compiled.initial_state] == max(distances.values())
+
+
+def test_unknown_strategy(compile_pattern, run):
+    with pytest.raises(ValueError):
+        run(compile_pattern(PATTERNS[0]), "random")
+
+
+def test_match_files_strategy():
+    pattern_path = BASE.parent / "count" / "match_var_assign.pyt"
+    code_path = BASE.parent / "count" / "multiple_var_assign.py"
+    for strategy in STRATEGIES:
+        assert match_files(pattern_path, code_path, strategy=strategy)
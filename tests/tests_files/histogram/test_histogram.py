@@ -0,0 +1,70 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.tree_index import TreeIndex
+
+BASE = Path(__file__).parent
+COUNT = BASE.parent / "count"
+
+PATTERN = "?:*\n    ?x = ?y\n"
+
+
+@pytest.fixture
+def pda(compile_pattern):
+    return compile_pattern(PATTERN)
+
+
+def test_text_histogram(pda, base_futures_tree):
+    details = Matcher.match(pda, base_futures_tree)
+    lean = Matcher.match(pda, base_futures_tree, lean=True, histogram=["x"])
+    assert lean.matches == []
+    assert lean.count() == details.count() > 0
+    assert lean.histogram("x") == Counter(match.bindings["x"].getText() for match in details.matches)
+    assert lean.histogram("y") == Counter()
+
+
+def test_hash_histogram(pda, base_futures_tree):
+    index = TreeIndex.of(base_futures_tree)
+
+    details = Matcher.match(pda, base_futures_tree)
+    lean = Matcher.match(pda, base_futures_tree, lean=True, histogram=["x", "y"], histogram_key="hash")
+    for name in ("x", "y"):
+        expected = Counter(index.hashes[index.node_id(match.bindings[name])] for match in details.matches)
+        assert lean.histogram(name) == expected
+        assert sum(lean.histogram(name).values()) == lean.count()
+
+
+def test_histogram_with_details(pda, base_futures_tree):
+    match_set = Matcher.match(pda, base_futures_tree, histogram=["x"])
+    assert match_set.histogram("x") == Counter(match.bindings["x"].getText() for match in match_set.matches)
+
+
+def test_histogram_arguments(pda):
+    code_tree = get_processor("python").generate_tree_from_code("a = 1\n")
+    with pytest.raises(ValueError):
+        Matcher.match(pda, code_tree, histogram=["x"], histogram_key="size")
+    assert Matcher.match(pda, code_tree, lean=True, histogram=["unknown"]).histograms == {}
+
+
+def test_count_mode():
+    pattern_path = COUNT / "match_var_assign.pyt"
+    code_path = COUNT / "multiple_var_assign.py"
+    _, details = PytternMatcher(match_details=True).match(pattern_path, code_path, "python")
+
+    counts = PytternMatcher(count_only=True).match(pattern_path, code_path, "python")
+    assert list(counts) == ["match_var_assign.pyt"]
+    assert counts["match_var_assign.pyt"].count() == details["matches"].count() > 1
+    assert counts["match_var_assign.pyt"].matches == []
+
+
+def test_count_wildcards():
+    matcher = PytternMatcher(count_only=True, histogram=["x"])
+    results = matcher.match_wildcards(BASE / "*.pyt", COUNT / "*.py")
+    counts = results[str(COUNT / "multiple_var_assign.py")][str(BASE / "assign_count.pyt")]["assign_count.pyt"]
+    assert counts.count() == 4
+    assert counts.histogram("x") == Counter({"t1": 1, "t2": 1, "t3": 1, "t4": 1})
@@ -0,0 +1,160 @@
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+from antlr4.tree.Tree import TerminalNode
+
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.incremental import apply_changes
+from pyttern.pyttern_error_listener import PytternSyntaxException
+from pyttern.simulator.Matcher import Matcher
+
+BASE = Path(__file__).parent
+
+PATTERNS = [
+    "?:*\n    ? = ?\n",
+    "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "?:*\n    def ?(?*):\n        ?*\n",
+    "?*\ndef ?f(?*):\n    ?*\n?*\n?f(?*)\n?*\n",
+    "?:*\n    ?x = ?\n    ?*\n    return ?x\n",
+]
+
+# Each edit replaces the first occurrence of a text of the previous version
+EDITS = [
+    ("def isfuture(obj):", "def is_future(obj):"),
+    ("    return 'cb=[%s]' % cb", "    x = 1\n    return 'cb=[%s]' % cb"),
+    ("\n\ndef _format_callbacks(cb):", "\n\nTIMEOUT = 10\n\ndef _format_callbacks(cb):"),
+    ('    """helper function for Future.__repr__"""\n', ""),
+    ("TIMEOUT = 10\n", ""),
+    ("import reprlib", "import reprlib\nimport sys"),
+]
+
+
+def shape(node):
+    """Structure of a tree with the positions of its tokens, to compare trees built from different parses."""
+    if isinstance(node, TerminalNode):
+        token = node.symbol
+        return token.type, token.text, token.line, token.column, token.start, token.stop
+    return type(node).__name__, tuple(shape(child) for child in node.children or ())
+
+
+def position(node):
+    """Position of a node in its file, the same for a node of an incremental tree and of a fresh parse."""
+    if node is None:
+        return None
+    if isinstance(node, TerminalNode):
+        return node.symbol.start
+    if getattr(node, "start", None) is None:
+        return type(node).__name__, position(node.parentCtx)
+    return type(node).__name__, node.start.start, node.stop.stop
+
+
+def signature(match_set):
+    node = position
+    return Counter((tuple((name, node(value)) for name, value in match.bindings.items()),
+                    tuple((id(transition), node(code_node)) for transition, code_node in match.matches))
+                   for match in match_set.matches)
+
+
+@lru_cache
+def reference(code):
+    """Tree of a fresh parse of code, shared by the tests."""
+    return get_processor("python").parse_code(code.strip() + "\n")
+
+
+def versions(code):
+    for old, new in EDITS:
+        assert old in code
+        code = code.replace(old, new, 1)
+        yield code
+
+
+def test_apply_changes():
+    code = "a = 1\nb = 2\n"
+    assert apply_changes(code, [{"text": "c = 3\n"}]) == "c = 3\n"
+    changes = [{"range": {"start": {"line": 1, "character": 0}, "end": {"line": 1, "character": 1}}, "text": "x"},
+               {"range": {"start": {"line": 2, "character": 0}, "end": {"line": 2, "character": 0}}, "text": "y = 3\n"}]
+    assert apply_changes(code, changes) == "a = 1\nx = 2\ny = 3\n"
+
+
+def test_same_tree(base_futures_path):
+    processor = get_processor("python")
+    file = str(BASE / "same_tree.py")
+    code = base_futures_path.read_text(encoding="utf-8")
+    processor.update_file(file, code)
+    incremental_tree = processor.incremental_files[file][0]
+    for code in versions(code):
+        tree = processor.update_file(file, code)
+        assert not incremental_tree.full_parse
+        assert incremental_tree.n_reparsed <= 3 and incremental_tree.n_reused > 10
+        assert shape(tree) == shape(reference(code))
+        assert all(child.parentCtx is tree for child in tree.children)
+    processor.forget_file(file)
+
+
+def test_changes():
+    processor = get_processor("python")
+    file = str(BASE / "changes.py")
+    processor.update_file(file, "def f(a):\n    return a\n\n\nx = f(1)\n")
+    change = {"range": {"start": {"line": 1, "character": 11}, "end": {"line": 1, "character": 12}}, "text": "a + 1"}
+    tree = processor.update_file(file, changes=[change])
+    assert tree.getText() == processor.parse_code("def f(a):\n    return a + 1\n\n\nx = f(1)\n").getText()
+    assert processor.incremental_files[file][0].n_reused == 1
+    processor.forget_file(file)
+    with pytest.raises(ValueError):
+        processor.update_file(file, changes=[change])
+
+
+def test_full_parse_fallback():
+    processor = get_processor("python")
+    file = str(BASE / "fallback.py")
+    processor.update_file(file, "x = 1\n\n\ndef f():\n    pass\n")
+    # The decorator of the edited lines belongs to the next statement
+    code = "@decorator\n\ndef f():\n    pass\n"
+    tree = processor.update_file(file, code)
+    assert processor.incremental_files[file][0].full_parse
+    assert shape(tree) == shape(processor.parse_code(code))
+    with pytest.raises(PytternSyntaxException):
+        processor.update_file(file, "x = (\n")
+    processor.forget_file(file)
+
+
+@pytest.mark.parametrize("deduplicate", [False, True])
+def test_same_matches(deduplicate, compile_pattern, run_matcher, base_futures_path):
+    processor = get_processor("python")
+    pdas = [compile_pattern(pattern) for pattern in PATTERNS]
+    file = str(BASE / f"same_matches_{deduplicate}.py")
+    code = base_futures_path.read_text(encoding="utf-8")
+    processor.update_file(file, code)
+    for pda in pdas:
+        processor.match_file(file, pda, deduplicate)
+    matches = processor.incremental_files[file][1]
+
+    for code in versions(code):
+        processor.update_file(file, code)
+        reference_tree = reference(code)
+        n_reused = 0
+        for pda in pdas:
+            match_set = processor.match_file(file, pda, deduplicate)
+            n_reused += matches.n_reused
+            expected = Matcher.match(pda, reference_tree, deduplicate=deduplicate)
+            if deduplicate:
+                assert set(signature(match_set)) == set(signature(expected))
+            else:
+                assert signature(match_set) == signature(expected)
+                assert matches.n_step == run_matcher(pda, reference_tree).n_step
+        assert n_reused > 0
+    processor.forget_file(file)
+
+
+def test_unchanged_code(compile_pattern, base_futures_path):
+    processor = get_processor("python")
+    pda = compile_pattern(PATTERNS[0])
+    file = str(BASE / "unchanged.py")
+    code = base_futures_path.read_text(encoding="utf-8")
+    tree = processor.update_file(file, code)
+    match_set = processor.match_file(file, pda)
+    assert processor.update_file(file, code + "\n\n") is tree
+    assert processor.match_file(file, pda) is match_set
+    processor.forget_file(file)
@@ -0,0 +1,51 @@
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.simulator.Matcher import Matcher
+
+BASE = Path(__file__).parent
+PATTERN = "?:*\n    ? = ?\n"
+
+
+@pytest.fixture
+def trees(compile_pattern, base_futures_tree):
+    return compile_pattern(PATTERN), base_futures_tree
+
+
+def test_iter_matches_same_as_match(trees):
+    pda, code_tree = trees
+    full = Matcher.match(pda, code_tree)
+    lazy = list(Matcher.iter_matches(pda, code_tree))
+    assert len(lazy) == full.count()
+    assert [m.bindings for m in lazy] == [m.bindings for m in full.matches]
+    assert [m.n_step for m in lazy] == [m.n_step for m in full.matches]
+
+
+def test_iter_matches_is_lazy(trees):
+    pda, code_tree = trees
+    first = next(Matcher.iter_matches(pda, code_tree))
+    assert first.bindings == Matcher.match(pda, code_tree, stop_at_first=True).matches[0].bindings
+
+    full = Matcher.match(pda, code_tree)
+    first_three = list(islice(Matcher.iter_matches(pda, code_tree), 3))
+    assert first_three[-1].n_step == full.matches[2].n_step
+
+
+def test_iter_matches_budget(trees):
+    pda, code_tree = trees
+    limited = list(Matcher.iter_matches(pda, code_tree, max_steps=1000))
+    assert 0 < len(limited) < Matcher.match(pda, code_tree).count()
+
+
+def test_iter_match():
+    pattern_path = BASE.parent / "count" / "match_var_assign.pyt"
+    code_path = BASE.parent / "count" / "multiple_var_assign.py"
+    matcher = PytternMatcher(match_details=True)
+    _, details = matcher.match(pattern_path, code_path, "python")
+
+    lazy = list(matcher.iter_match(pattern_path, code_path, "python"))
+    assert [name for name, _ in lazy] == ["match_var_assign.pyt"] * details['matches'].count()
+    assert [m.bindings for _, m in lazy] == [m.bindings for m in details['matches'].matches]
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+from importlib import metadata
+from pathlib import Path
+
+import pytest
+
+import pyttern.language_processors as language_processors
+from pyttern.language_processors import (determine_language, get_processor, register_language, registered_languages,
+                                         unregister_language, Languages, ENTRY_POINT_GROUP)
+from pyttern.language_processors.java_processor import JavaProcessor
+from pyttern.language_processors.python_processor import PythonProcessor
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+ROOT = TESTS.parent.parent
+PATTERN = TESTS / "simple_wildcards" / "arg" / "simple_wildcard.pyt"
+CODE = TESTS / "simple_wildcards" / "arg" / "simple_wildcard_ko_1arg.py"
+
+PLUGIN = '''
+class DummyProcessor:
+    def get_language_extensions(self):
+        return ["dum"]
+'''
+
+
+def imported_modules(code):
+    """Modules imported by a new interpreter running code."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", code + "\nimport sys\nprint('\\n'.join(sys.modules))"], env=env,
+                            capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    """A language "dummy" of the module dummy_language, registered by an entry point."""
+    (tmp_path / "dummy_language.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry_point = metadata.EntryPoint("dummy", "dummy_language:DummyProcessor", ENTRY_POINT_GROUP)
+    monkeypatch.setattr(language_processors.metadata, "entry_points",
+                        lambda group: [entry_point] if group == ENTRY_POINT_GROUP else [])
+    monkeypatch.setattr(language_processors, "_entry_points_loaded", False)
+    yield
+    unregister_language("dummy")
+    sys.modules.pop("dummy_language", None)
+
+
+def test_builtin_languages():
+    assert determine_language("a/b.py") == "python"
+    assert determine_language("B.jat") == "java"
+    assert determine_language("notes.txt") is None
+    assert get_processor("python") is get_processor(Languages.PYTHON) is PythonProcessor()
+    assert get_processor("java") is JavaProcessor()
+    for lang in Languages:
+        assert language_processors._extensions(lang.value) == tuple(get_processor(lang).get_language_extensions())
+    with pytest.raises(ValueError):
+        get_processor("cobol")
+
+
+def test_python_only_imports():
+    modules = imported_modules("from pyttern import PytternMatcher\n"
+                               f"PytternMatcher().match({str(PATTERN)!r}, {str(CODE)!r}, 'python')")
+    assert "pyttern.antlr.python.Python3Parser" in modules
+    assert not any(module.startswith(("pyttern.antlr.java", "pyttern.language_processors.java")) for module in modules)
+
+
+def test_java_only_imports():
+    java = sorted((TESTS.parent / "tests_files_jattern").glob("*/*/*.java"))[0]
+    modules = imported_modules("from pyttern import PytternMatcher\n"
+                               "from pyttern.language_processors import determine_language\n"
+                               f"assert determine_language({str(java)!r}) == 'java'\n"
+                               f"PytternMatcher().match_wildcards({str(java)!r}, {str(java)!r})")
+    assert "pyttern.antlr.java.JavaParser" in modules
+    assert not any(module.startswith("pyttern.antlr.python") for module in modules)
+
+
+def test_entry_point(plugin):
+    assert determine_language("x.py") == "python"
+    assert "dummy_language" not in sys.modules
+    assert "dummy" in registered_languages()
+    assert "dummy_language" not in sys.modules
+    assert determine_language("x.dum") == "dummy"
+    assert type(get_processor("dummy")).__name__ == "DummyProcessor"
+
+
+def test_entry_point_by_name(plugin):
+    assert type(get_processor("dummy")).__name__ == "DummyProcessor"
+    assert determine_language("x.dum") == "dummy"
+
+
+def test_register_language():
+    class Processor:
+        def get_language_extensions(self):
+            return ["pp"]
+
+    register_language("pp", Processor, extensions=["pp", "pph"])
+    try:
+        assert determine_language("x.pph") == "pp"
+        assert isinstance(get_processor("pp"), Processor)
+    finally:
+        unregister_language("pp")
+    assert determine_language("x.pph") is None
+
+
+def test_unsupported_cli_language():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-m", "pyttern.main", str(PATTERN), str(CODE), "--lang", "cobol"],
+                            env=env, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "Unsupported language: cobol" in result.stderr
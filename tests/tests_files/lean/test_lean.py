@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.simulator.Matcher import Matcher
+
+BASE = Path(__file__).parent
+
+
+@pytest.mark.parametrize("pattern", [
+    "?:*\n    ? = ?\n",
+    "?:*\n    ?x = ?x + 1\n",
+    "?:*\n    def ?(?*):\n        ?*\n",
+])
+def test_lean_counts_matches(pattern, compile_pattern, base_futures_tree):
+    pda = compile_pattern(pattern)
+
+    details = Matcher.match(pda, base_futures_tree)
+    lean = Matcher.match(pda, base_futures_tree, lean=True)
+    assert lean.count() == details.count()
+    assert lean.matches == []
+
+    first = Matcher.match(pda, base_futures_tree, lean=True, stop_at_first=True)
+    assert first.count() == min(1, details.count())
+
+
+def test_lean_builds_no_path(compile_pattern, base_futures_tree):
+    matcher = Matcher(compile_pattern("?:*\n    ? = ?\n"), base_futures_tree, lean=True)
+    matcher.start()
+    for _ in range(100):
+        matcher.step()
+        assert all(config[4] is None for config in matcher.configurations)
+
+
+def test_bool_mode_is_lean():
+    pattern_path = BASE.parent / "count" / "match_var_assign.pyt"
+    code_path = BASE.parent / "count" / "multiple_var_assign.py"
+    assert PytternMatcher().match(pattern_path, code_path, "python") is True
+    result, details = PytternMatcher(match_details=True).match(pattern_path, code_path, "python")
+    assert result is True
+    assert details['matches'].count() > 1
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.pytternfsm.python.match_set import BUDGET_EXCEEDED
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.MultiMatcher import MultiMatcher
+from pyttern.simulator.events import EventBuffer, STEP, MATCH
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+
+PATTERNS = [
+    "?:*\n    ? = ?\n",
+    "?:*\n    ?x = ?x + 1\n",
+    "?:*\n    if ?:\n        ?*\n        return ?\n",
+    "?:*\n    for ? in ?:\n        ?:*\n            return ?\n",
+    "?:*\n    def ?(?*):\n        ?*\n",
+    "?:*\n    return ?\n",
+]
+
+
+@pytest.fixture
+def pdas(compile_pattern):
+    return [compile_pattern(pattern) for pattern in PATTERNS]
+
+
+@pytest.mark.parametrize("deduplicate", [False, True])
+def test_same_matches_as_matcher(deduplicate, pdas, base_futures_tree, run_matcher, match_summary):
+    multi = MultiMatcher(pdas, base_futures_tree, deduplicate)
+    multi.start()
+    while len(multi.configurations) > 0:
+        multi.step()
+
+    singles = [run_matcher(pda, base_futures_tree, deduplicate) for pda in pdas]
+    for match_set, single in zip(multi.match_sets, singles):
+        assert match_set.count() == single.match_set.count()
+        if not deduplicate:
+            assert match_summary(match_set) == match_summary(single.match_set)
+    assert multi.n_step < sum(single.n_step for single in singles)
+
+
+def test_stop_at_first(pdas, base_futures_tree):
+    match_sets = MultiMatcher.match(pdas, base_futures_tree, stop_at_first=True)
+    for match_set, pda in zip(match_sets, pdas):
+        assert match_set.count() == min(1, Matcher.match(pda, base_futures_tree).count())
+
+
+def test_subpatterns(pdas, match_summary):
+    processor = get_processor("python")
+    folder = BASE.parent / "subpatterns" / "or" / "simple"
+    parse_subpattern_from_file(str(folder / "incr.myt"), Languages.PYTHON, override=True)
+    pda = processor.create_pda(processor.generate_tree_from_file(str(folder / "increment.pyt")))
+    others = pdas[:2]
+
+    for code_file in ["increment_1_ok.py", "increment_2_ok.py", "increment_3_ok.py"]:
+        code_tree = processor.generate_tree_from_file(str(folder / code_file))
+        match_sets = MultiMatcher.match([pda] + others, code_tree)
+        assert match_sets[0].count() > 0
+        for match_set, single in zip(match_sets, [pda] + others):
+            assert match_summary(match_set) == match_summary(Matcher.match(single, code_tree))
+
+
+def test_no_patterns(base_futures_tree):
+    assert MultiMatcher.match([], base_futures_tree) == []
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "best"])
+def test_strategies(strategy, pdas, base_futures_tree, match_summary):
+    for match_set, pda in zip(MultiMatcher.match(pdas, base_futures_tree, strategy=strategy), pdas):
+        assert match_summary(match_set) == match_summary(Matcher.match(pda, base_futures_tree))
+
+
+def test_lean_histogram(pdas, base_futures_tree):
+    match_sets = MultiMatcher.match(pdas, base_futures_tree, lean=True, histogram=("x",))
+    for match_set, pda in zip(match_sets, pdas):
+        expected = Matcher.match(pda, base_futures_tree, lean=True, histogram=("x",))
+        assert not match_set.matches
+        assert match_set.count() == expected.count()
+        assert match_set.histograms == expected.histograms
+    assert "x" in match_sets[1].histograms
+
+
+def test_budget(pdas, base_futures_tree):
+    match_sets = MultiMatcher.match(pdas, base_futures_tree, max_steps=50)
+    assert all(match_set.status == BUDGET_EXCEEDED and match_set.exceeded == "max_steps" for match_set in match_sets)
+
+
+def test_events(pdas, base_futures_tree):
+    events = EventBuffer(kinds=(STEP, MATCH))
+    multi = MultiMatcher(pdas, base_futures_tree, events=events)
+    multi.start()
+    match_sets = multi.run()
+    assert len(list(events.of_kind(STEP))) == multi.n_step
+    matches = list(events.of_kind(MATCH))
+    assert len(matches) == sum(match_set.count() for match_set in match_sets)
+    for _, _, state_id, _, _ in matches:
+        assert any(state == multi.lanes[pattern].compiled.final_state for pattern, state in multi.members(state_id))
+
+
+@pytest.mark.parametrize("options", [{}, {"match_details": True}, {"count_only": True, "histogram": ("x",)}])
+def test_single_pass(options):
+    patterns = str(BASE.parent / "pattern_set" / "composite")
+    code = str(BASE.parent / "pattern_set" / "*.py")
+    expected = PytternMatcher(**options).match_wildcards(patterns, code)
+    matcher = PytternMatcher(single_pass=True, **options)
+    results = matcher.match_wildcards(patterns, code)
+    assert results.keys() == expected.keys()
+    for code_file, result in results.items():
+        if options.get("match_details"):
+            assert result[patterns][0] == expected[code_file][patterns][0]
+        elif options.get("count_only"):
+            assert {name: (match_set.count(), match_set.histograms) for name, match_set in result[patterns].items()} \
+                   == {name: (match_set.count(), match_set.histograms)
+                       for name, match_set in expected[code_file][patterns].items()}
+        else:
+            assert result == expected[code_file]
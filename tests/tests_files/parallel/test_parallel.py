@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.language_processors.languages import Languages
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+PATTERNS = TESTS / "simple_wildcards" / "*" / "*.pyt"
+CODE = TESTS / "simple_wildcards" / "*" / "*.py"
+
+
+def counts(results):
+    return [(code, pattern, {name: (match_set.count(), match_set.histograms) for name, match_set in leaves.items()})
+            for code, patterns in results.items() for pattern, leaves in patterns.items()]
+
+
+def test_same_results():
+    serial = PytternMatcher()
+    expected = serial.match_wildcards(PATTERNS, CODE)
+    parallel = PytternMatcher()
+    results = parallel.match_wildcards(PATTERNS, CODE, jobs=2)
+    assert list(results.items()) == list(expected.items())
+    assert any(result for patterns in results.values() for result in patterns.values())
+    assert parallel.n_pruned == serial.n_pruned > 0
+
+
+def test_same_counts():
+    patterns, code = TESTS / "histogram" / "*.pyt", TESTS / "equal_ast" / "*.py"
+    expected = PytternMatcher(count_only=True, histogram=["x"]).match_wildcards(patterns, code)
+    results = PytternMatcher(count_only=True, histogram=["x"]).match_wildcards(patterns, code, jobs=3)
+    assert counts(results) == counts(expected)
+    assert sum(leaves["assign_count.pyt"].count() for patterns in results.values()
+               for leaves in patterns.values()) > 0
+
+
+def test_subpatterns():
+    compound = TESTS / "subpatterns" / "or" / "compound"
+    parse_subpattern_from_file(str(compound / "loop.myt"), Languages.PYTHON, override=True)
+    expected = PytternMatcher().match_wildcards(compound / "loop.pyt", compound / "*_loop.py")
+    results = PytternMatcher().match_wildcards(compound / "loop.pyt", compound / "*_loop.py", jobs=2)
+    assert results == expected
+    assert all(result for patterns in results.values() for result in patterns.values())
+
+
+def test_details():
+    with pytest.raises(ValueError):
+        PytternMatcher(match_details=True).match_wildcards(PATTERNS, CODE, jobs=2)
@@ -0,0 +1,5 @@
+def g(a):
+    b = a
+    while b:
+        b -= 1
+    return b
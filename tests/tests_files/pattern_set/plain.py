@@ -0,0 +1,2 @@
+def h(a):
+    return a
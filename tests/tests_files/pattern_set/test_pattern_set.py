@@ -0,0 +1,108 @@
+import dataclasses
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from pyttern import PatternSet, PytternMatcher
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.pattern_set import compile_pattern
+from pyttern.subpattern.SubPattern import loaded_subpatterns
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+COMPOSITE = BASE / "composite"
+CODE = [BASE / "assign.py", BASE / "loop.py", BASE / "plain.py"]
+SIMPLE = sorted((TESTS / "simple_wildcards").glob("*/*.pyt"))
+
+
+def test_composite():
+    pattern_set = PatternSet.compile(COMPOSITE)
+    assert pattern_set.lang == "python"
+    results = [pattern_set.match_file(code)[str(COMPOSITE)] for code in CODE]
+    assert results == [True, False, False]
+    matcher = PytternMatcher()
+    assert results == [matcher.match(COMPOSITE, code, "python") for code in CODE]
+
+
+def test_directory_leaves(tmp_path):
+    # The leaves of a directory pattern are its files with an extension of a language, whatever the extension
+    (tmp_path / "or").mkdir()
+    (tmp_path / "or" / "while.pyt").write_text((COMPOSITE / "not" / "while.pyt").read_text())
+    (tmp_path / "or" / "assign.py").write_text((COMPOSITE / "assign.pyt").read_text())
+    (tmp_path / "README.md").write_text("Not a pattern\n")
+    tree = compile_pattern(tmp_path, get_processor("python"))
+    assert [child.name for child in tree.children] == ["or"]
+    assert [leaf.name for leaf in tree.children[0].children] == ["assign.py", "while.pyt"]
+    assert all(leaf.result for leaf in tree.children[0].children)
+
+    results = PytternMatcher().match_wildcards(tmp_path, BASE / "*.py")
+    assert [results[str(code)][str(tmp_path)] for code in CODE] == [True, True, False]
+
+
+def test_same_results():
+    pattern_set = PatternSet.compile(SIMPLE, Languages.PYTHON)
+    code_files = sorted((TESTS / "simple_wildcards").glob("*/*.py"))
+    for matcher in (PytternMatcher(), PytternMatcher(count_only=True), PytternMatcher(match_details=True)):
+        for code in code_files[:5]:
+            results = pattern_set.match_file(code, matcher)
+            assert list(results) == [str(pattern) for pattern in SIMPLE]
+            for pattern in SIMPLE:
+                expected = matcher.match(pattern, code, "python")
+                if matcher.count_only:
+                    assert {name: match_set.count() for name, match_set in results[str(pattern)].items()} == \
+                           {name: match_set.count() for name, match_set in expected.items()}
+                elif matcher.match_details:
+                    assert results[str(pattern)][0] == expected[0]
+                else:
+                    assert results[str(pattern)] == expected
+
+
+def test_match_many():
+    pattern_set = PatternSet.compile(SIMPLE)
+    code_files = sorted((TESTS / "simple_wildcards").glob("*/*.py"))
+    expected = pattern_set.match_many(code_files)
+    assert list(expected) == [str(code) for code in code_files]
+    assert pattern_set.match_many(code_files, jobs=2) == expected
+    with pytest.raises(ValueError):
+        pattern_set.match_many([TESTS.parent / "tests_files_jattern" / "trivial_case" / "sandwich" / "ok_package.java"])
+
+
+def test_threads():
+    pattern_set = PatternSet.compile(SIMPLE)
+    code_files = sorted((TESTS / "simple_wildcards").glob("*/*.py"))
+    expected = [pattern_set.match_file(code) for code in code_files]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(pattern_set.match_file, code_files)) == expected
+
+
+def test_immutable():
+    pattern_set = PatternSet.compile(COMPOSITE)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        pattern_set.lang = "java"
+    tree = pattern_set.patterns[0][1]
+    assert tree["name"] == "and" and [child["name"] for child in tree["children"]] == ["assign.pyt", "not"]
+    with pytest.raises(TypeError):
+        tree["name"] = "or"
+
+
+def test_pickle_subpatterns():
+    compound = TESTS / "subpatterns" / "or" / "compound"
+    parse_subpattern_from_file(str(compound / "loop.myt"), Languages.PYTHON, override=True)
+    pattern_set = PatternSet.compile(compound / "loop.pyt")
+    assert [name for name, _ in pattern_set.subpatterns] == ["Loop"]
+    data = pickle.dumps(pattern_set)
+
+    loop = loaded_subpatterns.pop("Loop")
+    try:
+        copy = pickle.loads(data)
+        assert "Loop" in loaded_subpatterns
+        assert loaded_subpatterns["Loop"].args_order == loop.args_order
+    finally:
+        loaded_subpatterns["Loop"] = loop
+    code_files = sorted(compound.glob("*_loop.py"))
+    assert copy.match_many(code_files) == pattern_set.match_many(code_files)
+    assert all(results[str(compound / "loop.pyt")] for results in copy.match_many(code_files).values())
@@ -0,0 +1,71 @@
+import math
+
+from pyttern.simulator.pda.PDA import PDA
+from pyttern.simulator.pda.PDA_alphabets import NavigationAlphabet
+from pyttern.simulator.pda.compiled import CompiledPDA, OTHER, ANY_NODE, BOUNDED_NODE, NAMED
+from pyttern.simulator.pda.optimize import optimize
+from pyttern.simulator.pda.transition import Transition, NodeTransition, NamedTransition
+
+
+class TestCompiledPDA:
+    def setup_method(self):
+        self.pda = PDA()
+        q1 = self.pda.new_state()
+        self.skip = Transition(0, "", NodeTransition(""), [NavigationAlphabet.RIGHT_SIBLING], 0, "")
+        self.funcdef = Transition(0, "", NodeTransition("FuncdefContext", 1, math.inf), [NavigationAlphabet.LEFT_CHILD],
+                                  q1, "I")
+        self.named = Transition(0, "", NamedTransition("x"), [], q1, "")
+        self.keyword = Transition(0, "I", NodeTransition("def"), [NavigationAlphabet.PARENT], q1, "")
+        for transition in (self.skip, self.funcdef, self.named, self.keyword):
+            self.pda.add_transition(transition)
+        self.pda.final_states = q1
+        self.compiled = CompiledPDA(self.pda)
+
+    def transitions(self, class_name=None, text=None):
+        key = self.compiled.node_key(class_name, text)
+        return [compiled[-1] for compiled in self.compiled.get_transitions(0, key)]
+
+    def test_dispatch_keeps_transition_order(self):
+        assert self.transitions("FuncdefContext") == [self.skip, self.funcdef, self.named]
+        assert self.transitions(text="def") == [self.skip, self.named, self.keyword]
+
+    def test_unknown_nodes_only_get_generic_transitions(self):
+        assert self.compiled.node_key("ClassdefContext", None) == OTHER
+        assert self.transitions("ClassdefContext") == [self.skip, self.named]
+        assert self.transitions(text="class") == [self.skip, self.named]
+        assert self.transitions(text="FuncdefContext") == [self.skip, self.funcdef, self.named]
+
+    def test_kinds_and_stack_encoding(self):
+        key = self.compiled.node_key("FuncdefContext", None)
+        kinds = [compiled[0] for compiled in self.compiled.get_transitions(0, key)]
+        assert kinds == [ANY_NODE, BOUNDED_NODE, NAMED]
+        keyword = self.compiled.get_transitions(0, self.compiled.node_key(None, "def"))[-1]
+        assert keyword[2:4] == (0, 1)
+        assert keyword[4] == (NavigationAlphabet.PARENT,)
+
+    def test_compiled_form_is_cached(self):
+        assert CompiledPDA.of(self.pda) is CompiledPDA.of(self.pda)
+        self.pda.add_transition(Transition(1, "", NodeTransition(""), [], 1, ""))
+        assert CompiledPDA.of(self.pda).get_transitions(1, OTHER)
+
+    def test_compiled_form_follows_changes_keeping_the_count(self):
+        compiled = CompiledPDA.of(self.pda)
+        self.pda.transitions[0][1] = Transition(0, "", NodeTransition("ClassdefContext", 1, math.inf),
+                                                [NavigationAlphabet.LEFT_CHILD], 1, "I")
+        self.pda.changed()
+        recompiled = CompiledPDA.of(self.pda)
+        assert recompiled is not compiled
+        assert recompiled.node_key("FuncdefContext", None) == OTHER
+        assert recompiled.node_key("ClassdefContext", None) != OTHER
+
+    def test_compiled_form_follows_optimization(self):
+        pda = PDA()
+        q1, q2 = pda.new_state(), pda.new_state()
+        pda.add_transition(Transition(0, "", NodeTransition(""), [NavigationAlphabet.LEFT_CHILD], q2, ""))
+        pda.add_transition(Transition(q2, "", NodeTransition(""), [NavigationAlphabet.PARENT], q1, ""))
+        pda.final_states = q1
+        compiled = CompiledPDA.of(pda)
+        stats = optimize(pda)
+        assert stats.transitions_before == stats.transitions_after
+        assert CompiledPDA.of(pda) is not compiled
+        assert CompiledPDA.of(pda).final_state == pda.final_states == 2
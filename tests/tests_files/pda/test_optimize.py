@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern.language_processors import base_processor_interface, get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.pda.PDA import PDA
+from pyttern.simulator.pda.PDA_alphabets import NavigationAlphabet
+from pyttern.simulator.pda.optimize import optimize, is_epsilon
+from pyttern.simulator.pda.transition import NodeTransition, Transition
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+TESTS = Path(__file__).parent.parent.parent
+
+
+def cases():
+    """
+    Every pattern of the test folders, with the code files next to it. The integration patterns are left out: they
+    explode combinatorially once their sub-patterns are loaded.
+    """
+    for lang, pattern_glob, code_glob in [("python", "tests_files/**/*.pyt", "*.py"),
+                                          ("java", "tests_files_jattern/**/*.jat", "*.java")]:
+        for pattern_path in sorted(TESTS.glob(pattern_glob)):
+            if "integration" in pattern_path.parts:
+                continue
+            for code_path in sorted(pattern_path.parent.glob(code_glob)):
+                if code_path.name.startswith("test_") or code_path.name == "__init__.py":
+                    continue
+                yield pytest.param(lang, pattern_path, code_path,
+                                   id=f"{pattern_path.relative_to(TESTS)}-{code_path.name}")
+
+
+def run(processor, pattern_path, code_tree, optimized):
+    # Sub-patterns are global and several folders define the same name, load the ones next to the pattern
+    for subpattern_path in sorted(pattern_path.parent.glob("*.myt")):
+        parse_subpattern_from_file(str(subpattern_path), Languages.PYTHON, override=True)
+    pda = processor.create_pda(processor.generate_tree_from_file(str(pattern_path)), optimize=optimized)
+    matcher = Matcher(pda, code_tree)
+    matcher.start().run()
+    return matcher
+
+
+@pytest.mark.parametrize("lang, pattern_path, code_path", list(cases()))
+def test_same_matches(lang, pattern_path, code_path):
+    processor = get_processor(lang)
+    code_tree = processor.generate_tree_from_file(str(code_path))
+    reference = run(processor, pattern_path, code_tree, optimized=False)
+    optimized = run(processor, pattern_path, code_tree, optimized=True)
+
+    def bindings(matcher):
+        return [tuple((name, id(value)) for name, value in m.bindings.items()) for m in matcher.match_set.matches]
+    assert bindings(optimized) == bindings(reference)
+    assert optimized.n_step <= reference.n_step
+
+
+def test_epsilon_collapse():
+    pda = PDA()
+    q1 = pda.new_state()
+    q2 = pda.new_state()
+    q3 = pda.new_state()
+    pda.add_transition(Transition(0, "", NodeTransition(""), [], q1, ""))
+    pda.add_transition(Transition(q1, "", NodeTransition(""), [], q2, ""))
+    pda.add_transition(Transition(q2, "", NodeTransition("a"), [NavigationAlphabet.RIGHT_SIBLING], q3, ""))
+    pda.final_states = q3
+
+    stats = optimize(pda)
+    assert (stats.states_before, stats.transitions_before) == (4, 3)
+    assert (stats.states_after, stats.transitions_after) == (2, 1)
+    assert not any(is_epsilon(transition) for transition in pda.get_transitions())
+    assert pda.states == {0, 1} and pda.initial_state == 0 and pda.final_states == 1
+
+
+def test_useless_and_equivalent_states():
+    pda = PDA()
+    q1, q2, q3, dead = (pda.new_state() for _ in range(4))
+    skip = [NavigationAlphabet.RIGHT_SIBLING]
+    # q1 and q2 are the same skip loop followed by "a"
+    pda.add_transition(Transition(0, "", NodeTransition("x"), skip, q1, ""))
+    pda.add_transition(Transition(0, "", NodeTransition("y"), skip, q2, ""))
+    pda.add_transition(Transition(0, "", NodeTransition("z"), skip, dead, ""))
+    for state in (q1, q2):
+        pda.add_transition(Transition(state, "", NodeTransition(""), skip, state, ""))
+        pda.add_transition(Transition(state, "", NodeTransition("a"), [], q3, ""))
+    pda.final_states = q3
+
+    stats = optimize(pda)
+    assert (stats.states_after, stats.transitions_after) == (3, 4)
+    assert [transition.q_prime for transition in pda.get_transitions(0)] == [1, 1]
+
+
+@pytest.mark.parametrize("lang, pattern", [("python", "?:*\n    for ? in ?:\n        ?*\n"),
+                                           ("java", "class Main {\n    void main() {\n        return;\n    }\n}\n")])
+def test_optimized_lazily(lang, pattern, monkeypatch):
+    calls = []
+    monkeypatch.setattr(base_processor_interface, "optimize_all", lambda pdas: calls.append(pdas) or pdas)
+    processor = get_processor(lang)
+    tree = processor.generate_tree_from_code(pattern)
+    plain = processor.create_pda(tree, optimize=False)
+    assert calls == []
+    optimized = processor.create_pda(tree)
+    assert len(calls) == 1 and optimized is not plain
+    assert processor.create_pda(tree, optimize=False) is plain
+    assert processor.create_pda(tree) is optimized
+
+
+def test_compiled_once_per_tree():
+    # Compiling removes the double wildcards from the tree: compiling it again would give other PDAs
+    processor = get_processor("python")
+    tree = processor.generate_tree_from_code("?:*\n    while ?:\n        ?*\n")
+    plain = processor.create_pda(tree, optimize=False)
+    for i in range(200):
+        processor.create_pda(processor.generate_tree_from_code(f"x = {i}\n"))
+    assert processor.create_pda(tree, optimize=False) is plain
+    code_tree = processor.generate_tree_from_code("while x:\n    x = x - 1\n")
+    assert Matcher.match(processor.create_pda(tree), code_tree).count() == 1
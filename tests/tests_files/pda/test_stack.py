@@ -0,0 +1,37 @@
+import pytest
+
+from pyttern.pytternfsm.python.match_set import path_to_list
+from pyttern.simulator.pda.stack import EMPTY_STACK, decode, encode, ends_with, pop, push
+
+
+class TestStack:
+    @pytest.mark.parametrize("word", ["", "I", "B", "IIB", "BIIBI"])
+    def test_encode_decode(self, word):
+        assert decode(encode(word)) == word
+
+    def test_push_pop(self):
+        stack = push(EMPTY_STACK, "B")
+        stack = push(stack, "II")
+        assert decode(stack) == "BII"
+        assert ends_with(stack, "II")
+        assert ends_with(stack, "BII")
+        assert ends_with(stack, "")
+        assert not ends_with(stack, "B")
+        assert not ends_with(stack, "IBII")
+        assert decode(pop(stack, "I")) == "BI"
+        assert pop(stack, "BII") == EMPTY_STACK
+
+    def test_empty_stack_does_not_end_with_symbol(self):
+        assert not ends_with(EMPTY_STACK, "I")
+        assert not ends_with(EMPTY_STACK, "B")
+
+
+def test_path_to_list():
+    path = None
+    for i in range(3):
+        path = (f"t{i}", i, path)
+    shared = ("t3", 3, path)
+    other = ("t4", 4, path)
+    assert path_to_list(None) == []
+    assert path_to_list(shared) == [("t0", 0), ("t1", 1), ("t2", 2), ("t3", 3)]
+    assert path_to_list(other)[-1] == ("t4", 4)
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PatternSet, PytternMatcher, fingerprints
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.language_processors.python_processor import PythonProcessor
+from pyttern.pda_cache import PDACache
+from pyttern.simulator.pda import serialize
+from pyttern.subpattern.SubPattern import loaded_subpatterns
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+SIMPLE = sorted((TESTS / "simple_wildcards").glob("*/*.pyt"))
+COMPOUND = TESTS / "subpatterns" / "or" / "compound"
+JAVA = sorted((TESTS.parent / "tests_files_jattern").glob("*/*/*.jat"))
+
+
+def compile_file(path, lang):
+    processor = get_processor(lang)
+    return processor.create_pda(processor.generate_tree_from_file(str(path)))
+
+
+@pytest.mark.parametrize("path, lang", [(path, "python") for path in SIMPLE[:10]] +
+                         [(path, "java") for path in JAVA[:5]] + [(COMPOUND / "loop.pyt", "python")])
+def test_round_trip(path, lang):
+    parse_subpattern_from_file(str(COMPOUND / "loop.myt"), Languages.PYTHON, override=True)
+    pdas = compile_file(path, lang)
+    assert serialize.loads(serialize.dumps(pdas)) == pdas
+    assert serialize.from_json(serialize.to_json(pdas)) == pdas
+
+
+def test_corrupted_data():
+    data = serialize.dumps(compile_file(SIMPLE[0], "python"))
+    with pytest.raises(ValueError):
+        serialize.loads(b"PYTPDA\x00" + data[7:])
+    with pytest.raises(ValueError):
+        serialize.loads(data[:len(data) // 2])
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    code_files = sorted((TESTS / "simple_wildcards").glob("*/*.py"))[:10]
+    expected = PatternSet.compile(SIMPLE).match_many(code_files)
+    cache = PDACache(tmp_path)
+    assert PatternSet.compile(SIMPLE, cache=cache).match_many(code_files) == expected
+    assert (cache.hits, cache.misses) == (0, len(SIMPLE))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The pattern should be loaded from the cache")
+
+    monkeypatch.setattr(PythonProcessor, "generate_tree_from_code", fail)
+    monkeypatch.setattr(PythonProcessor, "create_pda", fail)
+    cache = PDACache(tmp_path)
+    assert PatternSet.compile(SIMPLE, cache=cache).match_many(code_files) == expected
+    assert (cache.hits, cache.misses) == (len(SIMPLE), 0)
+
+
+def test_compiler_version(monkeypatch):
+    # A source checkout has no package version: a change of the compiler must still change the key
+    processor = get_processor("python")
+    key = PDACache.key("?x = ?\n", processor)
+    monkeypatch.setattr(fingerprints, "COMPILER_VERSION", fingerprints.COMPILER_VERSION + 1)
+    fingerprints.compiler_fingerprint.cache_clear()
+    try:
+        assert PDACache.key("?x = ?\n", processor) != key
+    finally:
+        monkeypatch.undo()
+        fingerprints.compiler_fingerprint.cache_clear()
+    assert PDACache.key("?x = ?\n", processor) == key
+
+
+def test_fingerprinted_sources():
+    # A renamed module would silently drop out of the fingerprints
+    for path in fingerprints.COMPILER_SOURCES + fingerprints.TREE_SOURCES:
+        assert (fingerprints.PACKAGE / path).is_file(), path
+
+
+def test_key():
+    processor = get_processor("python")
+    loop = loaded_subpatterns.pop("Loop", None)
+    try:
+        key = PDACache.key("?x = ?\n", processor)
+        assert PDACache.key("?y = ?\n", processor) != key
+        assert PDACache.key("?x = ?\n", get_processor("java")) != key
+        parse_subpattern_from_file(str(COMPOUND / "loop.myt"), Languages.PYTHON, override=True)
+        assert PDACache.key("?x = ?\n", processor) != key
+    finally:
+        if loop is not None:
+            loaded_subpatterns["Loop"] = loop
+
+
+def test_subpatterns(tmp_path):
+    parse_subpattern_from_file(str(COMPOUND / "loop.myt"), Languages.PYTHON, override=True)
+    code_files = sorted(COMPOUND.glob("*_loop.py"))
+    expected = PytternMatcher().match_wildcards(COMPOUND / "loop.pyt", COMPOUND / "*_loop.py")
+    for _ in range(2):
+        matcher = PytternMatcher(cache_dir=tmp_path)
+        assert matcher.match_wildcards(COMPOUND / "loop.pyt", COMPOUND / "*_loop.py") == expected
+    assert (matcher.pda_cache.hits, matcher.pda_cache.misses) == (1, 0)
+    assert all(results[str(COMPOUND / "loop.pyt")] for results in expected.values()) and len(code_files) > 1
+
+
+def test_unreadable_entry(tmp_path):
+    cache = PDACache(tmp_path)
+    expected = cache.compile_file(SIMPLE[0], get_processor("python"))
+    for entry in Path(cache.directory).iterdir():
+        entry.write_bytes(b"garbage")
+    cache = PDACache(tmp_path)
+    assert cache.compile_file(SIMPLE[0], get_processor("python")) == expected
+    assert cache.misses == 1
+    cache = PDACache(tmp_path)
+    assert cache.compile_file(SIMPLE[0], get_processor("python")) == expected
+    assert cache.hits == 1
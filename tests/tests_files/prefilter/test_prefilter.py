@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern import PytternMatcher
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.pda.requirements import required_symbols
+from pyttern.simulator.tree_index import TreeIndex
+
+SMALL = Path(__file__).parent.parent / "small"
+
+PATTERNS = [
+    "?:*\n    while ?:\n        ?*\n",
+    "?:*\n    ?.append(?)\n",
+    "?:*\n    ?x = ?x + 1\n",
+    "?:*\n    for ? in ?:\n        ?:*\n            return ?\n",
+    "?:*\n    yield ?\n",
+    "?\n",
+]
+
+
+def compile_pattern(code):
+    processor = get_processor("python")
+    return processor.create_pda(processor.generate_tree_from_code(code))
+
+
+def test_required_symbols():
+    required = required_symbols(compile_pattern("?:*\n    while ?:\n        ?*\n")["__main__"])
+    assert {"while", "While_stmtContext"} <= required
+
+    required = required_symbols(compile_pattern("?:*\n    ?.append(?)\n")["__main__"])
+    assert "append" in required
+
+    # Alternatives are not required: only the context of the wildcard is
+    required = required_symbols(compile_pattern("?\n")["__main__"])
+    assert required == {"File_inputContext", "<EOF>"}
+
+
+def test_tree_symbols():
+    tree = get_processor("python").generate_tree_from_code("x.append(1)\n")
+    symbols = TreeIndex.of(tree).symbols
+    assert {"append", "x", "1", "TrailerContext"} <= symbols
+    assert "while" not in symbols
+
+
+@pytest.mark.parametrize("code_file", sorted(SMALL.glob("*.py")), ids=lambda path: path.name)
+def test_can_match_is_sound(code_file):
+    code_tree = get_processor("python").generate_tree_from_file(str(code_file))
+    for pattern in PATTERNS:
+        pda = compile_pattern(pattern)
+        if not Matcher.can_match(pda, code_tree):
+            assert Matcher.match(pda, code_tree, stop_at_first=True).count() == 0
+
+
+def test_match_wildcards_prunes(tmp_path):
+    (tmp_path / "while.pyt").write_text("?:*\n    while ?:\n        ?*\n")
+    (tmp_path / "assign.pyt").write_text("?:*\n    ? = ?\n")
+    (tmp_path / "loop.py").write_text("while x:\n    x = x - 1\n")
+    (tmp_path / "straight.py").write_text("x = 1\n")
+
+    matcher = PytternMatcher()
+    results = matcher.match_wildcards(tmp_path / "*.pyt", tmp_path / "*.py")
+    assert matcher.n_pruned == 1
+    assert results[str(tmp_path / "straight.py")][str(tmp_path / "while.pyt")] is False
+    assert results[str(tmp_path / "loop.py")][str(tmp_path / "while.pyt")] is True
+
+    unfiltered = PytternMatcher(prefilter=False)
+    assert unfiltered.match_wildcards(tmp_path / "*.pyt", tmp_path / "*.py") == results
+    assert unfiltered.n_pruned == 0
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+from antlr4 import ParserRuleContext
+from antlr4.tree.Tree import TerminalNode
+
+from pyttern.language_processors import python_frontend
+from pyttern.language_processors.python_processor import PythonProcessor
+from pyttern.simulator.Matcher import Matcher
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+# The code files of the tests, without the large ones that take ANTLR several seconds each
+CODE = sorted(path for path in TESTS.rglob("*.py")
+              if "large" not in path.relative_to(TESTS).parts and not path.name.startswith("test"))
+
+UNSUPPORTED = [
+    "x = ?\n",
+    "if (n := 1):\n    pass\n",
+    "def f(a, /, b):\n    pass\n",
+    "match x:\n    case 1:\n        pass\n",
+    "case = 1\n",
+    "x = 1_000\n",
+    "numéro = 1\n",
+    "x = 'a\\\nb'\n",
+    "x = f\"{x[\"a\"]}\"\n",
+]
+
+
+def shape(node):
+    """Structure of a tree with its tokens, without the invokingState of the contexts (-1 for the fast front end)."""
+    if isinstance(node, TerminalNode):
+        token = node.symbol
+        return (type(node).__name__, token.type, token.text, token.line, token.column, token.start, token.stop,
+                token.tokenIndex)
+    tokens = ()
+    if isinstance(node, ParserRuleContext):
+        tokens = tuple(None if token is None else (token.type, token.text, token.tokenIndex)
+                       for token in (node.start, node.stop))
+    for child in node.children or ():
+        assert child.parentCtx is node
+    return type(node).__name__, tokens, None if node.children is None else tuple(shape(c) for c in node.children)
+
+
+def antlr_tree(code):
+    return PythonProcessor().parse_code(code)
+
+
+@pytest.mark.parametrize("path", CODE, ids=lambda path: str(path.relative_to(TESTS)))
+def test_conformance(path):
+    code = path.read_text(encoding="utf-8").strip() + "\n"
+    try:
+        tree = python_frontend.parse(code)
+    except python_frontend.UnsupportedCode:
+        pytest.skip("Not supported by the fast front end")
+    assert shape(tree) == shape(antlr_tree(code))
+
+
+def test_constructs():
+    code = ("import a.b as c\nfrom . import (d, e,)\n\n\n@dec.f(1)\nclass A(B, metaclass=M):\n"
+            "    x: int = 1  # comment\n\n    async def f(self, a, b: int = 1, *args, c, **kw) -> None:\n"
+            "        async with a as b, c:\n            pass\n        return [i async for i in a if i], {**d}, {*e}\n"
+            "\n\ntry:\n    y = -a ** -b * c @ d // e % f + g - h << i >> j & k ^ l | m\nexcept A as e:\n"
+            "    raise B from e\nelse:\n    z = lambda *, k=1: a[1:2, ::3] if not a is not b else (yield)\n"
+            "finally:\n    s = 'a' \"b\" '''c\nd''' f'{x!r}'\n")
+    assert shape(python_frontend.parse(code)) == shape(antlr_tree(code))
+
+
+def test_fstrings():
+    # From Python 3.12, tokenize splits f-strings, which are still one STRING token for ANTLR
+    code = "x = f\"{x['a']!r:>{w}}\" + f'''\n{y}\n''' + f'{f\"{y}\"}' + rf'\\{x}' 'z'\n"
+    assert shape(python_frontend.parse(code)) == shape(antlr_tree(code))
+
+
+@pytest.mark.parametrize("code", UNSUPPORTED)
+def test_unsupported(code):
+    with pytest.raises(python_frontend.UnsupportedCode):
+        python_frontend.parse(code)
+
+
+def test_fallback():
+    processor = PythonProcessor()
+    code = "numéro = len(a)\nif numéro > 10:\n    pass\n"
+    with pytest.raises(python_frontend.UnsupportedCode):
+        python_frontend.parse(code)
+    assert shape(processor.generate_tree_from_code(code)) == shape(antlr_tree(code))
+
+
+def test_same_matches(monkeypatch):
+    processor = PythonProcessor()
+    pda = processor.create_pda(processor.generate_tree_from_code("?:*\n    ?x = ?\n"))
+    paths = sorted((TESTS / "simple_wildcards").glob("*/*.py"))[:10]
+    fast = [Matcher.match(pda, python_frontend.parse(path.read_text().strip() + "\n")).count() for path in paths]
+    monkeypatch.setattr(PythonProcessor, "fast_frontend", False)
+    processor.generate_tree_from_file.cache_clear()
+    processor.generate_tree_from_code.cache_clear()
+    assert [Matcher.match(pda, processor.generate_tree_from_file(str(path))).count() for path in paths] == fast
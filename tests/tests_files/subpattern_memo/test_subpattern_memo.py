@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+
+from pyttern.language_processors import get_processor
+from pyttern.language_processors.languages import Languages
+from pyttern.simulator.Matcher import Matcher, SubpatternMemo
+from pyttern.subpattern.subpattern_parser import parse_subpattern_from_file
+
+SUBPATTERNS = Path(__file__).parent.parent / "subpatterns"
+CODE = SUBPATTERNS / "or" / "simple" / "increment_1_ok.py"
+
+
+class NoMemo(SubpatternMemo):
+    """A memo that never stores anything, to compare with matching without memoization."""
+
+    class _Table(dict):
+        def __setitem__(self, key, value):
+            pass
+
+    def __init__(self):
+        super().__init__()
+        self.table = NoMemo._Table()
+
+
+def run(pattern, memo):
+    processor = get_processor("python")
+    pda = processor.create_pda(processor.generate_tree_from_code(pattern))
+    return Matcher.match(pda, processor.generate_tree_from_file(str(CODE)), subpattern_memo=memo)
+
+
+def signature(match_set):
+    return sorted((tuple((k, v.getText() if v is not None else None) for k, v in m.bindings.items()),
+                   tuple(str(t) for t, _ in m.matches)) for m in match_set.matches)
+
+
+@pytest.mark.parametrize("pattern, subpattern", [
+    ("?:*\n    ?$Incr(?x)\n", "or/simple/incr.myt"),
+    ("def ?(?*):\n    ?:*\n        for ?i in range(?*):\n            ?$Incr(?i)\n", "or/simple/incr.myt"),
+    ("?:*\n    ?:*\n        ?$Return()\n", "not/simple/no_return.myt"),
+])
+def test_memo_same_results(pattern, subpattern):
+    parse_subpattern_from_file(str(SUBPATTERNS / subpattern), Languages.PYTHON, override=True)
+
+    memo = SubpatternMemo()
+    memoized = run(pattern, memo)
+    reference = NoMemo()
+    assert signature(memoized) == signature(run(pattern, reference))
+    assert memo.misses > 0
+    assert memo.hits + memo.misses == reference.misses
+
+
+def test_memo_hits():
+    parse_subpattern_from_file(str(SUBPATTERNS / "or" / "simple" / "incr.myt"), Languages.PYTHON, override=True)
+    pattern = "?:*\n    ?$Incr(?x)\n"
+
+    memo = SubpatternMemo()
+    match_set = run(pattern, memo)
+    assert memo.hits > 0
+    assert len(memo) == memo.misses
+
+    # A shared memo answers every call of a second run
+    misses = memo.misses
+    assert signature(run(pattern, memo)) == signature(match_set)
+    assert memo.misses == misses
+
+
+def test_memo_shared_between_trees():
+    parse_subpattern_from_file(str(SUBPATTERNS / "or" / "simple" / "incr.myt"), Languages.PYTHON, override=True)
+    processor = get_processor("python")
+    pda = processor.create_pda(processor.generate_tree_from_code("def ?(?*):\n    ?$Incr(?x)\n"))
+    increment = processor.generate_tree_from_code("def f():\n    x = x + 1\n")
+    decrement = processor.generate_tree_from_code("def f():\n    x = x - 7\n")
+    expected = signature(Matcher.match(pda, decrement))
+
+    # The nodes of both trees have the same ids in their indexes, the calls on the second tree must not hit the memo
+    memo = SubpatternMemo()
+    Matcher.match(pda, increment, subpattern_memo=memo)
+    hits = memo.hits
+    assert signature(Matcher.match(pda, decrement, subpattern_memo=memo)) == expected
+    assert memo.hits == hits
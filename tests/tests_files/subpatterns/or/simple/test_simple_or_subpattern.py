@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
@@ -29,4 +32,15 @@ def test_incr_subpattern():
 
     code_path = Path(__file__).parent / "increment_3_ok.py"
     res, det = match_files(pattern_path, code_path, match_details=True)
-    assert res, det
\ No newline at end of file
+    assert res, det
+
+
+def test_incr_subpattern_cli():
+    base = Path(__file__).parent
+    root = base.parents[4]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(root), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-m", "pyttern.main", "-s", str(base / "incr.myt"),
+                             str(base / "increment.pyt"), str(base / "increment_1_ok.py"), "--lang", "python"],
+                            env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Match found!" in result.stdout
@@ -0,0 +1,82 @@
+import sys
+
+import pytest
+from loguru import logger
+
+from pyttern import tracing
+from pyttern.language_processors import get_processor
+from pyttern.main import configure_logger
+from pyttern.simulator.Matcher import Matcher
+
+
+@pytest.fixture
+def trace_messages():
+    messages = []
+    logger.enable("pyttern")
+    handler = logger.add(messages.append, level="TRACE", filter=lambda record: record["level"].name == "TRACE")
+    yield messages
+    logger.remove(handler)
+    tracing.enable(False)
+
+
+def run_match():
+    processor = get_processor("python")
+    pda = processor.create_pda(processor.generate_tree_from_code("?x = ?"))
+    return Matcher.match(pda, processor.generate_tree_from_code("a = 1\n"))
+
+
+def test_trace_points_disabled(trace_messages):
+    tracing.enable(False)
+    assert run_match().count() == 1
+    assert not any("Step" in message for message in trace_messages)
+
+
+def test_trace_points_enabled(trace_messages):
+    tracing.enable()
+    assert run_match().count() == 1
+    assert any("Step" in message for message in trace_messages)
+    assert any("New variable: x" in message for message in trace_messages)
+
+
+@pytest.mark.parametrize("lang, pattern", [("python", "def ?(?*):\n    return ?\n"),
+                                           ("java", "class # {\n    # #(#*) {\n        return #;\n    }\n}\n")])
+def test_translator_trace_points(trace_messages, lang, pattern):
+    # The translators log their trace points whenever a handler accepts them, whatever the switch
+    processor = get_processor(lang)
+    tracing.enable(False)
+    processor.create_pda(processor.generate_tree_from_code(pattern))
+    assert any("Visiting" in message for message in trace_messages)
+
+
+def test_lazy_messages():
+    # Only a DEBUG handler, whatever the handlers added by the other tests
+    logger.remove()
+    logger.add(lambda _: None, level="DEBUG")
+    built = []
+    try:
+        tracing.log(lambda: built.append("trace") or "trace")
+        tracing.log(lambda: built.append("debug") or "debug", "DEBUG")
+    finally:
+        logger.remove()
+        logger.add(sys.stderr)
+    assert built == ["debug"]
+
+
+def test_step_tracing_hint(trace_messages, monkeypatch):
+    monkeypatch.setattr(tracing, "_hinted", False)
+    tracing.enable(False)
+    run_match()
+    run_match()
+    assert sum("tracing.enable()" in message for message in trace_messages) == 1
+
+
+def test_configure_logger_switch():
+    try:
+        configure_logger(1)
+        assert not tracing.enabled
+        configure_logger(2)
+        assert tracing.enabled
+    finally:
+        tracing.enable(False)
+        logger.remove()
+        logger.add(sys.stderr)
@@ -0,0 +1,156 @@
+import marshal
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from antlr4 import ParserRuleContext
+from antlr4.tree.Tree import TerminalNode
+
+from pyttern import PytternMatcher, fingerprints
+from pyttern.language_processors import get_processor, tree_serialize
+from pyttern.language_processors.python_processor import PythonProcessor
+from pyttern.simulator.Matcher import Matcher
+from pyttern.tree_cache import TreeCache
+
+BASE = Path(__file__).parent
+TESTS = BASE.parent
+PYTHON = sorted((TESTS / "simple_wildcards").glob("*/*.py"))
+JAVA = sorted((TESTS.parent / "tests_files_jattern").glob("*/*/*.java"))
+ROOT = TESTS.parent.parent
+
+
+def shape(node):
+    """Structure of a tree with its tokens and the attributes of its nodes."""
+    if isinstance(node, TerminalNode):
+        token = node.symbol
+        return (type(node).__name__, token.type, token.text, token.line, token.column, token.start, token.stop,
+                token.tokenIndex)
+    tokens = ()
+    if isinstance(node, ParserRuleContext):
+        tokens = tuple(None if token is None else (token.type, token.text, token.tokenIndex)
+                       for token in (node.start, node.stop))
+    children = None if node.children is None else tuple(shape(child) for child in node.children)
+    for child in node.children or ():
+        assert child.parentCtx is node
+    return type(node).__name__, tokens, node.invokingState, children
+
+
+@pytest.mark.parametrize("path, lang", [(path, "python") for path in PYTHON[:10]] +
+                         [(path, "java") for path in JAVA[:10]])
+def test_round_trip(path, lang):
+    processor = get_processor(lang)
+    tree = processor.generate_tree_from_file(str(path))
+    loaded = tree_serialize.loads(tree_serialize.dumps(tree), processor.tree_node_classes())
+    assert shape(loaded) == shape(tree)
+    assert loaded.getText() == tree.getText()
+
+
+def test_same_matches():
+    processor = get_processor("python")
+    pda = processor.create_pda(processor.generate_tree_from_code("?:*\n    ?x = ?\n"))
+    for path in PYTHON[:10]:
+        tree = processor.generate_tree_from_file(str(path))
+        loaded = tree_serialize.loads(tree_serialize.dumps(tree), processor.tree_node_classes())
+        assert Matcher.match(pda, loaded).count() == Matcher.match(pda, tree).count()
+
+
+def test_corrupted_data():
+    processor = get_processor("python")
+    data = tree_serialize.dumps(processor.generate_tree_from_file(str(PYTHON[0])))
+    with pytest.raises(ValueError):
+        tree_serialize.loads(data[:len(data) // 2], processor.tree_node_classes())
+    with pytest.raises(ValueError):
+        tree_serialize.loads(b"garbage", processor.tree_node_classes())
+
+
+def test_foreign_classes():
+    processor = get_processor("python")
+    data = tree_serialize.dumps(processor.generate_tree_from_file(str(PYTHON[0])))
+    # The classes of another language, and any other class named in the data, are not created
+    with pytest.raises(ValueError):
+        tree_serialize.loads(data, get_processor("java").tree_node_classes())
+    header = tree_serialize._HEADER
+    classes, tokens, encoded = marshal.loads(data[len(header):])
+    forged = header + marshal.dumps(((("subprocess", "Popen"),) + classes[1:], tokens, encoded))
+    with pytest.raises(ValueError):
+        tree_serialize.loads(forged, processor.tree_node_classes())
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    processor = get_processor("python")
+    cache = TreeCache(tmp_path)
+    trees = [shape(cache.tree_of_file(str(path), processor)) for path in PYTHON[:5]]
+    assert (cache.hits, cache.misses) == (0, 5)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The tree should be loaded from the cache")
+
+    monkeypatch.setattr(PythonProcessor, "generate_tree_from_file", fail)
+    cache = TreeCache(tmp_path)
+    assert [shape(cache.tree_of_file(str(path), processor)) for path in PYTHON[:5]] == trees
+    assert (cache.hits, cache.misses) == (5, 0)
+
+
+def test_key(monkeypatch):
+    processor = get_processor("python")
+    key = TreeCache.key(b"x = 1\n", processor)
+    assert TreeCache.key(b"x = 2\n", processor) != key
+    assert TreeCache.key(b"x = 1\n", get_processor("java")) != key
+    monkeypatch.setattr(PythonProcessor, "grammar_version", lambda self: "another grammar")
+    assert TreeCache.key(b"x = 1\n", processor) != key
+
+
+def test_pruner_version(monkeypatch):
+    processor = get_processor("python")
+    key = TreeCache.key(b"x = 1\n", processor)
+    monkeypatch.setattr(fingerprints, "source_fingerprint", lambda *paths: "another pruner")
+    fingerprints.tree_fingerprint.cache_clear()
+    try:
+        assert TreeCache.key(b"x = 1\n", processor) != key
+    finally:
+        monkeypatch.undo()
+        fingerprints.tree_fingerprint.cache_clear()
+
+
+def test_eviction(tmp_path):
+    processor = get_processor("python")
+    sizes = [len(tree_serialize.dumps(processor.generate_tree_from_file(str(path)))) for path in PYTHON[:6]]
+    cache = TreeCache(tmp_path, max_size=sum(sizes[:3]))
+    for time, path in enumerate(PYTHON[:3]):
+        cache.tree_of_file(str(path), processor)
+        for entry in os.scandir(cache.directory):
+            if entry.stat().st_mtime > 10 ** 6:
+                os.utime(entry.path, (time, time))
+    # The first file is used again, the second one is now the least recently used
+    cache.tree_of_file(str(PYTHON[0]), processor)
+    assert cache.evictions == 0
+    cache.tree_of_file(str(PYTHON[3]), processor)
+    assert cache.evictions > 0
+    assert sum(entry.stat().st_size for entry in os.scandir(cache.directory)) <= cache.max_size
+
+    cache = TreeCache(tmp_path, max_size=sum(sizes[:3]))
+    cache.tree_of_file(str(PYTHON[0]), processor)
+    cache.tree_of_file(str(PYTHON[1]), processor)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_matcher(tmp_path, jobs):
+    patterns, code = TESTS / "simple_wildcards" / "*" / "*.pyt", TESTS / "simple_wildcards" / "*" / "*.py"
+    expected = PytternMatcher().match_wildcards(patterns, code)
+    for _ in range(2):
+        matcher = PytternMatcher(cache_dir=tmp_path)
+        assert matcher.match_wildcards(patterns, code, jobs=jobs) == expected
+    assert (matcher.tree_cache.hits, matcher.tree_cache.misses) == (len(expected), 0)
+
+
+def test_cli_single_file(tmp_path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "pyttern.main", str(TESTS / "simple_wildcards" / "arg" / "simple_wildcard.pyt"),
+               str(PYTHON[0]), "--lang", "python", "--cache-dir", str(tmp_path)]
+    subprocess.run(command, env=env, capture_output=True, check=True)
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    assert "Compiled pattern cache: 1 hit(s), 0 miss(es)." in output
+    assert "Parse tree cache: 1 hit(s), 0 miss(es), 0 eviction(s)." in output
@@ -0,0 +1,73 @@
+from antlr4.tree.Tree import TerminalNode
+
+from pyttern.language_processors import get_processor
+from pyttern.simulator.Matcher import Matcher
+from pyttern.simulator.tree_index import TreeIndex, NO_NODE
+
+
+def test_index_is_cached(base_futures_tree):
+    assert TreeIndex.of(base_futures_tree) is TreeIndex.of(base_futures_tree)
+
+
+def test_index_matches_tree(base_futures_tree):
+    index = TreeIndex.of(base_futures_tree)
+    assert index.nodes[0] is base_futures_tree
+    assert index.parent[0] == NO_NODE
+
+    for node_id, node in enumerate(index.nodes):
+        assert index.node_id(node) == node_id
+        children = getattr(node, "children", None) or []
+        assert index.child_count[node_id] == len(children)
+        assert index.class_names[index.class_id[node_id]] == node.__class__.__name__
+        if isinstance(node, TerminalNode):
+            assert index.texts[node_id] == str(node)
+        else:
+            assert index.texts[node_id] is None
+
+        child_id = index.first_child[node_id]
+        for child in children:
+            assert index.nodes[child_id] is child
+            assert index.parent[child_id] == node_id
+            child_id = index.next_sibling[child_id]
+        assert child_id == NO_NODE
+
+
+def test_subtree_ids_are_consecutive(base_futures_tree):
+    index = TreeIndex.of(base_futures_tree)
+    for node_id in range(len(index)):
+        child_id = index.first_child[node_id]
+        if child_id != NO_NODE:
+            assert child_id == node_id + 1
+
+
+def test_structural_hashes(base_futures_tree):
+    index = TreeIndex.of(base_futures_tree)
+    by_text = {}
+    for node_id, node in enumerate(index.nodes):
+        assert index.sizes[node_id] == 1 + sum(index.sizes[child_id] for child_id in _children(index, node_id))
+        by_text.setdefault((node.__class__.__name__, node.getText()), []).append(node_id)
+
+    compared = 0
+    for node_ids in by_text.values():
+        for other in node_ids[1:]:
+            same = Matcher._compare_trees(index.nodes[node_ids[0]], index.nodes[other])
+            assert index.equal_subtrees(node_ids[0], other) == same
+            if same:
+                assert index.hashes[node_ids[0]] == index.hashes[other]
+            compared += 1
+    assert compared > 0
+    assert not index.equal_subtrees(0, 1)
+
+
+def test_repeated_named_wildcard():
+    processor = get_processor("python")
+    pattern = processor.create_pda(processor.generate_tree_from_code("?x = ?x + 1\n"))
+    assert Matcher.match(pattern, processor.generate_tree_from_code("a.b = a.b + 1\n")).count() > 0
+    assert Matcher.match(pattern, processor.generate_tree_from_code("a.b = a.c + 1\n")).count() == 0
+
+
+def _children(index, node_id):
+    child_id = index.first_child[node_id]
+    while child_id != NO_NODE:
+        yield child_id
+        child_id = index.next_sibling[child_id]